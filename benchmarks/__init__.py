@@ -0,0 +1,6 @@
+"""littledl 与版本安装流程的基准测试
+
+替身服务器（server.py / h2server.py）在本地模拟官方源和 BMCLAPI 镜像，
+场景（scenarios.py）分别压测 MCBatchDownloader、Downloader 和
+MinecraftDownloader.download_version，输出 JSON 供回归对比。用法见 __main__.py。
+"""
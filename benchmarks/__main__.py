@@ -0,0 +1,174 @@
+"""运行基准测试并输出 JSON
+
+    python -m benchmarks                       # 全部场景，默认规模
+    python -m benchmarks --quick               # 缩小规模，快速冒烟
+    python -m benchmarks -s tiny_assets -s large_file -o results.json
+    python -m benchmarks --latency-ms 30 --bandwidth-mbps 50 --error-rate 0.01
+
+每个场景在独立子进程中运行，结果汇总为一个 JSON 文档，便于做回归对比。
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .scenarios import RESULT_PREFIX, SCENARIOS
+from .server import fault_config
+
+ROOT = Path(__file__).resolve().parents[1]
+SCHEMA_VERSION = 1
+
+QUICK_SPEC = {
+    "tiny_assets": 1000,
+    "large_size": 50 * 1024 * 1024,
+    "install_assets": 500,
+    "install_libraries": 10,
+    "install_client_size": 4 * 1024 * 1024,
+}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="littledl 与安装流程的基准测试")
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="要运行的场景，可重复指定；默认运行全部",
+    )
+    parser.add_argument("-o", "--output", help="结果 JSON 文件，默认输出到标准输出")
+    parser.add_argument("--quick", action="store_true", help="使用缩小的规模")
+    parser.add_argument("--assets", type=int, help="tiny_assets 的文件数（默认 10000）")
+    parser.add_argument("--large-mb", type=int, help="large_file 的大小（默认 500）")
+    parser.add_argument("--install-assets", type=int, help="安装场景的资源文件数（默认 3000）")
+    parser.add_argument("--install-libraries", type=int, help="安装场景的库文件数（默认 40）")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="服务端每个请求的固定延迟")
+    parser.add_argument("--bandwidth-mbps", type=float, default=0.0, help="服务端每个响应的限速（MB/s），0 不限")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="镜像随机返回 429/5xx 的比例")
+    parser.add_argument("--ui-cost-ms", type=float, default=5.0, help="ui_bridge 场景中每次界面刷新的模拟耗时")
+    parser.add_argument("--timeout", type=float, default=1800, help="单个场景的超时（秒）")
+    parser.add_argument("-v", "--verbose", action="store_true", help="显示场景进程的日志输出")
+    return parser.parse_args(argv)
+
+
+def build_params(args: argparse.Namespace) -> Dict:
+    spec: Dict = dict(QUICK_SPEC) if args.quick else {}
+    if args.assets is not None:
+        spec["tiny_assets"] = args.assets
+    if args.large_mb is not None:
+        spec["large_size"] = args.large_mb * 1024 * 1024
+    if args.install_assets is not None:
+        spec["install_assets"] = args.install_assets
+    if args.install_libraries is not None:
+        spec["install_libraries"] = args.install_libraries
+
+    network = {
+        "latency_ms": args.latency_ms,
+        "bandwidth": int(args.bandwidth_mbps * 1024 * 1024),
+    }
+    return {
+        "spec": spec,
+        "faults": {
+            "official": fault_config(**network),
+            "mirror": fault_config(**network, error_rate=args.error_rate),
+        },
+        "ui_cost_ms": args.ui_cost_ms,
+    }
+
+
+def run_scenario(name: str, params: Dict, timeout: float, verbose: bool) -> Dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    # 场景进程在临时目录中运行，启动器的日志和配置文件不会写进仓库
+    with tempfile.TemporaryDirectory(prefix="littledl-bench-run-") as cwd:
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.scenarios", name, "--params", json.dumps(params)],
+                cwd=cwd,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=None if verbose else subprocess.PIPE,
+                text=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return {"error": f"timed out after {timeout:g}s"}
+
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX) :])
+    tail = (proc.stderr or "").strip().splitlines()[-20:]
+    return {"error": f"exit code {proc.returncode}", "stderr_tail": tail}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    params = build_params(args)
+    names = args.scenario or list(SCENARIOS)
+
+    report = {
+        "schema": SCHEMA_VERSION,
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "results": {},
+    }
+    failed = False
+    for name in names:
+        print(f"[benchmarks] {name} ...", file=sys.stderr, flush=True)
+        result = run_scenario(name, params, args.timeout, args.verbose)
+        report["results"][name] = result
+        failed = failed or "error" in result
+        summary = result.get("skipped") or result.get("error") or _summary(result)
+        print(f"[benchmarks] {name}: {summary}", file=sys.stderr, flush=True)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 1 if failed else 0
+
+
+def _summary(result: Dict) -> str:
+    if "reduction_percent" in result:
+        return (
+            f"{result['assets']} assets, {result['legacy_bytes']} -> {result['columnar_bytes']} bytes "
+            f"(-{result['reduction_percent']}%)"
+        )
+    if "modes" in result:
+        return ", ".join(
+            f"{mode} {info['wall_seconds']}s ({info.get('slowdown_percent', 0)}%)"
+            for mode, info in result["modes"].items()
+        )
+    latency = result.get("latency_ms", {})
+    return (
+        f"{result.get('wall_seconds')}s, {result.get('throughput_mb_s')} MB/s, "
+        f"{result.get('files_per_second')} files/s, p50 {latency.get('p50')}ms, "
+        f"p99 {latency.get('p99')}ms, failed {result.get('failed_files')}"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""基准测试用的确定性文件目录
+
+服务端进程和被测客户端进程用同一份 spec 各自生成目录，内容、大小和 sha1
+完全一致，无需在进程间传递文件数据。文件内容按需生成（8 字节种子头 +
+按种子偏移的循环模式），500MB 的大文件也不会占用内存。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+_PATTERN_SIZE = 1 << 16
+_PATTERN = random.Random(0x5EED).randbytes(_PATTERN_SIZE)
+_HEADER_SIZE = 8
+
+# 不能以 ".0" 结尾：下载器查找版本时会把尾部的 ".0" 去掉（1.8.0 → 1.8）
+VERSION_ID = "bench-1.1"
+ASSET_INDEX_ID = "bench"
+
+DEFAULT_SPEC = {
+    "seed": 20240601,
+    "tiny_assets": 10000,
+    "tiny_min_size": 128,
+    "tiny_max_size": 8192,
+    "large_size": 500 * 1024 * 1024,
+    "install_libraries": 40,
+    "install_assets": 3000,
+    "install_client_size": 20 * 1024 * 1024,
+}
+
+
+def content_slice(seed: int, offset: int, length: int) -> bytes:
+    """生成虚拟文件 [offset, offset + length) 的内容"""
+    out = bytearray()
+    if offset < _HEADER_SIZE:
+        header = seed.to_bytes(_HEADER_SIZE, "little")
+        take = min(length, _HEADER_SIZE - offset)
+        out += header[offset : offset + take]
+        offset += take
+        length -= take
+    shift = (seed * 2654435761) % _PATTERN_SIZE
+    while length > 0:
+        pos = (offset - _HEADER_SIZE + shift) % _PATTERN_SIZE
+        take = min(length, _PATTERN_SIZE - pos)
+        out += _PATTERN[pos : pos + take]
+        offset += take
+        length -= take
+    return bytes(out)
+
+
+def content_sha1(seed: int, size: int, block: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    for offset in range(0, size, block):
+        h.update(content_slice(seed, offset, min(block, size - offset)))
+    return h.hexdigest()
+
+
+@dataclass
+class Entry:
+    """目录中的一个文件：按种子生成，或直接给出内容（JSON 元数据）"""
+
+    size: int
+    seed: int = 0
+    sha1: Optional[str] = None
+    data: Optional[bytes] = None
+
+    def read(self, offset: int, length: int) -> bytes:
+        if self.data is not None:
+            return self.data[offset : offset + length]
+        return content_slice(self.seed, offset, length)
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha1 or f"{self.seed:x}-{self.size:x}"}"'
+
+
+@dataclass
+class Catalog:
+    entries: Dict[str, Entry] = field(default_factory=dict)
+    tiny_assets: List[Tuple[str, int]] = field(default_factory=list)
+    install_assets: List[Tuple[str, int]] = field(default_factory=list)
+    libraries: List[Tuple[str, str, int]] = field(default_factory=list)
+    large_key: str = "files/large.bin"
+
+    def get(self, key: str) -> Optional[Entry]:
+        return self.entries.get(key)
+
+    def install_bytes(self) -> int:
+        """一次完整安装需要下载的字节数（不含版本 JSON 和版本列表）"""
+        keys = [k for k in self.entries if k.startswith("meta/v1/objects/")]
+        keys.append(f"meta/v1/packages/{ASSET_INDEX_ID}/{ASSET_INDEX_ID}.json")
+        return (
+            sum(self.entries[k].size for k in keys)
+            + sum(size for _, _, size in self.libraries)
+            + sum(size for _, size in self.install_assets)
+        )
+
+
+def _add_object(catalog: Catalog, seed: int, size: int) -> Tuple[str, int]:
+    sha1 = content_sha1(seed, size)
+    catalog.entries[f"objects/{sha1[:2]}/{sha1}"] = Entry(size=size, seed=seed, sha1=sha1)
+    return sha1, size
+
+
+def _asset_size(rng: random.Random) -> int:
+    # 资源以几 KB 的小文件为主，少量音频在几百 KB 到几 MB
+    roll = rng.random()
+    if roll < 0.85:
+        return rng.randint(200, 16 * 1024)
+    if roll < 0.98:
+        return rng.randint(16 * 1024, 256 * 1024)
+    return rng.randint(256 * 1024, 3 * 1024 * 1024)
+
+
+def build_catalog(spec: dict, official_base: str) -> Catalog:
+    """按 spec 生成目录；official_base 用于渲染版本列表和版本 JSON 中的官方地址"""
+    spec = {**DEFAULT_SPEC, **spec}
+    rng = random.Random(spec["seed"])
+    catalog = Catalog()
+    next_seed = spec["seed"] * 1000003
+
+    def seed() -> int:
+        nonlocal next_seed
+        next_seed += 1
+        return next_seed
+
+    for _ in range(spec["tiny_assets"]):
+        size = rng.randint(spec["tiny_min_size"], spec["tiny_max_size"])
+        catalog.tiny_assets.append(_add_object(catalog, seed(), size))
+
+    catalog.entries[catalog.large_key] = Entry(size=spec["large_size"], seed=seed())
+
+    # -------- 模拟一个原版安装 --------
+    objects = {}
+    for i in range(spec["install_assets"]):
+        sha1, size = _add_object(catalog, seed(), _asset_size(rng))
+        catalog.install_assets.append((sha1, size))
+        objects[f"minecraft/bench/{i}.bin"] = {"hash": sha1, "size": size}
+    index_data = json.dumps({"objects": objects}).encode()
+    index_sha1 = hashlib.sha1(index_data).hexdigest()
+    index_key = f"meta/v1/packages/{ASSET_INDEX_ID}/{ASSET_INDEX_ID}.json"
+    catalog.entries[index_key] = Entry(size=len(index_data), data=index_data, sha1=index_sha1)
+
+    libraries = []
+    for i in range(spec["install_libraries"]):
+        size = rng.randint(50 * 1024, 3 * 1024 * 1024)
+        lib_seed = seed()
+        sha1 = content_sha1(lib_seed, size)
+        path = f"bench/lib/lib{i}/1.0/lib{i}-1.0.jar"
+        catalog.entries[f"libraries/{path}"] = Entry(size=size, seed=lib_seed, sha1=sha1)
+        catalog.libraries.append((path, sha1, size))
+        libraries.append(
+            {
+                "name": f"bench.lib:lib{i}:1.0",
+                "downloads": {
+                    "artifact": {
+                        "path": path,
+                        "sha1": sha1,
+                        "size": size,
+                        "url": f"{official_base}/libraries/{path}",
+                    }
+                },
+            }
+        )
+
+    client_seed = seed()
+    client_size = spec["install_client_size"]
+    client_sha1 = content_sha1(client_seed, client_size)
+    catalog.entries[f"meta/v1/objects/{client_sha1}/client.jar"] = Entry(
+        size=client_size, seed=client_seed, sha1=client_sha1
+    )
+
+    version = {
+        "id": VERSION_ID,
+        "type": "release",
+        "mainClass": "net.minecraft.client.main.Main",
+        "assets": ASSET_INDEX_ID,
+        "assetIndex": {
+            "id": ASSET_INDEX_ID,
+            "sha1": index_sha1,
+            "size": len(index_data),
+            "url": f"{official_base}/v1/packages/{ASSET_INDEX_ID}/{ASSET_INDEX_ID}.json",
+        },
+        "downloads": {
+            "client": {
+                "sha1": client_sha1,
+                "size": client_size,
+                "url": f"{official_base}/v1/objects/{client_sha1}/client.jar",
+            }
+        },
+        "libraries": libraries,
+    }
+    version_data = json.dumps(version).encode()
+    catalog.entries[f"meta/v1/packages/version/{VERSION_ID}.json"] = Entry(
+        size=len(version_data), data=version_data
+    )
+
+    # 启动器要求版本列表至少有 200 个版本才认为有效
+    versions = [
+        {
+            "id": VERSION_ID,
+            "type": "release",
+            "url": f"{official_base}/v1/packages/version/{VERSION_ID}.json",
+        }
+    ] + [
+        {"id": f"filler-{i}", "type": "snapshot", "url": f"{official_base}/v1/packages/version/filler-{i}.json"}
+        for i in range(250)
+    ]
+    manifest = json.dumps({"latest": {"release": VERSION_ID}, "versions": versions}).encode()
+    catalog.entries["meta/mc/game/version_manifest.json"] = Entry(size=len(manifest), data=manifest)
+    return catalog
+
+
+def resolve_path(path: str) -> str:
+    """把请求路径映射到目录键，同时支持官方和 BMCLAPI 两种布局
+
+    - 官方：/resources/xx/hash（resources.download.minecraft.net）、/libraries/...
+    - BMCLAPI：/assets/xx/hash、/maven/...
+    - 两者相同：/mc/game/version_manifest.json、/v1/packages/...、/v1/objects/...
+    """
+    path = path.split("?", 1)[0]
+    for prefix, key in (
+        ("/resources/", "objects/"),
+        ("/assets/", "objects/"),
+        ("/libraries/", "libraries/"),
+        ("/maven/", "libraries/"),
+        ("/files/", "files/"),
+    ):
+        if path.startswith(prefix):
+            return key + path[len(prefix) :]
+    return "meta" + path
@@ -0,0 +1,193 @@
+"""HTTP/2 替身服务器（TLS + ALPN h2），基于 h2 库
+
+httpx 只在 TLS 上协商 HTTP/2，所以这里用自签名证书提供 https，
+客户端进程通过 SSL_CERT_FILE 信任该证书。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ssl
+import threading
+from pathlib import Path
+from typing import Dict
+
+import h2.config
+import h2.connection
+import h2.events
+import h2.settings
+
+from .catalog import Catalog, resolve_path
+from .server import FaultInjector, parse_range
+
+MAX_CONCURRENT_STREAMS = 256
+DATA_BLOCK = 16 * 1024
+
+
+class _H2Protocol(asyncio.Protocol):
+    def __init__(self, catalog: Catalog, faults: FaultInjector) -> None:
+        self.catalog = catalog
+        self.faults = faults
+        self.conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        self.transport: asyncio.Transport | None = None
+        self._window_open: Dict[int, asyncio.Event] = {}
+        self._closed = False
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+        self.conn.initiate_connection()
+        self.conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: MAX_CONCURRENT_STREAMS})
+        self._flush()
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._closed = True
+        for event in self._window_open.values():
+            event.set()
+
+    def _flush(self) -> None:
+        if self.transport and not self._closed:
+            self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data: bytes) -> None:
+        try:
+            events = self.conn.receive_data(data)
+        except Exception:
+            self.transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                headers = dict(event.headers)
+                asyncio.ensure_future(self._respond(event.stream_id, headers))
+            elif isinstance(event, h2.events.WindowUpdated):
+                if event.stream_id == 0:
+                    for waiter in self._window_open.values():
+                        waiter.set()
+                elif event.stream_id in self._window_open:
+                    self._window_open[event.stream_id].set()
+            elif isinstance(event, h2.events.StreamReset):
+                waiter = self._window_open.pop(event.stream_id, None)
+                if waiter:
+                    waiter.set()
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.close()
+        self._flush()
+
+    def _send_simple(self, stream_id: int, status: int, extra: list | None = None) -> None:
+        body = b"" if status < 300 else f"status {status}".encode()
+        headers = [(":status", str(status)), ("content-length", str(len(body)))] + (extra or [])
+        self.conn.send_headers(stream_id, headers, end_stream=not body)
+        if body:
+            self.conn.send_data(stream_id, body, end_stream=True)
+        self._flush()
+
+    async def _respond(self, stream_id: int, headers: Dict[str, str]) -> None:
+        path = headers.get(":path", "/")
+        method = headers.get(":method", "GET")
+        cfg = self.faults.config
+        if cfg.latency_ms > 0:
+            await asyncio.sleep(cfg.latency_ms / 1000)
+        if self._closed:
+            return
+
+        decision = self.faults.decide(path)
+        if decision == "reset":
+            self.faults.count("reset")
+            self.conn.reset_stream(stream_id)
+            self._flush()
+            return
+        if decision is not None:
+            status = int(decision)
+            self.faults.count(str(status))
+            extra = [("retry-after", f"{cfg.retry_after:g}")] if status in (429, 503) else []
+            self._send_simple(stream_id, status, extra)
+            return
+
+        entry = self.catalog.get(resolve_path(path))
+        if entry is None:
+            self.faults.count("404")
+            self._send_simple(stream_id, 404)
+            return
+        byte_range = parse_range(headers.get("range"), entry.size)
+        if byte_range == (-1, -1):
+            self.faults.count("416")
+            self._send_simple(stream_id, 416, [("content-range", f"bytes */{entry.size}")])
+            return
+
+        start, end = byte_range if byte_range else (0, entry.size - 1)
+        length = end - start + 1 if entry.size else 0
+        status = 206 if byte_range else 200
+        response = [
+            (":status", str(status)),
+            ("content-type", "application/octet-stream"),
+            ("content-length", str(length)),
+            ("accept-ranges", "bytes"),
+            ("etag", entry.etag),
+        ]
+        if byte_range:
+            response.append(("content-range", f"bytes {start}-{end}/{entry.size}"))
+        head_only = method == "HEAD" or length == 0
+        self.conn.send_headers(stream_id, response, end_stream=head_only)
+        self._flush()
+        if head_only:
+            self.faults.count(str(status))
+            return
+
+        sent = await self._send_body(stream_id, entry, start, length, cfg.bandwidth)
+        self.faults.count(str(status), sent)
+
+    async def _send_body(self, stream_id: int, entry, start: int, length: int, bandwidth: int) -> int:
+        loop = asyncio.get_running_loop()
+        waiter = self._window_open.setdefault(stream_id, asyncio.Event())
+        sent = 0
+        began = loop.time()
+        try:
+            while sent < length and not self._closed:
+                window = min(self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size)
+                if window <= 0:
+                    waiter.clear()
+                    await waiter.wait()
+                    if stream_id not in self._window_open:
+                        break
+                    continue
+                size = min(window, DATA_BLOCK, length - sent)
+                chunk = entry.read(start + sent, size)
+                sent += size
+                self.conn.send_data(stream_id, chunk, end_stream=sent >= length)
+                self._flush()
+                if bandwidth > 0:
+                    ahead = sent / bandwidth - (loop.time() - began)
+                    if ahead > 0:
+                        await asyncio.sleep(ahead)
+                else:
+                    await asyncio.sleep(0)
+        except Exception:
+            pass
+        finally:
+            self._window_open.pop(stream_id, None)
+        return sent
+
+
+def start_h2_server(catalog: Catalog, faults: FaultInjector, cert: Path, key: Path) -> int:
+    """在后台线程启动 HTTP/2 服务，返回监听端口"""
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(str(cert), str(key))
+    context.set_alpn_protocols(["h2"])
+
+    loop = asyncio.new_event_loop()
+    started: Dict[str, int] = {}
+    ready = threading.Event()
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(
+            loop.create_server(lambda: _H2Protocol(catalog, faults), "127.0.0.1", 0, ssl=context, backlog=1024)
+        )
+        started["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="h2-standin", daemon=True).start()
+    ready.wait(timeout=30)
+    return started["port"]
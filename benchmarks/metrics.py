@@ -0,0 +1,84 @@
+"""测量工具：墙钟时间、CPU 时间、峰值内存和分位数"""
+
+from __future__ import annotations
+
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+def _cpu_seconds() -> float:
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+    return time.process_time()
+
+
+def peak_rss_mb() -> Optional[float]:
+    """进程生命周期内的峰值 RSS；每个场景在独立子进程里运行，因此即为该场景的峰值"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KiB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Measurement:
+    """with Measurement() as m: ...；结束后 m.result(...) 生成场景结果"""
+
+    def __enter__(self) -> "Measurement":
+        self._wall_start = time.perf_counter()
+        self._cpu_start = _cpu_seconds()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.wall = time.perf_counter() - self._wall_start
+        self.cpu = _cpu_seconds() - self._cpu_start
+
+    def result(
+        self,
+        bytes_total: int,
+        files: int,
+        latencies: List[float],
+        failed: int = 0,
+        **extra,
+    ) -> Dict:
+        wall = max(self.wall, 1e-9)
+        result = {
+            "wall_seconds": round(self.wall, 4),
+            "cpu_seconds": round(self.cpu, 4),
+            "cpu_utilization": round(self.cpu / wall, 4),
+            "peak_rss_mb": round(peak_rss_mb() or 0.0, 2) if resource else None,
+            "bytes": bytes_total,
+            "throughput_mb_s": round(bytes_total / wall / (1024 * 1024), 3),
+            "files": files,
+            "failed_files": failed,
+            "files_per_second": round(files / wall, 2),
+            "latency_ms": {
+                "p50": _ms(percentile(latencies, 50)),
+                "p99": _ms(percentile(latencies, 99)),
+                "max": _ms(max(latencies) if latencies else None),
+                "samples": len(latencies),
+            },
+        }
+        result.update(extra)
+        return result
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
@@ -0,0 +1,507 @@
+"""基准测试场景
+
+每个场景在独立子进程里运行（python -m benchmarks.scenarios <name> --params <json>），
+这样测得的 CPU 时间和峰值 RSS 只属于该场景的客户端，替身服务器在另一个进程里。
+结果以一行 JSON 写到标准输出。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import gc
+import hashlib
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from .catalog import VERSION_ID, build_catalog  # noqa: E402
+from .metrics import Measurement, percentile  # noqa: E402
+from .server import ServerHandle, fault_config  # noqa: E402
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+class SkipScenario(Exception):
+    pass
+
+
+# -------------------- littledl 批量下载 --------------------
+async def _download_assets(
+    assets: List[Tuple[str, int]],
+    primary: str,
+    backup: Optional[str],
+    dest: Path,
+    use_h2: bool = False,
+) -> Dict:
+    from app.littledl import FileTaskStatus, MCBatchDownloader
+
+    downloader = MCBatchDownloader(
+        max_concurrent_files=16, max_total_threads=20, enable_h2_lane=use_h2
+    )
+    latencies: List[float] = []
+    queue_latencies: List[float] = []
+
+    async def on_complete(task) -> None:
+        if task.status == FileTaskStatus.COMPLETED and task.completed_at:
+            if task.started_at:
+                latencies.append(task.completed_at - task.started_at)
+            queue_latencies.append(task.completed_at - task.created_at)
+
+    downloader.set_file_complete_callback(on_complete)
+    for sha1, size in assets:
+        path = f"/assets/{sha1[:2]}/{sha1}"
+        await downloader.add_url(
+            primary + path,
+            str(dest / sha1[:2]),
+            sha1,
+            backup_urls=[backup + path] if backup else None,
+            size=size,
+            expected_hash=sha1,
+        )
+    try:
+        await downloader.start()
+    finally:
+        await downloader.stop()
+    stats = downloader.get_stats()
+    return {
+        "latencies": latencies,
+        "queue_latencies": queue_latencies,
+        "failed": stats["failed_files"],
+        "engine": {
+            "small_object_files": stats.get("small_object_files"),
+            "lanes": stats.get("lanes"),
+            "retry_budget": stats.get("retry_budget"),
+        },
+    }
+
+
+def _run_assets(params: Dict, use_h2: bool) -> Dict:
+    spec = params["spec"]
+    with ServerHandle(spec, params.get("faults"), with_h2=use_h2) as servers:
+        if use_h2:
+            if not servers.h2:
+                raise SkipScenario(servers.info.get("h2_error") or "HTTP/2 server unavailable")
+            # httpx 只在 TLS 上协商 HTTP/2，信任替身服务器的自签名证书
+            os.environ["SSL_CERT_FILE"] = servers.info["cert"]
+        catalog = build_catalog(spec, servers.official)
+        assets = catalog.tiny_assets
+        dest = Path(tempfile.mkdtemp(prefix="littledl-bench-"))
+        primary = servers.h2 if use_h2 else servers.mirror
+        try:
+            with Measurement() as m:
+                outcome = asyncio.run(
+                    _download_assets(assets, primary, servers.official, dest, use_h2)
+                )
+        finally:
+            shutil.rmtree(dest, ignore_errors=True)
+        return m.result(
+            bytes_total=sum(size for _, size in assets),
+            files=len(assets),
+            latencies=outcome["latencies"],
+            failed=outcome["failed"],
+            queue_latency_ms=_percentiles(outcome["queue_latencies"]),
+            engine=outcome["engine"],
+            server=servers.stats(),
+        )
+
+
+def run_tiny_assets(params: Dict) -> Dict:
+    """一万个小资源文件（MCBatchDownloader，HTTP/1.1 镜像 + 官方备用）"""
+    return _run_assets(params, use_h2=False)
+
+
+def run_tiny_assets_h2(params: Dict) -> Dict:
+    """同上，镜像走 HTTP/2（需要 h2 库和 openssl）"""
+    return _run_assets(params, use_h2=True)
+
+
+# -------------------- littledl 单个大文件 --------------------
+def run_large_file(params: Dict) -> Dict:
+    """单个大文件（Downloader，分块并发 + Range）"""
+    from app.littledl import DownloadConfig, Downloader
+
+    spec = params["spec"]
+    with ServerHandle(spec, params.get("faults")) as servers:
+        catalog = build_catalog(spec, servers.official)
+        entry = catalog.get(catalog.large_key)
+        dest = Path(tempfile.mkdtemp(prefix="littledl-bench-"))
+
+        async def download() -> Path:
+            downloader = Downloader(DownloadConfig())
+            return await downloader.download(
+                f"{servers.mirror}/files/large.bin",
+                save_path=dest,
+                filename="large.bin",
+                resume=False,
+            )
+
+        try:
+            with Measurement() as m:
+                started = time.perf_counter()
+                path = asyncio.run(download())
+                elapsed = time.perf_counter() - started
+            ok = Path(path).stat().st_size == entry.size
+        finally:
+            shutil.rmtree(dest, ignore_errors=True)
+        return m.result(
+            bytes_total=entry.size,
+            files=1,
+            latencies=[elapsed],
+            failed=0 if ok else 1,
+            server=servers.stats(),
+        )
+
+
+# -------------------- 完整安装流程 --------------------
+def _bench_downloader_class():
+    from app.services.download_service_v2 import DownloadSource, MinecraftDownloader
+
+    class BenchMinecraftDownloader(MinecraftDownloader):
+        """把官方和 BMCLAPI 地址换成本地替身服务器"""
+
+        def __init__(self, official: str, mirror: str, prefer_mirror: bool, **kwargs) -> None:
+            if prefer_mirror:
+                # 本地官方源总是很快，自动测速会选官方源；这里固定镜像优先，模拟国内用户的默认路径
+                kwargs["download_source"] = DownloadSource.BMCLAPI_FIRST
+            super().__init__(**kwargs)
+            self._bench_official = official
+            self._bench_mirror = mirror
+            self.mirrors = {
+                "bmclapi": {
+                    "version_list": f"{mirror}/mc/game/version_manifest.json",
+                    "asset_base": f"{mirror}/assets",
+                    "library_base": f"{mirror}/maven",
+                    "launcher_meta": mirror,
+                },
+                "mojang": {
+                    "version_list": f"{official}/mc/game/version_manifest.json",
+                    "asset_base": f"{official}/resources",
+                    "library_base": f"{official}/libraries",
+                    "launcher_meta": official,
+                },
+            }
+
+        def _get_source_urls(self, original_url: str, is_asset: bool = False, is_library: bool = False) -> List[str]:
+            official, mirror = self._bench_official, self._bench_mirror
+            mirror_url = original_url
+            for src, dst in (
+                (f"{official}/resources", f"{mirror}/assets"),
+                (f"{official}/libraries", f"{mirror}/maven"),
+                (official, mirror),
+            ):
+                if original_url.startswith(src):
+                    mirror_url = dst + original_url[len(src) :]
+                    break
+            return self._order_sources(original_url, mirror_url)
+
+    return BenchMinecraftDownloader
+
+
+def _record_batch_latencies(latencies: List[float]) -> Callable[[], None]:
+    """让安装流程内部创建的 MCBatchDownloader 记录每个文件的耗时，返回还原函数"""
+    from app.littledl import FileTaskStatus, MCBatchDownloader
+    from app.services import download_service_v2
+
+    class RecordingBatch(MCBatchDownloader):
+        def set_file_complete_callback(self, callback) -> None:
+            async def wrapped(task) -> None:
+                if task.status == FileTaskStatus.COMPLETED and task.started_at and task.completed_at:
+                    latencies.append(task.completed_at - task.started_at)
+                result = callback(task)
+                if inspect.isawaitable(result):
+                    await result
+
+            super().set_file_complete_callback(wrapped)
+
+    original = download_service_v2.MCBatchDownloader
+    download_service_v2.MCBatchDownloader = RecordingBatch
+
+    def restore() -> None:
+        download_service_v2.MCBatchDownloader = original
+
+    return restore
+
+
+def _install_once(
+    servers: ServerHandle,
+    prefer_mirror: bool,
+    progress_callback=None,
+    expected_assets: Optional[int] = None,
+) -> Tuple[bool, List[float], str]:
+    """完整安装一次；给出 expected_assets 时资源文件数不符也算失败，
+    避免把没有资源的安装当作成功计入吞吐"""
+    from app.services.download_service_v2 import MinecraftDownloadConfig
+
+    mc_folder = Path(tempfile.mkdtemp(prefix="littledl-bench-mc-"))
+    latencies: List[float] = []
+    restore = _record_batch_latencies(latencies)
+    try:
+        downloader = _bench_downloader_class()(
+            servers.official,
+            servers.mirror,
+            prefer_mirror,
+            mc_folder=str(mc_folder),
+            config=MinecraftDownloadConfig(verify_hash=True),
+            progress_callback=progress_callback,
+        )
+        ok = downloader.download_version(VERSION_ID)
+        error = downloader.last_error
+        if expected_assets is not None:
+            objects = mc_folder / "assets" / "objects"
+            written = sum(1 for p in objects.rglob("*") if p.is_file()) if objects.is_dir() else 0
+            if written != expected_assets:
+                ok = False
+                error = error or f"写入了 {written} 个资源文件，应为 {expected_assets} 个"
+        return ok, latencies, error
+    finally:
+        restore()
+        shutil.rmtree(mc_folder, ignore_errors=True)
+
+
+def _shutdown_engine() -> None:
+    from app.services.download_engine import DownloadEngine
+
+    DownloadEngine.instance().shutdown()
+
+
+def _run_install(params: Dict, faults: Optional[Dict]) -> Dict:
+    spec = params["spec"]
+    with ServerHandle(spec, faults) as servers:
+        catalog = build_catalog(spec, servers.official)
+        files = len(catalog.install_assets) + len(catalog.libraries) + 2
+        try:
+            with Measurement() as m:
+                ok, latencies, error = _install_once(
+                    servers, prefer_mirror=True, expected_assets=len(catalog.install_assets)
+                )
+        finally:
+            _shutdown_engine()
+        return m.result(
+            bytes_total=catalog.install_bytes(),
+            files=files,
+            latencies=latencies,
+            failed=0 if ok else max(1, files - len(latencies)),
+            success=ok,
+            server=servers.stats(),
+            # 运行器把带 error 的结果记为场景失败
+            **({} if ok else {"error": error or "安装失败"}),
+        )
+
+
+def run_vanilla_install(params: Dict) -> Dict:
+    """MinecraftDownloader.download_version 完整安装：客户端、库文件、资源索引和资源"""
+    return _run_install(params, params.get("faults"))
+
+
+def run_mirror_outage(params: Dict) -> Dict:
+    """镜像的文件下载路径全部 503，所有文件必须切换到官方源"""
+    faults = dict(params.get("faults") or {})
+    faults["mirror"] = fault_config(
+        **{**faults.get("mirror", {}), "outage": "503", "outage_prefixes": ["/assets/", "/maven/", "/v1/objects/"]}
+    )
+    return _run_install(params, faults)
+
+
+# -------------------- 界面刷新对下载的影响 --------------------
+def run_ui_bridge(params: Dict) -> Dict:
+    """同一次安装分别在无界面、逐次同步刷新界面、经进度桥刷新三种情况下的吞吐"""
+    from app.services.download_manager import DownloadManager, DownloadTask, TaskStatus
+    from app.services.progress_bridge import ProgressBridge
+
+    spec = params["spec"]
+    ui_cost = params.get("ui_cost_ms", 5.0) / 1000
+    manager = DownloadManager.instance()
+    # 模拟下载管理器页面每次 refresh() 整页重建加 page.update() 的耗时
+    manager.on_change(lambda: time.sleep(ui_cost))
+    bridge = ProgressBridge.instance()
+    bridge.set_fps(params.get("ui_fps", 10))
+
+    def make_callback(mode: str, task: DownloadTask, counter: List[int]):
+        def callback(progress) -> None:
+            counter[0] += 1
+            fields = {
+                "speed": progress.speed,
+                "status": TaskStatus.DOWNLOADING,
+                "current_file": progress.current_file,
+                "file_count": progress.total_files,
+                "completed_files": progress.finished_files,
+                "total": progress.total or progress.total_files,
+                "downloaded": progress.current or progress.finished_files,
+            }
+            if mode == "direct":
+                task.update(**fields)
+                manager._notify()
+            else:
+                bridge.push(task, **fields)
+
+        return callback
+
+    modes: Dict[str, Dict] = {}
+    with ServerHandle(spec, params.get("faults")) as servers:
+        catalog = build_catalog(spec, servers.official)
+        install_bytes = catalog.install_bytes()
+        try:
+            for mode in ("none", "direct", "bridge"):
+                task = DownloadTask(task_id=f"bench-{mode}", name=mode, status=TaskStatus.DOWNLOADING)
+                counter = [0]
+                callback = None if mode == "none" else make_callback(mode, task, counter)
+                bridge.reset_stats()
+                with Measurement() as m:
+                    ok, latencies, _ = _install_once(servers, True, callback, len(catalog.install_assets))
+                modes[mode] = {
+                    "success": ok,
+                    "wall_seconds": round(m.wall, 4),
+                    "cpu_seconds": round(m.cpu, 4),
+                    "throughput_mb_s": round(install_bytes / max(m.wall, 1e-9) / (1024 * 1024), 3),
+                    "progress_callbacks": counter[0],
+                    "latency_ms": _percentiles(latencies),
+                }
+                if mode == "bridge":
+                    modes[mode]["bridge"] = bridge.get_stats()
+        finally:
+            bridge.stop()
+            _shutdown_engine()
+
+    baseline = modes["none"]["wall_seconds"]
+    for mode in ("direct", "bridge"):
+        modes[mode]["slowdown_percent"] = round((modes[mode]["wall_seconds"] / baseline - 1) * 100, 2)
+    result = {"ui_cost_ms": ui_cost * 1000, "modes": modes}
+    failed_modes = [mode for mode, stats in modes.items() if not stats["success"]]
+    if failed_modes:
+        result["error"] = f"安装失败: {', '.join(failed_modes)}"
+    return result
+
+
+# -------------------- 安装计划内存 --------------------
+def _traced_bytes(build: Callable[[], object]) -> Tuple[int, object]:
+    """build() 返回的对象仍然存活时 tracemalloc 统计到的新增内存"""
+    gc.collect()
+    baseline = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] - baseline, kept
+
+
+def run_plan_memory(params: Dict) -> Dict:
+    """资源计划的内存：逐文件 NetFile + 下载任务 对比 列式 AssetPlan + 按水位生成的任务"""
+    from app.littledl import MCBatchDownloader
+    from app.services.download_service_v2 import (
+        PLAN_FEED_HIGH_WATERMARK,
+        AssetPlan,
+        NetFile,
+    )
+
+    count = params["spec"].get("tiny_assets", 10000)
+    objects = {
+        f"minecraft/bench/{i}.ogg": {"hash": hashlib.sha1(str(i).encode()).hexdigest(), "size": 1024 + i}
+        for i in range(count)
+    }
+    index = json.dumps({"objects": objects}).encode()
+    del objects
+    objects_dir = Path(tempfile.gettempdir()) / "littledl-bench-plan" / "objects"
+    base_urls = ["https://bmclapi2.bangbang93.com/assets", "https://resources.download.minecraft.net"]
+
+    async def materialize(files) -> MCBatchDownloader:
+        downloader = MCBatchDownloader(max_concurrent_files=16, retain_finished_tasks=False)
+        for net_file in files:
+            await downloader.add_url(
+                net_file.urls[0],
+                str(Path(net_file.local_path).parent),
+                Path(net_file.local_path).name,
+                backup_urls=net_file.urls[1:],
+                size=net_file.min_size,
+                expected_hash=net_file.check_hash,
+            )
+        return downloader
+
+    def legacy():
+        # 改动前的做法：每个资源一个 NetFile，全部文件一次性建好下载任务
+        net_files = []
+        for info in json.loads(index)["objects"].values():
+            asset_hash = info["hash"]
+            relative = f"{asset_hash[:2]}/{asset_hash}"
+            net_files.append(
+                NetFile(
+                    urls=[f"{base}/{relative}" for base in base_urls],
+                    local_path=str(objects_dir / asset_hash[:2] / asset_hash),
+                    check_hash=asset_hash,
+                    min_size=info["size"],
+                    file_name=asset_hash,
+                )
+            )
+        return net_files, asyncio.run(materialize(net_files))
+
+    def columnar():
+        plan = AssetPlan.from_index(index, objects_dir, base_urls)
+        # 下载器中最多同时存在上水位个待下载任务
+        head = (plan.net_file(i) for i in range(min(len(plan), PLAN_FEED_HIGH_WATERMARK)))
+        return plan, asyncio.run(materialize(head))
+
+    tracemalloc.start()
+    try:
+        plan_only, _ = _traced_bytes(lambda: AssetPlan.from_index(index, objects_dir, base_urls))
+        legacy_bytes, kept = _traced_bytes(legacy)
+        del kept
+        columnar_bytes, kept = _traced_bytes(columnar)
+        del kept
+    finally:
+        tracemalloc.stop()
+    return {
+        "assets": count,
+        "legacy_bytes": legacy_bytes,
+        "columnar_bytes": columnar_bytes,
+        "plan_bytes": plan_only,
+        "bytes_per_asset": {
+            "legacy": round(legacy_bytes / max(count, 1), 1),
+            "columnar": round(columnar_bytes / max(count, 1), 1),
+        },
+        "reduction_percent": round((1 - columnar_bytes / max(legacy_bytes, 1)) * 100, 2),
+    }
+
+
+def _percentiles(values: List[float]) -> Dict:
+    def ms(v):
+        return None if v is None else round(v * 1000, 3)
+
+    return {"p50": ms(percentile(values, 50)), "p99": ms(percentile(values, 99)), "samples": len(values)}
+
+
+SCENARIOS: Dict[str, Callable[[Dict], Dict]] = {
+    "tiny_assets": run_tiny_assets,
+    "tiny_assets_h2": run_tiny_assets_h2,
+    "large_file": run_large_file,
+    "vanilla_install": run_vanilla_install,
+    "mirror_outage": run_mirror_outage,
+    "ui_bridge": run_ui_bridge,
+    "plan_memory": run_plan_memory,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.scenarios")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--params", default="{}", help="JSON 编码的场景参数")
+    args = parser.parse_args(argv)
+
+    try:
+        result = SCENARIOS[args.scenario](json.loads(args.params))
+    except SkipScenario as e:
+        result = {"skipped": str(e)}
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""本地替身服务器
+
+在独立进程里启动三个服务，共用同一份确定性目录：
+- official：HTTP/1.1，官方布局（/resources、/libraries、/v1/...）
+- mirror：HTTP/1.1，BMCLAPI 布局（/assets、/maven、/v1/...）
+- h2：HTTP/2 over TLS（ALPN h2），与 mirror 同一布局；缺少 h2 库或 openssl 时不启动
+
+每个服务都支持 Range、按连接限速、固定延迟、按比例注入 429/5xx 以及整站或
+按路径前缀的故障。服务端跑在单独进程里，客户端进程测得的 CPU 和内存不含服务端开销。
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import random
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .catalog import Catalog, Entry, build_catalog, resolve_path
+
+STATS_PATH = "/__bench/stats"
+
+
+@dataclass
+class FaultConfig:
+    """单个服务的网络条件与故障注入"""
+
+    latency_ms: float = 0.0
+    bandwidth: int = 0  # 每个响应的限速（字节/秒），0 表示不限
+    error_rate: float = 0.0
+    error_statuses: List[int] = field(default_factory=lambda: [429, 503, 500])
+    retry_after: float = 1.0
+    outage: Optional[str] = None  # None / "503" / "reset"
+    outage_prefixes: List[str] = field(default_factory=list)  # 为空表示整站故障
+
+
+class FaultInjector:
+    def __init__(self, config: FaultConfig, seed: int) -> None:
+        self.config = config
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.bytes_sent = 0
+
+    def count(self, key: str, sent: int = 0) -> None:
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.bytes_sent += sent
+
+    def decide(self, path: str) -> Optional[str]:
+        """返回 None（正常应答）、"reset" 或错误状态码字符串"""
+        cfg = self.config
+        if cfg.outage and (
+            not cfg.outage_prefixes or any(path.startswith(p) for p in cfg.outage_prefixes)
+        ):
+            return cfg.outage
+        if cfg.error_rate > 0:
+            with self._lock:
+                if self._rng.random() < cfg.error_rate:
+                    return str(self._rng.choice(cfg.error_statuses))
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"responses": dict(self.counts), "bytes_sent": self.bytes_sent}
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """解析单段 Range，返回 [start, end]（含），不可满足时返回 (-1, -1)"""
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[6:].split(",", 1)[0].strip()
+    start_s, _, end_s = spec.partition("-")
+    try:
+        if start_s == "":
+            length = int(end_s)
+            start, end = max(0, size - length), size - 1
+        else:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return (-1, -1)
+    return start, end
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StandInHTTPServer"
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        pass
+
+    def do_HEAD(self) -> None:
+        self._serve(head=True)
+
+    def do_GET(self) -> None:
+        self._serve(head=False)
+
+    def _send_simple(self, status: int, body: bytes = b"", headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _serve(self, head: bool) -> None:
+        faults = self.server.faults
+        if self.path == STATS_PATH:
+            self._send_simple(200, json.dumps(faults.stats()).encode(), {"Content-Type": "application/json"})
+            return
+
+        cfg = faults.config
+        if cfg.latency_ms > 0:
+            time.sleep(cfg.latency_ms / 1000)
+
+        decision = faults.decide(self.path)
+        if decision == "reset":
+            faults.count("reset")
+            self.close_connection = True
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return
+        if decision is not None:
+            status = int(decision)
+            faults.count(str(status))
+            headers = {"Retry-After": f"{cfg.retry_after:g}"} if status in (429, 503) else {}
+            self._send_simple(status, b"injected", headers)
+            return
+
+        entry = self.server.catalog.get(resolve_path(self.path))
+        if entry is None:
+            faults.count("404")
+            self._send_simple(404, b"not found")
+            return
+
+        byte_range = parse_range(self.headers.get("Range"), entry.size)
+        if byte_range == (-1, -1):
+            faults.count("416")
+            self._send_simple(416, headers={"Content-Range": f"bytes */{entry.size}"})
+            return
+
+        start, end = byte_range if byte_range else (0, entry.size - 1)
+        length = end - start + 1 if entry.size else 0
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", entry.etag)
+        self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{entry.size}")
+        self.end_headers()
+        if head:
+            faults.count(str(206 if byte_range else 200))
+            return
+        sent = _write_body(self.wfile.write, entry, start, length, cfg.bandwidth)
+        faults.count(str(206 if byte_range else 200), sent)
+
+
+def _write_body(write, entry: Entry, start: int, length: int, bandwidth: int) -> int:
+    block = 64 * 1024
+    sent = 0
+    began = time.monotonic()
+    try:
+        while sent < length:
+            chunk = entry.read(start + sent, min(block, length - sent))
+            write(chunk)
+            sent += len(chunk)
+            if bandwidth > 0:
+                ahead = sent / bandwidth - (time.monotonic() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    return sent
+
+
+class StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, sock: socket.socket, catalog: Catalog, faults: FaultInjector) -> None:
+        super().__init__(sock.getsockname(), _Handler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.catalog = catalog
+        self.faults = faults
+
+
+def _bind() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(1024)
+    return sock
+
+
+def make_certificate(directory: Path) -> Optional[Tuple[Path, Path]]:
+    """用 openssl 生成 127.0.0.1 的自签名证书，不可用时返回 None"""
+    if shutil.which("openssl") is None:
+        return None
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    result = subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", str(key), "-out", str(cert), "-days", "1",
+            "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+        ],
+        capture_output=True,
+    )
+    return (cert, key) if result.returncode == 0 else None
+
+
+def _serve_forever(spec: dict, faults: dict, with_h2: bool, cert_dir: str, ready, stop) -> None:
+    official_sock, mirror_sock = _bind(), _bind()
+    official_base = f"http://127.0.0.1:{official_sock.getsockname()[1]}"
+    catalog = build_catalog(spec, official_base)
+    seed = spec.get("seed", 0)
+
+    official = StandInHTTPServer(
+        official_sock, catalog, FaultInjector(FaultConfig(**faults.get("official", {})), seed)
+    )
+    mirror_faults = FaultInjector(FaultConfig(**faults.get("mirror", {})), seed + 1)
+    mirror = StandInHTTPServer(mirror_sock, catalog, mirror_faults)
+    for server in (official, mirror):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    info = {
+        "official": official_base,
+        "mirror": f"http://127.0.0.1:{mirror_sock.getsockname()[1]}",
+        "h2": None,
+        "h2_error": None,
+    }
+    if with_h2:
+        try:
+            from .h2server import start_h2_server
+
+            cert = make_certificate(Path(cert_dir))
+            if cert is None:
+                raise RuntimeError("openssl is not available")
+            port = start_h2_server(catalog, mirror_faults, *cert)
+            info["h2"] = f"https://127.0.0.1:{port}"
+            info["cert"] = str(cert[0])
+        except Exception as e:  # 没有 h2 库时只跑 HTTP/1.1
+            info["h2_error"] = f"{type(e).__name__}: {e}"
+    ready.put(info)
+    stop.wait()
+    official.shutdown()
+    mirror.shutdown()
+
+
+class ServerHandle:
+    """在子进程中运行的替身服务器"""
+
+    def __init__(self, spec: dict, faults: Optional[dict] = None, with_h2: bool = False) -> None:
+        ctx = multiprocessing.get_context("spawn")
+        self._cert_dir = tempfile.mkdtemp(prefix="littledl-bench-cert-")
+        self._ready = ctx.Queue()
+        self._stop = ctx.Event()
+        self._process = ctx.Process(
+            target=_serve_forever,
+            args=(spec, faults or {}, with_h2, self._cert_dir, self._ready, self._stop),
+            daemon=True,
+        )
+        self.info: dict = {}
+
+    def __enter__(self) -> "ServerHandle":
+        self._process.start()
+        self.info = self._ready.get(timeout=300)
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def official(self) -> str:
+        return self.info["official"]
+
+    @property
+    def mirror(self) -> str:
+        return self.info["mirror"]
+
+    @property
+    def h2(self) -> Optional[str]:
+        return self.info.get("h2")
+
+    def stats(self) -> dict:
+        result = {}
+        for name in ("official", "mirror"):
+            with urllib.request.urlopen(self.info[name] + STATS_PATH, timeout=10) as resp:
+                result[name] = json.loads(resp.read())
+        return result
+
+    def stop(self) -> None:
+        if self._process.is_alive():
+            self._stop.set()
+            self._process.join(timeout=10)
+            if self._process.is_alive():
+                self._process.terminate()
+        shutil.rmtree(self._cert_dir, ignore_errors=True)
+
+
+def fault_config(**kwargs) -> dict:
+    """便于在场景里书写：fault_config(outage="503", outage_prefixes=[...])"""
+    return asdict(FaultConfig(**kwargs))
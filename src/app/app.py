@@ -4,6 +4,7 @@ from pathlib import Path
 import flet as ft
 from app.services.logger_service import LoggerService
 from app.services.config_service import ConfigService
+from app.services.metrics_service import MetricsService
 from app.pages.first_run_page import FirstRunPage
 from app.pages.home_page import HomePage
 from app.pages.about_page import AboutPage
@@ -26,6 +27,8 @@ class App:
         self.first_run = not Path("MineLauncher/config/.inited").exists()
 
     def run(self):
+        # 配置 Metrics.Enabled 打开时在本机提供 Prometheus 指标端点
+        MetricsService().start_from_config()
         ft.run(self.main)
 
     async def main(self, page: ft.Page):
@@ -0,0 +1,175 @@
+"""无界面的安装与校验入口，供批量装机脚本使用
+
+    python -m app.cli install 1.20.1 --root /srv/mc --source mirror_first --jobs 32
+    python -m app.cli install 1.20.1 1.19.4 1.16.5 --root /srv/mc
+    python -m app.cli verify 1.20.1 --root /srv/mc --deep
+    python -m app.cli repair 1.20.1 --root /srv/mc
+
+只导入下载服务和 littledl，不加载 Flet 界面。进度与结果以 NDJSON（每行一个 JSON 对象）
+输出到标准输出，日志仍写到标准错误和日志文件。全部成功时退出码为 0，有失败为 1，
+被中断为 130。
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+import threading
+import time
+from typing import Any, List, Optional
+
+from app.services.download_engine import DownloadEngine
+from app.services.download_service_v2 import (
+    DownloadProgress,
+    DownloadSource,
+    MinecraftDownloadConfig,
+    MinecraftDownloader,
+)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
+
+SOURCES = {source.name.lower(): source for source in DownloadSource}
+
+
+class NdjsonWriter:
+    """把事件逐行写到标准输出；进度事件按间隔节流，下载线程和主线程都会调用"""
+
+    def __init__(self, stream=None, interval: float = 0.5):
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last_progress = 0.0
+
+    def emit(self, event: str, **fields: Any) -> None:
+        record = {"event": event, "ts": round(time.time(), 3), **fields}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def progress(self, progress: DownloadProgress) -> None:
+        now = time.monotonic()
+        finished = progress.total_files and progress.finished_files >= progress.total_files
+        if not finished and now - self._last_progress < self.interval:
+            return
+        self._last_progress = now
+        self.emit(
+            "progress",
+            status=progress.status,
+            files_done=progress.finished_files,
+            files_total=progress.total_files,
+            files_failed=progress.failed_files,
+            bytes_done=progress.current,
+            bytes_total=progress.total,
+            speed=round(progress.speed, 1),
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="MineLauncher 无界面安装与校验")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--root", default=".minecraft", help="游戏目录（.minecraft），默认 ./.minecraft")
+    common.add_argument(
+        "--source",
+        choices=sorted(SOURCES),
+        default="auto",
+        help="下载源优先级，默认 auto",
+    )
+    common.add_argument("--jobs", type=int, default=16, help="同时下载的文件数，默认 16")
+    common.add_argument("--interval", type=float, default=0.5, help="进度事件的最小间隔（秒）")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+    install = commands.add_parser("install", parents=[common], help="安装一个或多个版本")
+    install.add_argument("versions", nargs="+", help="版本号，多个版本共用一个下载计划")
+    install.add_argument("--offline", action="store_true", help="版本列表和版本 JSON 只读元数据缓存")
+    install.add_argument("--trace", help="把安装时间线导出为 Trace Event Format JSON")
+
+    for name, help_text in (
+        ("verify", "校验已安装的版本"),
+        ("repair", "校验并重新下载缺失或损坏的文件"),
+    ):
+        command = commands.add_parser(name, parents=[common], help=help_text)
+        command.add_argument("versions", nargs="+", help="版本目录名")
+        command.add_argument("--deep", action="store_true", help="计算所有文件的 sha1")
+    return parser.parse_args(argv)
+
+
+def _install(downloader: MinecraftDownloader, args: argparse.Namespace, out: NdjsonWriter) -> bool:
+    if len(args.versions) == 1:
+        version = args.versions[0]
+        results = {version: downloader.download_version(version, trace_path=args.trace)}
+    else:
+        results = downloader.download_versions(args.versions, trace_path=args.trace)
+    for version, ok in results.items():
+        out.emit("version", version=version, ok=ok)
+    return all(results.values())
+
+
+def _verify(downloader: MinecraftDownloader, args: argparse.Namespace, out: NdjsonWriter) -> bool:
+    all_ok = True
+    for version in args.versions:
+        try:
+            report = downloader.verify_version(version, deep=args.deep)
+        except Exception as e:
+            out.emit("version", version=version, ok=False, error=str(e))
+            all_ok = False
+            continue
+        out.emit(
+            "version",
+            version=version,
+            ok=report.ok,
+            deep=report.deep,
+            checked=report.checked,
+            hashed=report.hashed,
+            hashed_bytes=report.hashed_bytes,
+            missing=[f.local_path for f in report.missing],
+            corrupt=[f.local_path for f in report.corrupt],
+            elapsed=round(report.elapsed, 3),
+        )
+        all_ok = all_ok and report.ok
+    return all_ok
+
+
+def _repair(downloader: MinecraftDownloader, args: argparse.Namespace, out: NdjsonWriter) -> bool:
+    all_ok = True
+    for version in args.versions:
+        ok = downloader.repair_version(version, deep=args.deep)
+        out.emit("version", version=version, ok=ok, error=downloader.last_error or None)
+        all_ok = all_ok and ok
+    return all_ok
+
+
+COMMANDS = {"install": _install, "verify": _verify, "repair": _repair}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    out = NdjsonWriter(interval=args.interval)
+    config = MinecraftDownloadConfig(download_source=args.source, max_concurrent_files=max(1, args.jobs))
+    downloader = MinecraftDownloader(
+        args.root,
+        config=config,
+        download_source=SOURCES[args.source],
+        progress_callback=out.progress,
+        offline=getattr(args, "offline", False),
+    )
+    started = time.time()
+    out.emit("start", command=args.command, versions=args.versions, root=str(downloader.mc_folder))
+    try:
+        ok = COMMANDS[args.command](downloader, args, out)
+    except KeyboardInterrupt:
+        downloader.cancel()
+        out.emit("done", ok=False, error="interrupted", elapsed=round(time.time() - started, 3))
+        return EXIT_INTERRUPTED
+    finally:
+        downloader.cleanup()
+        DownloadEngine.instance().shutdown()
+    error = None if ok else downloader.last_error or None
+    out.emit("done", ok=ok, error=error, elapsed=round(time.time() - started, 3))
+    return EXIT_OK if ok else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,7 @@ from .batch import (
     batch_download,
     batch_download_sync,
 )
+from .breaker import CircuitBreaker, CircuitState, RetryBudget
 from .chunk import Chunk, ChunkManager, ChunkStatus
 from .config import (
     AuthType,
@@ -37,6 +38,7 @@ from .exceptions import (
     ChunkDownloadError,
     ChunkError,
     ChunkResplitError,
+    CircuitOpenError,
     ConfigurationError,
     ConnectionError,
     DownloadError,
@@ -53,6 +55,7 @@ from .exceptions import (
     ValidationError,
 )
 from .global_pool import GlobalThreadPool, SpeedAdaptiveController
+from .hosts import HostPolicy, PerHostLimiter
 from .i18n import (
     LANGUAGE_ENV_VAR,
     get_available_languages,
@@ -62,6 +65,7 @@ from .i18n import (
     pgettext,
     set_language,
 )
+from .journal import BatchJournal, JournalEntry
 from .limiter import AdaptiveLimiter, SpeedLimiter, TokenBucketLimiter
 from .monitor import DownloadMonitor, DownloadStats
 from .proxy import ProxyDetector, ProxyInfo, ProxyManager
@@ -76,9 +80,10 @@ from .strategy import (
     StrategySelector,
     StyleDecision,
 )
-from .utils import SpeedCalculator
+from .timing import FileTiming, PhaseHistogram, TimingCollector
+from .utils import SpeedCalculator, ensure_dir, ensure_dirs, get_fs_op_stats
 from .worker import DownloadWorker, WorkerPool
-from .writer import BufferedFileWriter, DirectFileWriter
+from .writer import BufferedFileWriter, DirectFileWriter, get_buffer_memory_stats
 
 __all__ = [
     "Downloader",
@@ -156,11 +161,26 @@ __all__ = [
     "ConfigurationError",
     "ValidationError",
     "CancelledError",
+    "CircuitOpenError",
     "GlobalThreadPool",
     "SpeedAdaptiveController",
     "FileReuseChecker",
     "MultiSourceManager",
     "SharedFileRegistry",
+    "HostPolicy",
+    "PerHostLimiter",
+    "CircuitBreaker",
+    "CircuitState",
+    "RetryBudget",
+    "BatchJournal",
+    "JournalEntry",
+    "TimingCollector",
+    "PhaseHistogram",
+    "FileTiming",
+    "ensure_dir",
+    "ensure_dirs",
+    "get_fs_op_stats",
+    "get_buffer_memory_stats",
     "gettext",
     "ngettext",
     "pgettext",
@@ -4,16 +4,17 @@ import json
 import shutil
 import sys
 import time
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, TextIO
 
 import httpx
 
 from . import DownloadConfig, download_file
-from .batch import BatchDownloader, FileTaskStatus
+from .batch import BatchDownloader, EnhancedBatchDownloader, FileTask, FileTaskStatus
 from .i18n import gettext as _
 from .strategy import DownloadStyle, StrategySelector
-from .utils import determine_filename, validate_url
+from .utils import determine_filename, extract_host, validate_url
 
 
 def parse_args(args: list[str] | None = None) -> argparse.Namespace:
@@ -40,6 +41,22 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
     parser.add_argument(
         "-F", "--batch-file", dest="batch_file", help=_("File containing URLs to download (one per line)")
     )
+    parser.add_argument(
+        "-M",
+        "--manifest",
+        dest="manifest",
+        help=_(
+            "JSON or NDJSON manifest of {url, backup_urls, dest, size, sha1, priority} entries ('-' for stdin); "
+            "progress and summary are written as NDJSON"
+        ),
+    )
+    parser.add_argument(
+        "--progress-interval",
+        dest="progress_interval",
+        type=float,
+        default=0.5,
+        help=_("Minimum seconds between NDJSON progress events in manifest mode"),
+    )
     parser.add_argument("-o", "--output", dest="output", help=_("Output directory or file path"))
     parser.add_argument("-f", "--filename", dest="filename", help=_("Specify output filename"))
     parser.add_argument(
@@ -178,6 +195,84 @@ def read_urls_from_file(file_path: str) -> list[tuple[int, str]]:
     return urls
 
 
+@dataclass
+class ManifestEntry:
+    """One file of a download manifest."""
+
+    url: str
+    dest: str
+    backup_urls: list[str] = field(default_factory=list)
+    size: int = -1
+    sha1: str | None = None
+    priority: int = 0
+    line: int = 0
+
+
+def read_manifest(file_path: str) -> list[ManifestEntry]:
+    """Read a manifest: a JSON array (or {"files": [...]}) or one JSON object per line.
+
+    Each entry needs ``url``; ``dest`` defaults to the URL's file name and relative
+    destinations are resolved against the output directory. Blank lines and lines
+    starting with ``#`` are ignored in NDJSON manifests.
+
+    Raises:
+        FileNotFoundError: The manifest file does not exist.
+        ValueError: The manifest or one of its entries is malformed.
+    """
+    if file_path == "-":
+        text = sys.stdin.read()
+    else:
+        path = Path(file_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Manifest not found: {file_path}")
+        text = path.read_text(encoding="utf-8")
+
+    records: list[tuple[int, Any]] = []
+    try:
+        document = json.loads(text)
+    except ValueError:
+        document = None
+    if isinstance(document, list):
+        records = list(enumerate(document, 1))
+    elif isinstance(document, dict) and "files" in document:
+        records = list(enumerate(document["files"], 1))
+    else:
+        for line_num, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                records.append((line_num, json.loads(line)))
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON on manifest line {line_num}: {e}") from e
+
+    entries = []
+    for line_num, record in records:
+        if not isinstance(record, dict):
+            raise ValueError(f"Manifest entry {line_num} is not an object")
+        url = record.get("url")
+        if not url or not validate_url(url):
+            raise ValueError(f"Manifest entry {line_num} has an invalid url: {url!r}")
+        backup_urls = record.get("backup_urls") or []
+        if not isinstance(backup_urls, list):
+            backup_urls = [backup_urls]
+        dest = record.get("dest") or determine_filename(url, None, None)
+        size = record.get("size")
+        sha1 = record.get("sha1")
+        entries.append(
+            ManifestEntry(
+                url=url,
+                dest=str(dest),
+                backup_urls=[u for u in backup_urls if u and validate_url(u)],
+                size=int(size) if size else -1,
+                sha1=sha1.lower() if sha1 else None,
+                priority=int(record.get("priority") or 0),
+                line=line_num,
+            )
+        )
+    return entries
+
+
 async def probe_url(url: str, config: DownloadConfig) -> dict[str, Any]:
     timeout = httpx.Timeout(
         connect=config.connect_timeout,
@@ -641,6 +736,172 @@ async def run_batch_download(
     return 0 if display.failed == 0 else 1
 
 
+class NdjsonReporter:
+    """Writes one JSON object per line to stdout, throttling progress events."""
+
+    def __init__(self, interval: float = 0.5, output: TextIO = sys.stdout) -> None:
+        self.interval = interval
+        self._output = output
+        self._last_progress = 0.0
+
+    def emit(self, data: dict[str, Any]) -> None:
+        self._output.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self._output.flush()
+
+    def progress(self, payload: dict[str, Any], force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.interval:
+            return
+        self._last_progress = now
+        self.emit(
+            {
+                "type": "progress",
+                "total": payload.get("total_files", 0),
+                "completed": payload.get("completed_files", 0),
+                "failed": payload.get("failed_files", 0),
+                "active": payload.get("active_files", 0),
+                "pending": payload.get("pending_files", 0),
+                "downloaded_bytes": payload.get("downloaded_bytes", 0),
+                "total_bytes": payload.get("total_bytes", 0),
+                "speed": round(payload.get("smooth_speed") or payload.get("overall_speed") or 0.0, 1),
+                "eta": round(payload.get("eta", -1), 1),
+            }
+        )
+
+
+async def run_manifest_download(
+    entries: list[ManifestEntry],
+    config: DownloadConfig,
+    output_path: Path,
+    max_concurrent: int,
+    reporter: NdjsonReporter,
+) -> int:
+    """Download every manifest entry in one EnhancedBatchDownloader batch.
+
+    Sizes and hashes come from the manifest, so entries that carry both skip the batch
+    HEAD probe and every file is verified against its sha1. Higher ``priority`` entries are queued first.
+    """
+    batch = EnhancedBatchDownloader(config=config, max_concurrent_files=max_concurrent)
+    start_time = time.time()
+    hosts: dict[str, dict[str, int]] = {}
+    entries_by_task: dict[str, tuple[ManifestEntry, Path]] = {}
+    counts = {"completed": 0, "failed": 0, "reused": 0, "bytes": 0}
+
+    def on_progress(progress: dict[str, Any]) -> None:
+        reporter.progress(progress)
+
+    def on_complete(task: FileTask) -> None:
+        entry, dest = entries_by_task.get(task.task_id, (None, None))
+        host = extract_host(task.dispatch_url or task.url)
+        host_stats = hosts.setdefault(host, {"files": 0, "completed": 0, "failed": 0, "reused": 0, "bytes": 0})
+        host_stats["files"] += 1
+        ok = task.status == FileTaskStatus.COMPLETED
+        if ok:
+            size = max(task.file_size, 0)
+            for stats in (host_stats, counts):
+                stats["completed"] += 1
+                stats["bytes"] += 0 if task.is_existing_reused else size
+                stats["reused"] += int(task.is_existing_reused)
+        else:
+            host_stats["failed"] += 1
+            counts["failed"] += 1
+        reporter.emit(
+            {
+                "type": "file",
+                "url": entry.url if entry else task.url,
+                "dest": str(dest) if dest else None,
+                "host": host,
+                "status": task.status.value,
+                "size": task.file_size,
+                "reused": task.is_existing_reused,
+                "error": task.error,
+            }
+        )
+
+    batch.set_progress_callback(on_progress)
+    batch.set_file_complete_callback(on_complete)
+
+    # Task ids are derived from the URL, so each URL may appear only once per batch
+    seen_dests: set[Path] = set()
+    seen_urls: set[str] = set()
+    invalid = 0
+    for entry in sorted(entries, key=lambda e: -e.priority):
+        dest = Path(entry.dest).expanduser()
+        if not dest.is_absolute():
+            dest = output_path / dest
+        reason = "duplicate dest" if dest in seen_dests else "duplicate url" if entry.url in seen_urls else None
+        if reason:
+            reporter.emit({"type": "skipped", "url": entry.url, "dest": str(dest), "reason": reason})
+            continue
+        seen_dests.add(dest)
+        seen_urls.add(entry.url)
+        try:
+            task_id = await batch.add_url(
+                entry.url,
+                dest.parent,
+                dest.name,
+                priority=entry.priority,
+                backup_urls=entry.backup_urls or None,
+                size=entry.size if entry.size > 0 else None,
+                expected_hash=entry.sha1,
+            )
+        except Exception as e:
+            invalid += 1
+            reporter.emit({"type": "error", "url": entry.url, "line": entry.line, "error": str(e)})
+            continue
+        entries_by_task[task_id] = (entry, dest)
+
+    reporter.emit({"type": "start", "total": len(entries_by_task), "output": str(output_path)})
+
+    cancelled = False
+    error: str | None = None
+    try:
+        await batch.start()
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        cancelled = True
+        await batch.cancel()
+    except Exception as e:
+        error = str(e)
+    finally:
+        stats = batch.get_stats()
+        await batch.stop()
+
+    reporter.progress(stats, force=True)
+    timing_by_host = stats.get("timing", {}).get("by_host", {})
+    circuits = stats.get("circuits", {})
+    for host, host_stats in hosts.items():
+        total_timing = timing_by_host.get(host, {}).get("total")
+        if total_timing:
+            host_stats["p50_ms"] = total_timing["p50_ms"]
+            host_stats["p99_ms"] = total_timing["p99_ms"]
+        if host in circuits:
+            host_stats["circuit"] = circuits[host]
+
+    elapsed = time.time() - start_time
+    failed = counts["failed"] + invalid
+    success = not cancelled and error is None and failed == 0
+    reporter.emit(
+        {
+            "type": "summary",
+            "success": success,
+            "cancelled": cancelled,
+            "error": error,
+            "total": len(entries_by_task) + invalid,
+            "completed": counts["completed"],
+            "failed": failed,
+            "reused": counts["reused"],
+            "downloaded_bytes": counts["bytes"],
+            "elapsed_seconds": round(elapsed, 3),
+            "average_speed": round(counts["bytes"] / elapsed, 1) if elapsed > 0 else 0,
+            "retries": stats.get("retry_budget", {}).get("retries", 0),
+            "hosts": hosts,
+        }
+    )
+    if cancelled:
+        return 4
+    return 0 if success else 1
+
+
 def get_unique_path(path: Path) -> Path:
     if not path.exists():
         return path
@@ -761,6 +1022,9 @@ def main() -> int:
     args = parse_args()
     output = OutputMode(format_pref=args.output_format, quiet=args.quiet)
 
+    if args.manifest:
+        return asyncio.run(run_manifest_main(args))
+
     if not args.urls and not args.batch_file:
         if output.use_json:
             output.print_json(
@@ -776,6 +1040,7 @@ def main() -> int:
             print(f"{_('Usage')}: littledl <URL>")
             print(f"{_('   or')}: littledl <URL1> <URL2> <URL3> ...")
             print(f"{_('   or')}: littledl -F <batch_file>")
+            print(f"{_('   or')}: littledl -M <manifest>")
         return 2
 
     if args.batch_file or len(args.urls) > 1:
@@ -859,5 +1124,31 @@ async def run_batch_main(args: argparse.Namespace, output: OutputMode) -> int:
     )
 
 
+async def run_manifest_main(args: argparse.Namespace) -> int:
+    """Run a manifest download; all output is NDJSON regardless of --output-format."""
+    reporter = NdjsonReporter(interval=args.progress_interval)
+    try:
+        entries = read_manifest(args.manifest)
+    except (FileNotFoundError, ValueError) as e:
+        reporter.emit({"type": "error", "success": False, "error": str(e), "exit_code": 2})
+        return 2
+
+    config = build_config_from_args(args)
+    config.overwrite = args.force
+    style = style_to_enum(args.style)
+    if args.style != "auto":
+        config.apply_style(style)
+
+    output_path = Path(args.output or "./downloads").expanduser().resolve()
+    output_path.mkdir(parents=True, exist_ok=True)
+    return await run_manifest_download(
+        entries=entries,
+        config=config,
+        output_path=output_path,
+        max_concurrent=args.max_concurrent,
+        reporter=reporter,
+    )
+
+
 if __name__ == "__main__":
     sys.exit(main())
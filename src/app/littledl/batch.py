@@ -1,5 +1,8 @@
 import asyncio
+import bisect
 import contextlib
+import hashlib
+import os
 import shutil
 import time
 from collections.abc import Callable
@@ -8,14 +11,59 @@ from enum import Enum
 from pathlib import Path
 from typing import Any
 
+from .breaker import CircuitBreaker, RetryBudget
 from .callback import ProgressAggregator
 from .config import DownloadConfig
-from .connection import ConnectionPool
+from .connection import ConnectionPool, h2_available
 from .downloader import Downloader
-from .exceptions import DownloadError
+from .exceptions import (
+    CircuitOpenError,
+    DownloadError,
+    HTTPError,
+    ResourceNotFoundError,
+)
 from .global_pool import GlobalThreadPool
+from .hosts import THROTTLE_STATUS_CODES, HostPolicy, PerHostLimiter
+from .journal import BatchJournal
 from .reuse import FileReuseChecker, MultiSourceManager, SharedFileRegistry
-from .utils import generate_download_id, normalize_url, validate_url
+from .timing import FileTiming, TimingCollector
+from .utils import (
+    ensure_dir,
+    extract_host,
+    forget_dir,
+    generate_download_id,
+    get_fs_op_stats,
+    normalize_url,
+    parse_retry_after,
+    validate_url,
+)
+
+
+DEFAULT_LANE = "default"
+H2_LANE = "h2"
+
+
+def _write_atomic(path: Path, data: bytes, timing: FileTiming | None = None) -> None:
+    """写入同目录下的临时文件后原子替换，中断时不会留下半个文件"""
+    if timing:
+        timing.begin("write")
+    ensure_dir(path.parent)
+    temp_path = path.with_name(f".{path.name}.part")
+    try:
+        f = open(temp_path, "wb")
+    except FileNotFoundError:
+        # 目录在缓存之后被删掉了
+        forget_dir(path.parent)
+        ensure_dir(path.parent)
+        f = open(temp_path, "wb")
+    with f:
+        f.write(data)
+    if timing:
+        timing.end("write")
+        timing.begin("rename")
+    os.replace(temp_path, path)
+    if timing:
+        timing.end("rename")
 
 
 class FileTaskStatus(Enum):
@@ -51,6 +99,11 @@ class FileTask:
     sources: list[str] = field(default_factory=list)
     current_source_index: int = 0
     source_manager: MultiSourceManager | None = None
+    host: str = ""
+    dispatch_url: str | None = None
+    expected_hash: str | None = None
+    hash_algorithm: str = "sha1"
+    lane: str = DEFAULT_LANE
 
     existing_file_path: Path | None = None
     is_existing_reused: bool = False
@@ -331,17 +384,51 @@ class FileScheduler:
         small_file_threshold: int = 5 * 1024 * 1024,
         large_file_threshold: int = 100 * 1024 * 1024,
         enable_small_file_priority: bool = True,
+        host_limiter: PerHostLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        lane_limits: dict[str, int] | None = None,
+        lane_host_limiters: dict[str, PerHostLimiter] | None = None,
+        retain_finished: bool = True,
     ) -> None:
+        """
+        任务按通道（lane）分别排队和限流：默认通道受 max_concurrent_files 限制，
+        其他通道（如 HTTP/2 多路复用的小文件通道）使用 lane_limits 中的并发上限，
+        并可以有自己的按主机限流器。
+
+        retain_finished=False 时不保留已完成/失败的任务对象，只累计数量和字节数，
+        上万个文件的批次里内存只随排队和进行中的任务增长；get_all_tasks() 和
+        进度中的逐文件列表也就不再包含已结束的任务。
+        """
         self.max_concurrent_files = max_concurrent_files
         self.max_concurrent_chunks_per_file = max_concurrent_chunks_per_file
         self.small_file_threshold = small_file_threshold
         self.large_file_threshold = large_file_threshold
         self.enable_small_file_priority = enable_small_file_priority
+        self.host_limiter = host_limiter or PerHostLimiter(
+            HostPolicy(max_connections=max_concurrent_files)
+        )
+        self.circuit_breaker = circuit_breaker
 
         self._pending_tasks: list[FileTask] = []
         self._active_tasks: dict[str, FileTask] = {}
+        self.lane_limits: dict[str, int] = dict(lane_limits or {})
+        self._lane_host_limiters: dict[str, PerHostLimiter] = dict(
+            lane_host_limiters or {}
+        )
+        self._lane_pending: dict[str, list[FileTask]] = {
+            DEFAULT_LANE: self._pending_tasks
+        }
+        self._lane_active: dict[str, int] = {}
+        # 跨所有通道的派发上限，None 表示不限；用于在有更高优先级的下载时让出连接
+        self.dispatch_cap: int | None = None
         self._completed_tasks: list[FileTask] = []
         self._failed_tasks: list[FileTask] = []
+        self.retain_finished = retain_finished
+        # 不保留任务对象时的累计值
+        self._released_completed = 0
+        self._released_failed = 0
+        self._released_bytes = 0
+        self._released_downloaded = 0
         self._lock = asyncio.Lock()
         self._paused = False
         self._start_time: float = 0.0
@@ -354,7 +441,7 @@ class FileScheduler:
 
     @property
     def pending_count(self) -> int:
-        return len(self._pending_tasks)
+        return sum(len(queue) for queue in self._lane_pending.values())
 
     @property
     def active_count(self) -> int:
@@ -362,70 +449,279 @@ class FileScheduler:
 
     @property
     def completed_count(self) -> int:
-        return len(self._completed_tasks)
+        return len(self._completed_tasks) + self._released_completed
 
     @property
     def failed_count(self) -> int:
-        return len(self._failed_tasks)
+        return len(self._failed_tasks) + self._released_failed
+
+    def lane_pending_count(self, lane: str = DEFAULT_LANE) -> int:
+        return len(self._lane_pending.get(lane, ()))
+
+    def lane_active_count(self, lane: str = DEFAULT_LANE) -> int:
+        return self._lane_active.get(lane, 0)
+
+    def lane_limit(self, lane: str = DEFAULT_LANE) -> int:
+        return self.lane_limits.get(lane, self.max_concurrent_files)
+
+    def set_lane_limit(self, lane: str, limit: int) -> None:
+        """调整通道并发上限（如得知服务器允许的 HTTP/2 并发流数后）"""
+        self.lane_limits[lane] = max(1, limit)
+        limiter = self._lane_host_limiters.get(lane)
+        if limiter is not None:
+            limiter.set_max_connections(self.lane_limits[lane])
+
+    def set_dispatch_cap(self, cap: int | None) -> None:
+        """限制同时进行的任务总数；已在下载的任务不受影响，完成后不再补足"""
+        self.dispatch_cap = None if cap is None else max(0, cap)
+
+    async def reassign_lane(self, from_lane: str, to_lane: str) -> int:
+        """把一个通道里尚未派发的任务移到另一个通道，返回移动的任务数"""
+        async with self._lock:
+            moved = self._lane_pending.get(from_lane, [])
+            self._lane_pending[from_lane] = []
+            if from_lane == DEFAULT_LANE:
+                self._pending_tasks = self._lane_pending[DEFAULT_LANE]
+            queue = self._lane_queue(to_lane)
+            for task in moved:
+                task.lane = to_lane
+                queue.append(task)
+            if moved and self.enable_small_file_priority:
+                queue.sort(key=self._priority_key)
+            return len(moved)
+
+    def _lane_queue(self, lane: str) -> list[FileTask]:
+        queue = self._lane_pending.get(lane)
+        if queue is None:
+            queue = self._lane_pending[lane] = []
+        return queue
+
+    def _limiter_for(self, lane: str) -> PerHostLimiter:
+        return self._lane_host_limiters.get(lane, self.host_limiter)
+
+    def _all_pending(self) -> list[FileTask]:
+        if len(self._lane_pending) == 1:
+            return self._pending_tasks.copy()
+        return [task for queue in self._lane_pending.values() for task in queue]
 
     @property
     def total_tasks(self) -> int:
         return (
-            len(self._pending_tasks)
+            self.pending_count
             + len(self._active_tasks)
-            + len(self._completed_tasks)
-            + len(self._failed_tasks)
+            + self.completed_count
+            + self.failed_count
         )
 
     async def add_task(self, task: FileTask) -> None:
         async with self._lock:
-            self._pending_tasks.append(task)
+            # 重试时任务会被重新加入队列，先归还它占用的主机并发名额
+            self._release_active(task)
+            task.dispatch_url = self._resolve_source(task)
+            task.host = extract_host(task.dispatch_url)
+            queue = self._lane_queue(task.lane)
             if self.enable_small_file_priority:
-                self._sort_pending_by_priority()
+                # 队列已按优先级有序，二分插入，逐个添加上万个文件时不必每次整体排序
+                bisect.insort(queue, task, key=self._priority_key)
+            else:
+                queue.append(task)
+
+    def _resolve_source(self, task: FileTask) -> str:
+        """挑选任务本次使用的源：优先级最高且所在主机未熔断的源"""
+        if not task.source_manager:
+            return task.url
+        sources = task.source_manager.get_available_sources()
+        if not sources:
+            return task.url
+        if self.circuit_breaker:
+            for source in sources:
+                if self.circuit_breaker.is_available(extract_host(source["url"])):
+                    return source["url"]
+        return sources[0]["url"]
+
+    def _circuit_allows(self, task: FileTask) -> bool:
+        breaker = self.circuit_breaker
+        if breaker is None or breaker.is_available(task.host):
+            return True
+        if task.source_manager:
+            url = self._resolve_source(task)
+            host = extract_host(url)
+            if host != task.host and breaker.is_available(host):
+                task.dispatch_url, task.host = url, host
+                return True
+        # 宕机主机上没有替代源的任务照常派发，由下载器立即失败
+        return breaker.is_down(task.host)
+
+    @staticmethod
+    def _priority_key(t: FileTask) -> tuple[int, float]:
+        priority = 2
+        if t.is_small_file:
+            priority = 0
+        elif t.is_large_file:
+            priority = 3
+        elif t.file_size > 0:
+            priority = 1
+        return (priority, t.created_at)
 
     def _sort_pending_by_priority(self) -> None:
-        def get_priority(t: FileTask) -> tuple[int, float]:
-            priority = 2
-            if t.is_small_file:
-                priority = 0
-            elif t.is_large_file:
-                priority = 3
-            elif t.file_size > 0:
-                priority = 1
-            return (priority, t.created_at)
-
-        self._pending_tasks.sort(key=get_priority)
-
-    async def get_next_task(self) -> FileTask | None:
+        for queue in self._lane_pending.values():
+            queue.sort(key=self._priority_key)
+
+    async def get_next_task(self, lane: str = DEFAULT_LANE) -> FileTask | None:
         async with self._lock:
             if self._paused:
                 return None
-            if not self._pending_tasks:
+            queue = self._lane_pending.get(lane)
+            if not queue:
+                return None
+            if self._lane_active.get(lane, 0) >= self.lane_limit(lane):
                 return None
-            if len(self._active_tasks) >= self.max_concurrent_files:
+            if (
+                self.dispatch_cap is not None
+                and len(self._active_tasks) >= self.dispatch_cap
+            ):
                 return None
 
-            task = self._pending_tasks.pop(0)
+            limiter = self._limiter_for(lane)
+            index = self._select_pending_index(queue=queue, limiter=limiter)
+            if index is None:
+                return None
+
+            task = queue.pop(index)
             self._active_tasks[task.task_id] = task
+            self._lane_active[lane] = self._lane_active.get(lane, 0) + 1
+            limiter.on_dispatch(task.host)
+            if self.circuit_breaker and not self.circuit_breaker.is_down(task.host):
+                # 半开状态下占用唯一的探测名额
+                self.circuit_breaker.allow_request(task.host)
             return task
 
+    def _select_pending_index(
+        self,
+        lookahead: int = 64,
+        queue: list[FileTask] | None = None,
+        limiter: PerHostLimiter | None = None,
+        max_scan: int = 512,
+    ) -> int | None:
+        """
+        按优先级顺序挑选第一个主机允许派发的任务
+
+        同一优先级内在有限窗口里优先选择在途连接最少的主机，
+        让多个主机交替推进，而不是先把一个主机的队列跑满。
+        被限流或熔断的主机记下后，该主机上只有一个源的任务直接跳过；
+        其余任务每次最多检查 max_scan 个，主机大面积故障时不会每次派发都逐个检查整个队列。
+        """
+        queue = self._pending_tasks if queue is None else queue
+        limiter = limiter or self.host_limiter
+        now = time.monotonic()
+        blocked: set[str] = set()
+        best: int | None = None
+        best_tier = 0
+        best_active = 0
+        scanned = 0
+
+        for index, task in enumerate(queue):
+            if best is not None and index - best > lookahead:
+                break
+            if task.source_manager is None and task.host in blocked:
+                # 只有一个源的任务不会换主机，同一主机判定过一次即可
+                continue
+            scanned += 1
+            if scanned > max_scan:
+                break
+            if not self._circuit_allows(task):
+                if task.source_manager is None:
+                    blocked.add(task.host)
+                continue
+            host = task.host
+            if host in blocked:
+                continue
+            if not limiter.can_dispatch(host, now):
+                blocked.add(host)
+                continue
+
+            tier = self._priority_key(task)[0]
+            if best is None:
+                best, best_tier = index, tier
+                best_active = limiter.active_count(host)
+                if best_active == 0:
+                    break
+                continue
+            if tier != best_tier:
+                break
+            active = limiter.active_count(host)
+            if active < best_active:
+                best, best_active = index, active
+                if active == 0:
+                    break
+
+        return best
+
+    def record_host_response(
+        self,
+        url: str,
+        status_code: int,
+        retry_after: float | None = None,
+        lane: str = DEFAULT_LANE,
+    ) -> None:
+        self._limiter_for(lane).record_response(
+            extract_host(url), status_code, retry_after
+        )
+
+    def record_host_error(
+        self, url: str, error: BaseException, lane: str = DEFAULT_LANE
+    ) -> None:
+        if isinstance(error, HTTPError):
+            # 分块下载的错误带有实际出错的源地址（可能是备用镜像）
+            self.record_host_response(
+                error.url or url, error.status_code, error.retry_after, lane=lane
+            )
+
+    def get_host_stats(self) -> dict[str, dict[str, Any]]:
+        stats = self.host_limiter.get_stats()
+        for lane, limiter in self._lane_host_limiters.items():
+            for host, host_stats in limiter.get_stats().items():
+                stats[f"{host} [{lane}]"] = host_stats
+        return stats
+
+    def get_lane_stats(self) -> dict[str, dict[str, int]]:
+        return {
+            lane: {
+                "pending": len(queue),
+                "active": self._lane_active.get(lane, 0),
+                "limit": self.lane_limit(lane),
+            }
+            for lane, queue in self._lane_pending.items()
+        }
+
+    def _release_active(self, task: FileTask) -> None:
+        if self._active_tasks.pop(task.task_id, None) is not None:
+            self._limiter_for(task.lane).on_release(task.host)
+            self._lane_active[task.lane] = max(
+                0, self._lane_active.get(task.lane, 0) - 1
+            )
+
     async def task_completed(self, task: FileTask) -> None:
         async with self._lock:
-            if task.task_id in self._active_tasks:
-                del self._active_tasks[task.task_id]
-            self._completed_tasks.append(task)
+            self._release_active(task)
+            if self.retain_finished:
+                self._completed_tasks.append(task)
+                return
+            self._released_completed += 1
+            if task.file_size > 0:
+                self._released_bytes += task.file_size
+            self._released_downloaded += task.downloaded
 
     async def task_failed(self, task: FileTask) -> None:
         async with self._lock:
-            if task.task_id in self._active_tasks:
-                del self._active_tasks[task.task_id]
-            self._failed_tasks.append(task)
+            self._release_active(task)
+            if self.retain_finished:
+                self._failed_tasks.append(task)
+            else:
+                self._released_failed += 1
 
     async def task_cancelled(self, task: FileTask) -> None:
-        async with self._lock:
-            if task.task_id in self._active_tasks:
-                del self._active_tasks[task.task_id]
-            self._failed_tasks.append(task)
+        await self.task_failed(task)
 
     def get_optimal_chunks_for_task(self, task: FileTask) -> int:
         if task.is_small_file:
@@ -470,26 +766,28 @@ class FileScheduler:
         return (
             self._completed_tasks
             + list(self._active_tasks.values())
-            + self._pending_tasks
+            + self._all_pending()
             + self._failed_tasks
         )
 
     def get_progress(self, include_files: bool = True) -> BatchProgress:
         completed = self._completed_tasks.copy()
         active = list(self._active_tasks.values())
-        pending = self._pending_tasks.copy()
+        pending = self._all_pending()
         failed = self._failed_tasks.copy()
 
-        total_files = len(completed) + len(active) + len(pending) + len(failed)
-        completed_files = len(completed)
-        failed_files = len(failed)
+        completed_files = len(completed) + self._released_completed
+        failed_files = len(failed) + self._released_failed
         active_files = len(active)
         pending_files = len(pending)
+        total_files = completed_files + active_files + pending_files + failed_files
 
-        total_bytes = sum(
+        total_bytes = self._released_bytes + sum(
             t.file_size for t in completed + active + pending if t.file_size > 0
         )
-        downloaded_bytes = sum(t.downloaded for t in completed + active)
+        downloaded_bytes = self._released_downloaded + sum(
+            t.downloaded for t in completed + active
+        )
 
         active_speed = sum(t.speed for t in active if t.speed > 0)
         self._speed_history.append(active_speed)
@@ -1016,6 +1314,7 @@ class BatchDownloader:
                 resume=self.config.resume,
                 progress_callback=progress_updater,
             )
+            self._scheduler.record_host_response(task.url, 200)
             await task.mark_completed()
             await self._scheduler.task_completed(task)
             await self._concurrency_controller.record_success()
@@ -1029,6 +1328,7 @@ class BatchDownloader:
             await self._emit_progress()
 
         except Exception as e:
+            self._scheduler.record_host_error(task.url, e)
             await self._concurrency_controller.record_error()
             if task.retry_count < self.config.retry.max_retries:
                 await task.reset_for_retry()
@@ -1177,10 +1477,20 @@ class EnhancedBatchDownloader:
         enable_existing_file_reuse: bool = True,
         enable_multi_source: bool = True,
         enable_adaptive_speed: bool = True,
+        max_connections_per_host: int = 6,
+        small_object_threshold: int = 256 * 1024,
+        enable_timing: bool = True,
+        timing_trace_path: str | Path | None = None,
+        retain_finished_tasks: bool = True,
     ) -> None:
         self.config = config or DownloadConfig()
         self.max_concurrent_files = max_concurrent_files
         self.max_total_threads = max_total_threads
+        self.max_connections_per_host = max_connections_per_host
+        self.small_object_threshold = small_object_threshold
+
+        self._circuit_breaker = CircuitBreaker()
+        self._retry_budget = RetryBudget()
         self.small_file_threshold = small_file_threshold
         self.enable_existing_file_reuse = enable_existing_file_reuse
         self.enable_multi_source = enable_multi_source
@@ -1200,20 +1510,39 @@ class EnhancedBatchDownloader:
             max_concurrent_files=max_concurrent_files,
             max_concurrent_chunks_per_file=4,
             small_file_threshold=small_file_threshold,
+            host_limiter=PerHostLimiter(
+                HostPolicy(max_connections=max_connections_per_host)
+            ),
+            circuit_breaker=self._circuit_breaker,
+            retain_finished=retain_finished_tasks,
         )
+        # 为 False 时已结束的任务下载完即从任务表移除，配合流式添加控制内存
+        self.retain_finished_tasks = retain_finished_tasks
 
         self._connection_pool: ConnectionPool | None = None
+        self._shared_pool: ConnectionPool | None = None
         self._running = False
         self._paused = False
         self._cancelled = False
         self._lock = asyncio.Lock()
         self._tasks: dict[str, FileTask] = {}
+        self._save_paths: dict[str, Path] = {}
+        # 批次中出现过的保存目录，查找可复用文件时只需遍历不同的目录，而不是所有任务
+        self._save_dirs: set[Path] = set()
         self._progress_callback: Any = None
         self._file_complete_callback: Any = None
+        self._journal: BatchJournal | None = None
+        # 流式添加：输入未关闭时下载循环在队列取空后继续等待新文件
+        self._input_open = False
+        self._stream_probes: set[asyncio.Task[None]] = set()
+        self._stream_probe_semaphore = asyncio.Semaphore(20)
+        # 逐文件分阶段计时；timing_trace_path 指定时同时写 JSON Lines 跟踪文件
+        self._timing = TimingCollector(trace_path=timing_trace_path, enabled=enable_timing)
 
         self._thread_check_task: asyncio.Task[None] | None = None
         self._speed_monitor_task: asyncio.Task[None] | None = None
         self._total_speed: float = 0.0
+        self._fs_ops_baseline = get_fs_op_stats()
 
         self._download_stats = {
             "total_files": 0,
@@ -1223,6 +1552,7 @@ class EnhancedBatchDownloader:
             "bytes_saved": 0,
             "total_chunks": 0,
             "dynamic_chunks_added": 0,
+            "small_object_files": 0,
         }
 
     async def add_url(
@@ -1232,13 +1562,21 @@ class EnhancedBatchDownloader:
         filename: str | None = None,
         priority: int = 0,
         backup_urls: list[str] | None = None,
+        size: int | None = None,
+        expected_hash: str | None = None,
+        hash_algorithm: str = "sha1",
     ) -> str:
+        """添加下载任务
+
+        已知大小和哈希时（如 Minecraft 资源索引中的文件）一并传入：批次不再发 HEAD 探测，
+        小文件走轻量路径，下载完成后按哈希校验。
+        """
         url = normalize_url(url)
         if not validate_url(url):
             raise DownloadError(f"Invalid URL: {url}")
 
         task_id = generate_download_id(url)
-        save_path = Path(save_path).expanduser().resolve()
+        save_path = self._resolve_save_path(save_path)
 
         sources = [url]
         if backup_urls:
@@ -1251,6 +1589,9 @@ class EnhancedBatchDownloader:
             filename=filename,
             priority=priority,
             sources=sources,
+            file_size=size if size and size > 0 else -1,
+            expected_hash=expected_hash.lower() if expected_hash else None,
+            hash_algorithm=hash_algorithm,
         )
 
         if self.enable_multi_source and len(sources) > 1:
@@ -1258,11 +1599,28 @@ class EnhancedBatchDownloader:
             for i, src in enumerate(sources):
                 task.source_manager.add_source(src, priority=len(sources) - i)
 
+        task.lane = self._classify_lane(task)
         self._tasks[task_id] = task
-        await self._scheduler.add_task(task)
+        self._save_dirs.add(save_path)
+        self._timing.mark_enqueued(task_id)
+        if self._running:
+            # 批次已在运行（流式添加），探测完成后再进入调度队列
+            probe = asyncio.create_task(self._probe_and_enqueue(task))
+            self._stream_probes.add(probe)
+            probe.add_done_callback(self._stream_probes.discard)
+        else:
+            await self._scheduler.add_task(task)
         self._download_stats["total_files"] += 1
         return task_id
 
+    def _resolve_save_path(self, save_path: str | Path) -> Path:
+        """同一目录的任务共用一个 Path 对象（上万个资源文件只分布在 256 个目录里）"""
+        key = str(save_path)
+        resolved = self._save_paths.get(key)
+        if resolved is None:
+            resolved = self._save_paths[key] = Path(save_path).expanduser().resolve()
+        return resolved
+
     async def add_urls(
         self,
         urls: list[str],
@@ -1285,8 +1643,10 @@ class EnhancedBatchDownloader:
             return
         self._running = True
 
-        self._connection_pool = ConnectionPool(self.config)
+        self._fs_ops_baseline = get_fs_op_stats()
+        self._connection_pool = self._shared_pool or ConnectionPool(self.config)
         await self._connection_pool.initialize()
+        await self._open_lanes()
 
         await self._global_pool.start()
 
@@ -1297,6 +1657,108 @@ class EnhancedBatchDownloader:
         await self._batch_probe_all()
         await self._download_loop()
 
+    def _classify_lane(self, task: FileTask) -> str:
+        """决定任务走哪个调度通道；子类可以为特定任务开辟独立通道"""
+        return DEFAULT_LANE
+
+    async def _open_lanes(self) -> None:
+        """为额外的通道准备连接"""
+
+    async def _close_lanes(self) -> None:
+        """关闭额外通道的连接"""
+
+    def _client_for(self, task: FileTask) -> Any:
+        assert self._connection_pool is not None
+        return self._connection_pool.client
+
+    async def _observe_response(self, task: FileTask, response: Any) -> None:
+        """轻量路径收到响应后的钩子，可用于根据协议调整通道"""
+
+    def set_connection_pool(self, pool: ConnectionPool) -> None:
+        """使用外部共享的连接池（如常驻下载引擎的连接池）；stop() 时不会关闭它"""
+        self._shared_pool = pool
+
+    def set_dispatch_cap(self, cap: int | None) -> None:
+        """让出并发：最多同时下载 cap 个文件，None 恢复正常调度
+
+        供上层协调器在有交互式下载时调用，批次不会被取消，只是暂时少派发任务；
+        已在下载的文件不受影响，进行中的文件数降到 cap 以下后才生效。
+        """
+        self._scheduler.set_dispatch_cap(cap)
+
+    def open_input(self) -> None:
+        """开始流式添加：start() 在队列取空时不会结束，直到 close_input()
+
+        用于边规划边下载：先加入已知的文件并 start()，再在运行中陆续 add_url。
+        """
+        self._input_open = True
+
+    def close_input(self) -> None:
+        """不会再有新文件加入，已加入的文件下载完后 start() 返回"""
+        self._input_open = False
+
+    @property
+    def _input_drained(self) -> bool:
+        return not self._input_open and not self._stream_probes
+
+    @property
+    def backlog(self) -> int:
+        """已加入但尚未开始下载的文件数（排队中 + 正在探测）"""
+        return self._scheduler.pending_count + len(self._stream_probes)
+
+    async def wait_for_backlog_below(self, limit: int) -> None:
+        """流式添加的背压：排队文件少于 limit 再返回，调用方按需生成后续任务"""
+        while self.backlog >= limit and self._running and not self._cancelled:
+            await asyncio.sleep(0.05)
+
+    def _release_finished(self, task_id: str) -> None:
+        if self.retain_finished_tasks:
+            return
+        task = self._tasks.get(task_id)
+        if task is not None and task.status in (
+            FileTaskStatus.COMPLETED,
+            FileTaskStatus.FAILED,
+            FileTaskStatus.CANCELLED,
+        ):
+            del self._tasks[task_id]
+
+    async def _probe_and_enqueue(self, task: FileTask) -> None:
+        async with self._stream_probe_semaphore:
+            if self._cancelled:
+                return
+            try:
+                await self._probe_single(task)
+            except Exception as e:
+                await self._fail_task(task, str(e))
+                self._release_finished(task.task_id)
+                return
+        await self._scheduler.add_task(task)
+
+    def set_journal(self, journal: BatchJournal | None) -> None:
+        """记录每个文件的开始/完成/失败，供中断后恢复批次"""
+        self._journal = journal
+
+    def _journal_event(
+        self,
+        task: FileTask,
+        state: str,
+        error: str | None = None,
+        sha1: str | None = None,
+    ) -> None:
+        """sha1 为已按期望值校验过的哈希，随完成记录写入日志，恢复时无需重算"""
+        if self._journal is None:
+            return
+        target_path = task.save_path / (task.filename or "unknown")
+        with contextlib.suppress(OSError):
+            if state == "start":
+                self._journal.record_started(target_path)
+            elif state == "done":
+                self._journal.record_completed(
+                    target_path, sha1, verified=sha1 is not None
+                )
+            else:
+                self._journal.record_failed(target_path, error)
+
     async def _batch_probe_all(self) -> None:
         pending_tasks = [
             t for t in self._tasks.values() if t.status == FileTaskStatus.PENDING
@@ -1313,14 +1775,56 @@ class EnhancedBatchDownloader:
                 try:
                     await self._probe_single(task)
                 except Exception as e:
-                    await task.mark_failed(str(e))
-                    await self._scheduler.task_failed(task)
+                    await self._fail_task(task, str(e))
 
         await asyncio.gather(
             *[probe_single(t) for t in pending_tasks], return_exceptions=True
         )
 
+    def _is_small_object(self, task: FileTask) -> bool:
+        return 0 < task.file_size <= self.small_object_threshold and bool(
+            task.filename
+        )
+
+    async def _skip_probe(self, task: FileTask) -> None:
+        """大小已知的小文件不发 HEAD，直接按单连接下载"""
+        task.supports_range = False
+        task.chunks = 1
+        task.status = FileTaskStatus.PENDING
+        if self.enable_existing_file_reuse and self._file_reuse_checker:
+            # 只检查目标路径本身；在其他目录中找同名文件需要逐个目录 stat，
+            # 上万个小文件时代价比重新下载还高
+            target_path = task.save_path / (task.filename or "unknown")
+            existing = await self._check_existing_file(
+                target_path, task.file_size, search_other_dirs=False
+            )
+            if existing:
+                task.existing_file_path = existing
+                task.is_existing_reused = True
+
+    async def _skip_probe_for_known_file(self, task: FileTask) -> None:
+        """大小和哈希都已知的大文件也不在批次层发 HEAD
+
+        Downloader 开始下载时会自行探测 Range 支持，不支持时退回单连接，最终按哈希校验。
+        """
+        task.supports_range = True
+        task.chunks = self._scheduler.get_optimal_chunks_for_task(task)
+        task.status = FileTaskStatus.PENDING
+        if self.enable_existing_file_reuse and self._file_reuse_checker:
+            target_path = task.save_path / (task.filename or "unknown")
+            existing = await self._check_existing_file(target_path, task.file_size)
+            if existing:
+                task.existing_file_path = existing
+                task.is_existing_reused = True
+
     async def _probe_single(self, task: FileTask) -> None:
+        if self._is_small_object(task):
+            await self._skip_probe(task)
+            return
+        if task.file_size > 0 and task.expected_hash and task.filename:
+            await self._skip_probe_for_known_file(task)
+            return
+
         await task.mark_probing()
 
         client = self._connection_pool.client if self._connection_pool else None
@@ -1330,19 +1834,32 @@ class EnhancedBatchDownloader:
         from .connection import RequestBuilder
 
         builder = RequestBuilder(self.config)
-        request_config = builder.build_head_request(task.url)
-
-        try:
-            response = await client.head(
-                request_config["url"],
-                headers=request_config["headers"],
-                follow_redirects=request_config["follow_redirects"],
-            )
-        except Exception as e:
-            raise DownloadError(f"Failed to probe URL: {e}") from None
-
-        if response.status_code >= 400:
-            raise DownloadError(f"HTTP {response.status_code}")
+        # 主源探测失败时依次探测备用源，并把失败的源标记出来，派发时不再选中它
+        probe_urls = [task.url]
+        if task.source_manager:
+            probe_urls += [
+                source["url"]
+                for source in task.source_manager.get_available_sources()
+                if source["url"] != task.url
+            ]
+        for probe_url in probe_urls:
+            request_config = builder.build_head_request(probe_url)
+            try:
+                response = await client.head(
+                    request_config["url"],
+                    headers=request_config["headers"],
+                    follow_redirects=request_config["follow_redirects"],
+                )
+            except Exception as e:
+                error = DownloadError(f"Failed to probe URL: {e}")
+            else:
+                if response.status_code < 400:
+                    break
+                error = DownloadError(f"HTTP {response.status_code}")
+            if task.source_manager:
+                task.source_manager.mark_source_failed(probe_url, str(error))
+        else:
+            raise error
 
         task.file_size = (
             int(response.headers.get("Content-Length", 0))
@@ -1383,16 +1900,17 @@ class EnhancedBatchDownloader:
         task.status = FileTaskStatus.PENDING
 
     async def _check_existing_file(
-        self, target_path: Path, expected_size: int
+        self, target_path: Path, expected_size: int, search_other_dirs: bool = True
     ) -> Path | None:
         if not self._file_reuse_checker:
             return None
 
         if not target_path.exists():
-            search_paths = []
-            for task in self._tasks.values():
-                if task.save_path != target_path.parent:
-                    search_paths.append(task.save_path)
+            if not search_other_dirs:
+                return None
+            search_paths = [
+                path for path in self._save_dirs if path != target_path.parent
+            ]
 
             return self._file_reuse_checker.find_existing_file(
                 target_path,
@@ -1418,6 +1936,7 @@ class EnhancedBatchDownloader:
                 if not task.is_failed:
                     await task.mark_failed(str(e))
                     await self._scheduler.task_failed(task)
+                    await self._notify_file_complete(task)
                     await self._emit_progress()
 
         while self._running:
@@ -1438,6 +1957,7 @@ class EnhancedBatchDownloader:
 
                 if task.is_existing_reused and task.existing_file_path:
                     await self._reuse_existing_file(task)
+                    self._release_finished(task.task_id)
                     continue
 
                 download_tasks[task.task_id] = asyncio.create_task(download_file(task))
@@ -1447,6 +1967,7 @@ class EnhancedBatchDownloader:
                 task = download_tasks.pop(tid)
                 with contextlib.suppress(asyncio.CancelledError):
                     await task
+                self._release_finished(tid)
 
             now = time.time()
             if (
@@ -1469,6 +1990,7 @@ class EnhancedBatchDownloader:
                 not download_tasks
                 and self._scheduler.pending_count == 0
                 and self._scheduler.active_count == 0
+                and self._input_drained
             ):
                 break
 
@@ -1485,11 +2007,12 @@ class EnhancedBatchDownloader:
 
         try:
             if task.existing_file_path != target_path:
-                task.save_path.mkdir(parents=True, exist_ok=True)
+                ensure_dir(task.save_path)
                 shutil.copy2(task.existing_file_path, target_path)
 
             await task.mark_completed()
             await self._scheduler.task_completed(task)
+            self._journal_event(task, "done")
 
             self._download_stats["reused_files"] += 1
             if task.file_size > 0:
@@ -1498,12 +2021,7 @@ class EnhancedBatchDownloader:
             if self._file_reuse_checker:
                 stats = self._file_reuse_checker.get_stats()
 
-            if self._file_complete_callback:
-                with contextlib.suppress(Exception):
-                    result = self._file_complete_callback(task)
-                    if asyncio.iscoroutine(result):
-                        await result
-
+            await self._notify_file_complete(task)
             await self._emit_progress()
 
         except Exception as e:
@@ -1526,81 +2044,202 @@ class EnhancedBatchDownloader:
                 downloaded_agg, speed_agg if speed_agg > 0 else speed
             )
 
-        try:
-            file_config = DownloadConfig(
-                enable_chunking=self.config.enable_chunking and task.supports_range,
-                max_chunks=task.chunks,
-                min_chunks=1,
-                buffer_size=self.config.buffer_size,
-                timeout=self.config.timeout,
-                connect_timeout=self.config.connect_timeout,
-                read_timeout=self.config.read_timeout,
-                write_timeout=self.config.write_timeout,
-                resume=self.config.resume,
-                verify_ssl=self.config.verify_ssl,
-                user_agent=self.config.user_agent,
-                headers=self.config.headers.copy(),
-                proxy=self.config.proxy,
-                speed_limit=self.config.speed_limit,
-                retry=self.config.retry,
-                follow_redirects=self.config.follow_redirects,
-                max_redirects=self.config.max_redirects,
-            )
-
-            downloader = Downloader(config=file_config)
-            if self._connection_pool:
-                downloader.set_connection_pool(self._connection_pool)
+        url = task.dispatch_url or task.url
+        host = extract_host(url)
+        self._retry_budget.record_request()
+        self._journal_event(task, "start")
+        timing = self._timing.start_file(task.task_id, url, host, task.file_size, task.lane)
 
-            url = task.url
-            if task.source_manager:
-                source_info = task.source_manager.get_next_available()
-                if source_info:
-                    url = source_info["url"]
+        try:
+            if self._circuit_breaker.is_down(host):
+                raise CircuitOpenError(host, url)
 
-            await downloader.download(
-                url=url,
-                save_path=str(task.save_path),
-                filename=task.filename,
-                resume=self.config.resume,
-                progress_callback=progress_updater,
-            )
+            if self._is_small_object(task) and self._connection_pool:
+                await self._download_small_object(task, url, timing)
+            else:
+                await self._download_with_downloader(
+                    task, url, progress_updater, timing
+                )
 
+            self._scheduler.record_host_response(url, 200, lane=task.lane)
+            self._circuit_breaker.record_success(host)
             await task.mark_completed()
             await self._scheduler.task_completed(task)
             self._download_stats["completed_files"] += 1
+            # 两条下载路径在有期望哈希时都已校验过内容，校验失败会抛出异常
+            verified_sha1 = (
+                task.expected_hash if task.hash_algorithm == "sha1" else None
+            )
+            self._journal_event(task, "done", sha1=verified_sha1)
+            self._timing.finish_file(timing, "completed", task.file_size)
 
             if task.source_manager:
                 task.source_manager.mark_source_success(url)
 
-            if self._file_complete_callback:
-                with contextlib.suppress(Exception):
-                    result = self._file_complete_callback(task)
-                    if asyncio.iscoroutine(result):
-                        await result
-
+            await self._notify_file_complete(task)
             await self._emit_progress()
 
         except Exception as e:
+            self._scheduler.record_host_error(url, e, lane=task.lane)
+            if isinstance(e, CircuitOpenError):
+                # 主机已判定宕机且没有替代源，不再重试
+                await self._fail_task(task, str(e), timing)
+                return
+            self._circuit_breaker.record_error(host, e)
             if task.source_manager:
-                task.source_manager.mark_source_failed(task.url, str(e))
-
-            if task.source_manager and task.source_manager.has_available_source:
-                next_source = task.source_manager.get_next_available()
-                if next_source:
-                    task.retry_count += 1
-                    if task.retry_count < self.config.retry.max_retries:
-                        await task.reset_for_retry()
-                        await self._scheduler.add_task(task)
-                        await self._global_pool.release_thread(task.task_id)
-                        return
-
-            await task.mark_failed(str(e))
-            await self._scheduler.task_failed(task)
-            self._download_stats["failed_files"] += 1
-            await self._emit_progress()
+                task.source_manager.mark_source_failed(url, str(e))
+
+            # 被限流（429/503）时重新排队，由调度器按该主机的冷却期推迟派发
+            throttled = (
+                isinstance(e, HTTPError)
+                and e.status_code in THROTTLE_STATUS_CODES
+            )
+            next_source = (
+                task.source_manager.get_next_available()
+                if task.source_manager and task.source_manager.has_available_source
+                else None
+            )
+            # 换到另一主机上的源属于故障转移，不是对同一主机的重复请求，不占用预算
+            failover = (
+                next_source is not None and extract_host(next_source["url"]) != host
+            )
+            # 重试受批次级预算约束，镜像大面积故障时不会把请求量放大数倍
+            if (
+                (throttled or next_source is not None)
+                and task.retry_count < self.config.retry.max_retries
+                and (failover or self._retry_budget.try_spend())
+            ):
+                await task.reset_for_retry()
+                self._timing.finish_file(timing, "retry")
+                self._timing.mark_enqueued(task.task_id)
+                await self._scheduler.add_task(task)
+                return
+
+            await self._fail_task(task, str(e), timing)
         finally:
             await self._global_pool.release_thread(task.task_id)
 
+    async def _download_with_downloader(
+        self,
+        task: FileTask,
+        url: str,
+        progress_callback: Callable[..., Any],
+        timing: FileTiming | None = None,
+    ) -> None:
+        file_config = DownloadConfig(
+            enable_chunking=self.config.enable_chunking and task.supports_range,
+            max_chunks=task.chunks,
+            min_chunks=1,
+            buffer_size=self.config.buffer_size,
+            timeout=self.config.timeout,
+            connect_timeout=self.config.connect_timeout,
+            read_timeout=self.config.read_timeout,
+            write_timeout=self.config.write_timeout,
+            resume=self.config.resume,
+            verify_ssl=self.config.verify_ssl,
+            user_agent=self.config.user_agent,
+            headers=self.config.headers.copy(),
+            proxy=self.config.proxy,
+            speed_limit=self.config.speed_limit,
+            retry=self.config.retry,
+            follow_redirects=self.config.follow_redirects,
+            max_redirects=self.config.max_redirects,
+        )
+        if task.expected_hash:
+            file_config.verify_hash = True
+            file_config.expected_hash = task.expected_hash
+            file_config.hash_algorithm = task.hash_algorithm
+
+        downloader = Downloader(config=file_config)
+        if self._connection_pool:
+            downloader.set_connection_pool(self._connection_pool)
+
+        # 其余可用源交给 Downloader，大文件可按字节区间同时从多个源下载
+        backup_urls = [
+            src
+            for src in task.sources
+            if src != url
+            and self._circuit_breaker.is_available(extract_host(src))
+        ]
+
+        # Downloader 内部的连接、写盘和校验不单独拆分，整体计入 transfer
+        if timing:
+            timing.begin("transfer")
+        await downloader.download(
+            url=url,
+            save_path=str(task.save_path),
+            filename=task.filename,
+            resume=self.config.resume,
+            progress_callback=progress_callback,
+            backup_urls=backup_urls or None,
+        )
+        if timing:
+            timing.end("transfer")
+
+    async def _download_small_object(
+        self, task: FileTask, url: str, timing: FileTiming | None = None
+    ) -> None:
+        """小文件轻量路径：共享客户端单次 GET，内存中校验哈希，一次写入后原子替换
+
+        不创建 Downloader 及其断点续传、缓冲写入、监控和分片调度等逐文件组件。
+        """
+        client = self._client_for(task)
+        response = await client.get(
+            url,
+            headers=self.config.get_headers(url),
+            follow_redirects=self.config.follow_redirects,
+            extensions={"trace": timing.trace} if timing else None,
+        )
+        await self._observe_response(task, response)
+        if response.status_code == 404:
+            raise ResourceNotFoundError(url)
+        if response.status_code >= 400:
+            raise HTTPError(
+                f"HTTP {response.status_code}",
+                response.status_code,
+                url,
+                parse_retry_after(response.headers.get("Retry-After")),
+            )
+
+        body = response.content
+        if task.expected_hash:
+            if timing:
+                timing.begin("hash")
+            actual = hashlib.new(task.hash_algorithm, body).hexdigest()
+            if timing:
+                timing.end("hash")
+            if actual != task.expected_hash:
+                raise DownloadError(
+                    f"Hash verification failed: expected {task.expected_hash}, got {actual}",
+                    url,
+                )
+
+        target_path = task.save_path / (task.filename or "unknown")
+        await asyncio.to_thread(_write_atomic, target_path, body, timing)
+        task.file_size = len(body)
+        await task.update_progress(len(body))
+        self._download_stats["small_object_files"] += 1
+
+    async def _fail_task(
+        self, task: FileTask, error: str, timing: FileTiming | None = None
+    ) -> None:
+        await task.mark_failed(error)
+        await self._scheduler.task_failed(task)
+        self._download_stats["failed_files"] += 1
+        self._journal_event(task, "fail", error)
+        if timing is not None:
+            self._timing.finish_file(timing, "failed")
+        await self._notify_file_complete(task)
+        await self._emit_progress()
+
+    async def _notify_file_complete(self, task: FileTask) -> None:
+        """文件结束（完成或最终失败）时通知调用方，失败的文件也要让调用方计入"""
+        if self._file_complete_callback:
+            with contextlib.suppress(Exception):
+                result = self._file_complete_callback(task)
+                if asyncio.iscoroutine(result):
+                    await result
+
     async def _emit_progress(self) -> None:
         if self._progress_callback is None:
             return
@@ -1642,9 +2281,13 @@ class EnhancedBatchDownloader:
                 pass
 
     async def _speed_monitor_loop(self) -> None:
+        loop = asyncio.get_running_loop()
         while self._running:
             try:
+                before = loop.time()
                 await asyncio.sleep(0.1)
+                # 超出预定时长的部分即事件循环延迟：回调排队越久，说明本进程越忙
+                self._timing.record_loop_lag(max(0.0, loop.time() - before - 0.1))
 
                 self._global_pool.record_speed(self._total_speed)
 
@@ -1667,6 +2310,7 @@ class EnhancedBatchDownloader:
         async with self._lock:
             self._cancelled = True
             self._running = False
+            self._input_open = False
             for task in self._tasks.values():
                 if task.is_active:
                     await task.mark_cancelled()
@@ -1674,6 +2318,9 @@ class EnhancedBatchDownloader:
 
     async def stop(self) -> None:
         self._running = False
+        self._input_open = False
+        for probe in list(self._stream_probes):
+            probe.cancel()
         if self._thread_check_task:
             self._thread_check_task.cancel()
             with contextlib.suppress(asyncio.CancelledError):
@@ -1683,8 +2330,10 @@ class EnhancedBatchDownloader:
             with contextlib.suppress(asyncio.CancelledError):
                 await self._speed_monitor_task
         await self._global_pool.stop()
-        if self._connection_pool:
+        await self._close_lanes()
+        if self._connection_pool and self._connection_pool is not self._shared_pool:
             await self._connection_pool.close()
+        self._timing.close()
 
     def get_task(self, task_id: str) -> FileTask | None:
         return self._tasks.get(task_id)
@@ -1714,6 +2363,33 @@ class EnhancedBatchDownloader:
             "total_threads": pool_stats.total_threads,
             "active_threads": pool_stats.active_threads,
             "dynamic_chunks_added": self._download_stats["dynamic_chunks_added"],
+            "small_object_files": self._download_stats["small_object_files"],
+            "hosts": self._scheduler.get_host_stats(),
+            "circuits": self._circuit_breaker.get_stats(),
+            "retry_budget": self._retry_budget.get_stats(),
+            "lanes": self._scheduler.get_lane_stats(),
+            "dispatch_cap": self._scheduler.dispatch_cap,
+            "fs_ops": self.get_fs_op_stats(),
+            "timing": self._timing.get_stats(),
+        }
+
+    def add_timing_listener(self, callback: Callable[[FileTiming, str], None]) -> None:
+        """每个文件的每次下载尝试结束后回调 (timing, outcome)"""
+        self._timing.add_listener(callback)
+
+    def get_timing_stats(self) -> dict[str, Any]:
+        """各阶段耗时直方图：整体、按主机、按大小档位，以及事件循环延迟"""
+        return self._timing.get_stats()
+
+    def get_fs_op_stats(self) -> dict[str, int]:
+        """本批次发起和省去的目录元数据操作次数（目录缓存是进程级的）"""
+        current = get_fs_op_stats()
+        return {
+            "mkdir_calls": current["mkdir_calls"]
+            - self._fs_ops_baseline["mkdir_calls"],
+            "mkdir_skipped": current["mkdir_skipped"]
+            - self._fs_ops_baseline["mkdir_skipped"],
+            "known_dirs": current["known_dirs"],
         }
 
     def get_file_reuse_stats(self) -> dict[str, Any] | None:
@@ -1734,6 +2410,9 @@ class MCBatchDownloader(EnhancedBatchDownloader):
     5. 保守分块策略 - 小文件最多2块，减少线程开销
     6. 更快的进度更新 - 0.3s间隔替代0.5s
     7. 连接复用优化 - 长连接保持用于同域名
+    8. HTTP/2 小文件通道（enable_h2_lane 开启）- 已知大小的 HTTPS 小文件走独立通道，
+       在一两条 HTTP/2 连接上多路复用，不受面向 HTTP/1.1 的文件并发数限制；
+       流数超过吞吐饱和点后只增加排队时间，默认最多 32 个并发流
     """
 
     VERSION_JSON_PATTERN = ("version", ".json")
@@ -1751,6 +2430,15 @@ class MCBatchDownloader(EnhancedBatchDownloader):
         enable_multi_source: bool = True,
         enable_adaptive_speed: bool = True,
         skip_probe_threshold: int = 64 * 1024,
+        max_connections_per_host: int = 12,
+        small_object_threshold: int = 256 * 1024,
+        enable_h2_lane: bool = False,
+        h2_lane_connections: int = 2,
+        h2_lane_initial_streams: int = 16,
+        h2_lane_max_streams: int = 32,
+        enable_timing: bool = True,
+        timing_trace_path: str | Path | None = None,
+        retain_finished_tasks: bool = True,
     ) -> None:
         super().__init__(
             config=config,
@@ -1760,14 +2448,43 @@ class MCBatchDownloader(EnhancedBatchDownloader):
             enable_existing_file_reuse=enable_existing_file_reuse,
             enable_multi_source=enable_multi_source,
             enable_adaptive_speed=enable_adaptive_speed,
+            max_connections_per_host=max_connections_per_host,
+            small_object_threshold=small_object_threshold,
+            enable_timing=enable_timing,
+            timing_trace_path=timing_trace_path,
+            retain_finished_tasks=retain_finished_tasks,
         )
         self.skip_probe_threshold = skip_probe_threshold
         self._progress_interval = 0.3
 
+        # 没有安装 h2 时 httpx 无法协商 HTTP/2，小文件仍走默认通道
+        self.enable_h2_lane = enable_h2_lane and h2_available()
+        self.h2_lane_connections = h2_lane_connections
+        self.h2_lane_max_streams = h2_lane_max_streams
+        self._h2_pool: ConnectionPool | None = None
+        self._h2_lane_settled = False
+
+        lane_limits: dict[str, int] = {}
+        lane_host_limiters: dict[str, PerHostLimiter] = {}
+        if self.enable_h2_lane:
+            # 收到服务器的 SETTINGS 之前先按保守的流数起步
+            initial = min(h2_lane_connections * h2_lane_initial_streams, h2_lane_max_streams)
+            lane_limits[H2_LANE] = initial
+            lane_host_limiters[H2_LANE] = PerHostLimiter(
+                HostPolicy(max_connections=initial)
+            )
+
         self._scheduler = FileScheduler(
             max_concurrent_files=max_concurrent_files,
             max_concurrent_chunks_per_file=2,
             small_file_threshold=small_file_threshold,
+            host_limiter=PerHostLimiter(
+                HostPolicy(max_connections=max_connections_per_host)
+            ),
+            circuit_breaker=self._circuit_breaker,
+            lane_limits=lane_limits,
+            lane_host_limiters=lane_host_limiters,
+            retain_finished=retain_finished_tasks,
         )
 
     def _is_priority_file(self, url: str) -> bool:
@@ -1788,10 +2505,22 @@ class MCBatchDownloader(EnhancedBatchDownloader):
         filename: str | None = None,
         priority: int = 0,
         backup_urls: list[str] | None = None,
+        size: int | None = None,
+        expected_hash: str | None = None,
+        hash_algorithm: str = "sha1",
     ) -> str:
         if self._is_priority_file(url):
             priority = max(priority, 10)
-        return await super().add_url(url, save_path, filename, priority, backup_urls)
+        return await super().add_url(
+            url,
+            save_path,
+            filename,
+            priority,
+            backup_urls,
+            size=size,
+            expected_hash=expected_hash,
+            hash_algorithm=hash_algorithm,
+        )
 
     async def add_urls(
         self,
@@ -1820,19 +2549,7 @@ class MCBatchDownloader(EnhancedBatchDownloader):
 
     async def _probe_single(self, task: FileTask) -> None:
         if task.file_size > 0 and task.file_size < self.skip_probe_threshold:
-            task.supports_range = False
-            task.chunks = 1
-            task.status = FileTaskStatus.PENDING
-            if (
-                self.enable_existing_file_reuse
-                and self._file_reuse_checker
-                and task.file_size > 0
-            ):
-                target_path = task.save_path / (task.filename or "unknown")
-                existing = await self._check_existing_file(target_path, task.file_size)
-                if existing:
-                    task.existing_file_path = existing
-                    task.is_existing_reused = True
+            await self._skip_probe(task)
             return
 
         await super()._probe_single(task)
@@ -1846,6 +2563,57 @@ class MCBatchDownloader(EnhancedBatchDownloader):
         base_chunks = self._scheduler.get_optimal_chunks_for_task(task)
         return min(base_chunks, 2)
 
+    def _lanes(self) -> list[str]:
+        # 通道撤销后仍可能有重试的任务排回 HTTP/2 通道
+        if self.enable_h2_lane or self._scheduler.lane_pending_count(H2_LANE):
+            return [H2_LANE, DEFAULT_LANE]
+        return [DEFAULT_LANE]
+
+    def _classify_lane(self, task: FileTask) -> str:
+        if (
+            self.enable_h2_lane
+            and task.url.startswith("https://")
+            and self._is_small_object(task)
+        ):
+            return H2_LANE
+        return DEFAULT_LANE
+
+    async def _open_lanes(self) -> None:
+        if not self.enable_h2_lane or self._h2_pool is not None:
+            return
+        self._h2_pool = ConnectionPool(
+            self.config, max_connections=self.h2_lane_connections, http2=True
+        )
+        await self._h2_pool.initialize()
+
+    async def _close_lanes(self) -> None:
+        if self._h2_pool:
+            await self._h2_pool.close()
+            self._h2_pool = None
+
+    def _client_for(self, task: FileTask) -> Any:
+        if task.lane == H2_LANE and self._h2_pool and self._h2_pool.client:
+            return self._h2_pool.client
+        return super()._client_for(task)
+
+    async def _observe_response(self, task: FileTask, response: Any) -> None:
+        """首批响应确定 HTTP/2 通道的并发流数；服务器不支持 HTTP/2 时撤销通道"""
+        if task.lane != H2_LANE or self._h2_lane_settled or not self._h2_pool:
+            return
+        if getattr(response, "http_version", "") != "HTTP/2":
+            # 两条 HTTP/1.1 连接承载不了这么多并发，剩余任务回到默认通道
+            self._h2_lane_settled = True
+            self.enable_h2_lane = False
+            await self._scheduler.reassign_lane(H2_LANE, DEFAULT_LANE)
+            return
+        streams = self._h2_pool.get_h2_stream_limit()
+        if streams:
+            self._h2_lane_settled = True
+            self._scheduler.set_lane_limit(
+                H2_LANE,
+                min(streams * self.h2_lane_connections, self.h2_lane_max_streams),
+            )
+
     async def _download_loop(self) -> None:
         download_tasks: dict[str, asyncio.Task[None]] = {}
         last_progress_time = 0.0
@@ -1857,6 +2625,7 @@ class MCBatchDownloader(EnhancedBatchDownloader):
                 if not task.is_failed:
                     await task.mark_failed(str(e))
                     await self._scheduler.task_failed(task)
+                    await self._notify_file_complete(task)
                     await self._emit_progress()
 
         while self._running:
@@ -1870,22 +2639,28 @@ class MCBatchDownloader(EnhancedBatchDownloader):
                 if self._cancelled:
                     break
 
-            while len(download_tasks) < self.max_concurrent_files:
-                task = await self._scheduler.get_next_task()
-                if task is None:
-                    break
+            # 每个通道各自受调度器的并发上限约束
+            for lane in self._lanes():
+                while True:
+                    task = await self._scheduler.get_next_task(lane)
+                    if task is None:
+                        break
 
-                if task.is_existing_reused and task.existing_file_path:
-                    await self._reuse_existing_file(task)
-                    continue
+                    if task.is_existing_reused and task.existing_file_path:
+                        await self._reuse_existing_file(task)
+                        self._release_finished(task.task_id)
+                        continue
 
-                download_tasks[task.task_id] = asyncio.create_task(download_file(task))
+                    download_tasks[task.task_id] = asyncio.create_task(
+                        download_file(task)
+                    )
 
             done_tasks = [tid for tid, t in download_tasks.items() if t.done()]
             for tid in done_tasks:
                 task = download_tasks.pop(tid)
                 with contextlib.suppress(asyncio.CancelledError):
                     await task
+                self._release_finished(tid)
 
             now = time.time()
             if (
@@ -1908,6 +2683,7 @@ class MCBatchDownloader(EnhancedBatchDownloader):
                 not download_tasks
                 and self._scheduler.pending_count == 0
                 and self._scheduler.active_count == 0
+                and self._input_drained
             ):
                 break
 
@@ -0,0 +1,210 @@
+"""
+按主机的熔断器与批次级重试预算
+
+熔断器状态：
+- CLOSED：正常放行，连续失败达到阈值后跳闸
+- OPEN：冷却期内不再向该主机派发任务，多源任务直接换源
+- HALF_OPEN：冷却期结束后只放行一个探测请求，成功则恢复，失败则以更长冷却期重新跳闸
+
+连续跳闸多次仍未恢复的主机视为宕机：冷却期内只有该主机可用的任务会立即失败，而不是
+无限等待；冷却期结束后照常放行一个探测请求，探测成功即恢复。
+
+重试预算限制整个批次的重试总量：允许的重试数 = 基础额度 + 请求数 × 比例，
+避免镜像大面积故障时每个文件各自重试把请求量放大数倍。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+import httpx
+
+from .exceptions import HTTPError, NetworkError
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass(slots=True)
+class HostCircuit:
+    state: CircuitState = CircuitState.CLOSED
+    failures: int = 0
+    open_until: float = 0.0
+    reset_timeout: float = 0.0
+    consecutive_trips: int = 0
+    probe_in_flight: bool = False
+    total_trips: int = 0
+    total_failures: int = 0
+    rejected: int = 0
+
+
+def is_host_failure(error: BaseException) -> bool:
+    """判断错误是否说明主机本身不健康（而不是单个文件的问题）"""
+    if isinstance(error, HTTPError):
+        return error.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError, NetworkError))
+
+
+class CircuitBreaker:
+    """按主机维护熔断状态"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        max_reset_timeout: float = 120.0,
+        give_up_after_trips: int = 3,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.give_up_after_trips = give_up_after_trips
+        self._circuits: dict[str, HostCircuit] = {}
+
+    def _circuit(self, host: str) -> HostCircuit:
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = HostCircuit(reset_timeout=self.base_reset_timeout)
+            self._circuits[host] = circuit
+        return circuit
+
+    def state(self, host: str) -> CircuitState:
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            return CircuitState.CLOSED
+        if circuit.state == CircuitState.OPEN and time.monotonic() >= circuit.open_until:
+            circuit.state = CircuitState.HALF_OPEN
+            circuit.probe_in_flight = False
+        return circuit.state
+
+    def is_available(self, host: str) -> bool:
+        """判断该主机现在能否接收请求（不占用半开状态的探测名额）"""
+        state = self.state(host)
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN:
+            return not self._circuits[host].probe_in_flight
+        return False
+
+    def is_down(self, host: str) -> bool:
+        """连续跳闸多次仍未恢复且仍在冷却期内，视为宕机
+
+        冷却期结束（半开）后不算宕机，由 allow_request 放行一个探测请求决定是否恢复。
+        """
+        circuit = self._circuits.get(host)
+        return (
+            circuit is not None
+            and circuit.consecutive_trips >= self.give_up_after_trips
+            and self.state(host) == CircuitState.OPEN
+        )
+
+    def allow_request(self, host: str) -> bool:
+        """派发请求前调用；半开状态下只放行一个探测请求"""
+        state = self.state(host)
+        if state == CircuitState.CLOSED:
+            return True
+        circuit = self._circuits[host]
+        if state == CircuitState.HALF_OPEN and not circuit.probe_in_flight:
+            circuit.probe_in_flight = True
+            return True
+        circuit.rejected += 1
+        return False
+
+    def record_success(self, host: str) -> None:
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            return
+        circuit.state = CircuitState.CLOSED
+        circuit.failures = 0
+        circuit.consecutive_trips = 0
+        circuit.probe_in_flight = False
+        circuit.reset_timeout = self.base_reset_timeout
+
+    def record_failure(self, host: str) -> None:
+        circuit = self._circuit(host)
+        circuit.total_failures += 1
+        state = self.state(host)
+
+        if state == CircuitState.HALF_OPEN:
+            circuit.reset_timeout = min(circuit.reset_timeout * 2, self.max_reset_timeout)
+            self._trip(circuit)
+        elif state == CircuitState.CLOSED:
+            circuit.failures += 1
+            if circuit.failures >= self.failure_threshold:
+                self._trip(circuit)
+
+    def _trip(self, circuit: HostCircuit) -> None:
+        circuit.state = CircuitState.OPEN
+        circuit.open_until = time.monotonic() + circuit.reset_timeout
+        circuit.failures = 0
+        circuit.probe_in_flight = False
+        circuit.consecutive_trips += 1
+        circuit.total_trips += 1
+
+    def record_error(self, host: str, error: BaseException) -> None:
+        if is_host_failure(error):
+            self.record_failure(host)
+        elif isinstance(error, HTTPError):
+            # 主机正常应答（如 404），只是文件本身有问题
+            self.record_success(host)
+        else:
+            self.release_probe(host)
+
+    def release_probe(self, host: str) -> None:
+        """探测请求因与主机无关的原因结束时归还探测名额"""
+        circuit = self._circuits.get(host)
+        if circuit is not None:
+            circuit.probe_in_flight = False
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        now = time.monotonic()
+        return {
+            host: {
+                "state": self.state(host).value,
+                "failures": circuit.total_failures,
+                "trips": circuit.total_trips,
+                "rejected": circuit.rejected,
+                "open_remaining": max(0.0, circuit.open_until - now)
+                if circuit.state == CircuitState.OPEN
+                else 0.0,
+            }
+            for host, circuit in self._circuits.items()
+        }
+
+
+class RetryBudget:
+    """批次级重试预算"""
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10) -> None:
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._requests = 0
+        self._retries = 0
+        self._denied = 0
+
+    def record_request(self) -> None:
+        self._requests += 1
+
+    @property
+    def available(self) -> int:
+        return max(0, int(self.min_retries + self._requests * self.ratio) - self._retries)
+
+    def try_spend(self) -> bool:
+        if self.available <= 0:
+            self._denied += 1
+            return False
+        self._retries += 1
+        return True
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "requests": self._requests,
+            "retries": self._retries,
+            "denied": self._denied,
+            "available": self.available,
+        }
@@ -224,6 +224,32 @@ class ChunkManager:
             current_pos = chunk_end
         self._chunk_counter = optimal_chunks
 
+    def restore_chunks(self, chunk_data: list[dict[str, Any]]) -> bool:
+        """按断点记录恢复上次的分片布局；记录不能完整覆盖文件时返回 False"""
+        restored = sorted((Chunk.from_dict(data) for data in chunk_data), key=lambda c: c.start_byte)
+        position = 0
+        for chunk in restored:
+            if chunk.start_byte != position or chunk.end_byte < chunk.start_byte:
+                return False
+            position = chunk.end_byte
+        if not restored or position != self.file_size:
+            return False
+
+        self.chunks.clear()
+        self._chunk_index_map.clear()
+        for i, chunk in enumerate(restored):
+            # 按位置重新编号，complete_chunk/fail_chunk 以位置寻址
+            chunk.index = i
+            chunk.downloaded = max(0, min(chunk.downloaded, chunk.size))
+            if chunk.downloaded >= chunk.size:
+                chunk.complete()
+            else:
+                chunk.reset()
+            self.chunks.append(chunk)
+            self._chunk_index_map[i] = i
+        self._chunk_counter = len(restored)
+        return True
+
     def _calculate_optimal_chunks(self) -> int:
         if self.file_size <= 0:
             return 1
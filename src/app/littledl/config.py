@@ -216,6 +216,8 @@ class DownloadConfig:
     cookie_file: str | None = None
     referer: str | None = None
     accept_ranges_fallback: bool = True
+    enable_multi_source: bool = True
+    multi_source_min_size: int = 8 * 1024 * 1024
     temp_dir: str | None = None
     preserve_temp_on_failure: bool = False
     create_parent_dirs: bool = True
@@ -2,19 +2,46 @@ import asyncio
 import ssl
 from typing import Any
 
+import httpcore
 import httpx
 
 from .config import DownloadConfig
 from .proxy import ProxyManager
 
+# get_h2_stream_limit 读取的 httpcore 内部结构只在这个主版本上验证过
+HTTPCORE_INTERNALS_VERSION = "1."
+
+
+def h2_available() -> bool:
+    """httpx 的 HTTP/2 支持依赖可选的 h2 包"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
 
 class ConnectionPool:
-    def __init__(self, config: DownloadConfig, proxy_manager: ProxyManager | None = None) -> None:
+    def __init__(
+        self,
+        config: DownloadConfig,
+        proxy_manager: ProxyManager | None = None,
+        max_connections: int | None = None,
+        http2: bool | None = None,
+    ) -> None:
+        """
+        Args:
+            max_connections: 指定时严格限制连接数（不再按 HTTP/2 放大），
+                用于少量连接承载大量多路复用流的场景
+            http2: 覆盖 config.enable_h2
+        """
         self.config = config
         self.proxy_manager = proxy_manager
         self._client: httpx.AsyncClient | None = None
         self._connection_count: int = 0
-        self._max_connections: int = config.connection_pool_size or config.max_chunks * 2
+        self._fixed_connections = max_connections is not None
+        self._max_connections: int = max_connections or config.connection_pool_size or config.max_chunks * 2
+        self._http2 = config.enable_h2 if http2 is None else http2
 
     @property
     def client(self) -> httpx.AsyncClient | None:
@@ -28,15 +55,18 @@ class ConnectionPool:
         if self._client:
             return self._client
 
+        # 未安装 h2 时回退到 HTTP/1.1，而不是让 httpx 在创建传输层时报错
+        http2_enabled = self._http2 and h2_available()
+
         # 优化连接池配置：HTTP/2 场景下允许更高的并发流数
         max_conn = self._max_connections
-        if self.config.enable_h2:
+        if http2_enabled and not self._fixed_connections:
             # HTTP/2 可以多路复用，允许更多并发连接
             max_conn = max(max_conn, 100)
 
         limits = httpx.Limits(
             max_keepalive_connections=max_conn,
-            max_connections=max_conn * 2 if self.config.enable_h2 else max_conn,
+            max_connections=max_conn * 2 if http2_enabled and not self._fixed_connections else max_conn,
             keepalive_expiry=max(60.0, self.config.keepalive_expiry),  # 至少保持60秒
         )
 
@@ -59,8 +89,6 @@ class ConnectionPool:
         elif self.config.proxy:
             proxy = self.config.get_proxy(url or "")
 
-        http2_enabled = self.config.enable_h2
-
         # 配置传输层：添加连接池重试和 HTTP/2 支持
         transport = httpx.AsyncHTTPTransport(
             retries=2,  # 连接层重试，提高稳定性
@@ -123,6 +151,29 @@ class ConnectionPool:
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
 
+    def get_h2_stream_limit(self) -> int | None:
+        """已建立的 HTTP/2 连接上服务器通告的 SETTINGS_MAX_CONCURRENT_STREAMS
+
+        httpx 没有公开这个值，这里读取 httpcore 的内部结构；httpcore 不是已验证的
+        主版本、结构变化或还没有 HTTP/2 连接时返回 None，调用方保持起步的流数。
+        """
+        if not httpcore.__version__.startswith(HTTPCORE_INTERNALS_VERSION):
+            return None
+        try:
+            transport = getattr(self._client, "_transport", None)
+            pool = getattr(transport, "_pool", None)
+            limits: list[int] = []
+            for connection in list(getattr(pool, "connections", None) or []):
+                inner = getattr(connection, "_connection", None)
+                state = getattr(inner, "_h2_state", None)
+                settings = getattr(state, "remote_settings", None)
+                value = getattr(settings, "max_concurrent_streams", None)
+                if isinstance(value, int) and value > 0:
+                    limits.append(value)
+            return min(limits) if limits else None
+        except Exception:
+            return None
+
     async def close(self) -> None:
         if self._client:
             await self._client.aclose()
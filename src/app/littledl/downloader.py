@@ -8,20 +8,36 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import aiofiles
 import httpx
 from loguru import logger
 
 from .chunk import Chunk, ChunkManager
 from .config import DownloadConfig
 from .connection import ConnectionPool, RequestBuilder
-from .exceptions import CancelledError, ConfigurationError, DownloadError, HTTPError, ResourceNotFoundError
+from .detector import ServerCapabilities, ServerDetector
+from .exceptions import (
+    CancelledError,
+    ConfigurationError,
+    DownloadError,
+    HTTPError,
+    NetworkError,
+    ResourceNotFoundError,
+)
+from .hosts import THROTTLE_STATUS_CODES
 from .limiter import SpeedLimiter
 from .monitor import DownloadMonitor
 from .resume import ResumeManager
+from .reuse import MultiSourceManager
 from .scheduler import SmartScheduler
-from .utils import generate_download_id, normalize_url, resolve_download_path, safe_filename, validate_url
-from .writer import BufferedFileWriter
+from .utils import (
+    generate_download_id,
+    normalize_url,
+    parse_retry_after,
+    resolve_download_path,
+    safe_filename,
+    validate_url,
+)
+from .writer import BufferedFileWriter, open_with_dir_retry
 
 
 @dataclass(frozen=True)
@@ -197,6 +213,10 @@ class ChunkCallbackAdapter:
             await result
 
 
+# 归咎于下载源的错误：只有这些错误会把源标记为失败并换源重试
+_SOURCE_ERRORS = (httpx.HTTPError, HTTPError, NetworkError)
+
+
 class H2MultiPlexDownloader:
     def __init__(
         self,
@@ -240,7 +260,7 @@ class H2MultiPlexDownloader:
         progress_callback: Callable[[int, int, float, int], None] | None = None,
     ) -> None:
         headers = self.config.get_headers()
-        headers["Range"] = f"bytes={chunk.start_byte}-{chunk.end_byte - 1}"
+        headers["Range"] = f"bytes={chunk.current_download_start}-{chunk.end_byte - 1}"
 
         timeout = httpx.Timeout(
             connect=self.config.connect_timeout,
@@ -267,7 +287,15 @@ class H2MultiPlexDownloader:
                     return
 
                 if response.status_code not in (200, 206):
-                    raise HTTPError(f"HTTP {response.status_code}", response.status_code, url)
+                    raise HTTPError(
+                        f"HTTP {response.status_code}",
+                        response.status_code,
+                        url,
+                        parse_retry_after(response.headers.get("Retry-After")),
+                    )
+                if response.status_code == 200 and chunk.current_download_start > 0:
+                    # 服务器忽略了 Range，整段写入会覆盖错误的偏移
+                    raise HTTPError("Server ignored Range request", response.status_code, url)
 
                 async for data in response.aiter_bytes(chunk_size=self.config.buffer_size):
                     if not data:
@@ -357,8 +385,13 @@ class Downloader:
         self._cancelled = False
         self._lock = asyncio.Lock()
         self._h2_downloader: H2MultiPlexDownloader | None = None
+        self._shared_pool: ConnectionPool | None = None
+        # 分片失败时的 HTTP 错误（限流状态码优先），文件未完成时随错误抛给批量下载器
+        self._chunk_http_error: HTTPError | None = None
 
     def set_connection_pool(self, pool: ConnectionPool) -> None:
+        """使用外部共享的连接池；下载结束时不会关闭它"""
+        self._shared_pool = pool
         self._connection_pool = pool
 
     async def download(
@@ -369,6 +402,7 @@ class Downloader:
         resume: bool | None = None,
         progress_callback: Callable[..., Any] | None = None,
         chunk_callback: Callable[..., Any] | None = None,
+        backup_urls: list[str] | None = None,
     ) -> Path:
         url = normalize_url(url)
         if not validate_url(url):
@@ -380,11 +414,12 @@ class Downloader:
 
         self._running = True
         self._cancelled = False
+        self._chunk_http_error = None
         callback_adapter = ProgressCallbackAdapter(progress_callback or self.config.progress_callback)
         chunk_callback_adapter = ChunkCallbackAdapter(chunk_callback or self.config.chunk_callback)
 
         try:
-            self._connection_pool = ConnectionPool(self.config)
+            self._connection_pool = self._shared_pool or ConnectionPool(self.config)
             client = await self._connection_pool.initialize()
 
             file_info = await self._probe_file_info(client, url)
@@ -409,7 +444,8 @@ class Downloader:
 
             self._resume_manager = ResumeManager(temp_dir, download_id)
 
-            if resume:
+            # 分片数据直接写入目标文件，目标文件不在时旧的分片进度不可信
+            if resume and final_path.exists():
                 try:
                     metadata = await self._resume_manager.load()
                     if metadata and self._resume_manager.can_resume():
@@ -436,10 +472,17 @@ class Downloader:
                     url=url,
                     output_path=final_path,
                     progress_callback=callback_adapter,
+                    resume_offset=resume and supports_range,
                 )
                 await self._verify_downloaded_file(output)
                 return output
 
+            source_manager = None
+            if backup_urls and self.config.enable_multi_source and file_size >= self.config.multi_source_min_size:
+                source_manager = await self._prepare_range_sources(
+                    client, url, backup_urls, file_size, file_info.get("etag")
+                )
+
             try:
                 output = await self._download_chunked_direct(
                     client=client,
@@ -448,9 +491,12 @@ class Downloader:
                     file_size=file_size,
                     progress_callback=callback_adapter,
                     chunk_callback=chunk_callback_adapter,
+                    source_manager=source_manager,
                 )
-            except DownloadError:
-                if not self.config.fallback_to_single_on_failure:
+            except DownloadError as e:
+                # 被限流时不立即改用单流再请求同一主机，交给上层按冷却期重试
+                throttled = isinstance(e, HTTPError) and e.status_code in THROTTLE_STATUS_CODES
+                if throttled or not self.config.fallback_to_single_on_failure:
                     raise
                 logger.warning("Chunked download failed, falling back to single-stream mode")
                 output = await self._download_single_stream(
@@ -487,13 +533,19 @@ class Downloader:
             if status_code == 404:
                 raise ResourceNotFoundError(url) from None
             if status_code is not None:
-                raise HTTPError(f"HTTP {status_code}", status_code, url) from None
+                retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                raise HTTPError(f"HTTP {status_code}", status_code, url, retry_after) from None
             raise
 
         if response.status_code == 404:
             raise ResourceNotFoundError(url)
         if response.status_code >= 400:
-            raise HTTPError(f"HTTP {response.status_code}", response.status_code, url)
+            raise HTTPError(
+                f"HTTP {response.status_code}",
+                response.status_code,
+                url,
+                parse_retry_after(response.headers.get("Retry-After")),
+            )
 
         headers = response.headers
         accept_ranges = headers.get("Accept-Ranges", "").lower()
@@ -529,6 +581,60 @@ class Downloader:
             "last_modified": last_modified,
         }
 
+    async def _prepare_range_sources(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        backup_urls: list[str],
+        file_size: int,
+        etag: str | None,
+    ) -> MultiSourceManager | None:
+        """探测备用源，只保留支持 Range 且与主源内容一致的源；没有可用备用源时返回 None"""
+        candidates: list[str] = []
+        for backup in backup_urls:
+            backup = normalize_url(backup)
+            if backup != url and backup not in candidates and validate_url(backup):
+                candidates.append(backup)
+        if not candidates:
+            return None
+
+        detector = ServerDetector(self.config, client)
+        results = await asyncio.gather(
+            *(detector.detect_capabilities(candidate) for candidate in candidates),
+            return_exceptions=True,
+        )
+
+        manager = MultiSourceManager()
+        manager.add_source(url, priority=len(candidates) + 1)
+        accepted = 0
+        for rank, (candidate, capabilities) in enumerate(zip(candidates, results)):
+            if isinstance(capabilities, BaseException):
+                logger.debug(f"Mirror probe failed for {candidate}: {capabilities}")
+                continue
+            reason = self._mirror_mismatch(capabilities, file_size, etag)
+            if reason:
+                logger.debug(f"Skipping mirror {candidate}: {reason}")
+                continue
+            manager.add_source(candidate, priority=len(candidates) - rank)
+            accepted += 1
+
+        if not accepted:
+            return None
+        logger.debug(f"Multi-source download with {accepted + 1} sources: {url}")
+        return manager
+
+    def _mirror_mismatch(self, capabilities: ServerCapabilities, file_size: int, etag: str | None) -> str | None:
+        """备用源与主源不一致的原因；一致时返回 None"""
+        if not capabilities.supports_range_requests:
+            return "no range support"
+        if capabilities.content_length != file_size:
+            return f"size {capabilities.content_length} != {file_size}"
+        # 配置了期望哈希时由最终校验兜底；否则要求两端 ETag 一致（任一端没有 ETag 时只比较大小）
+        if not self.config.expected_hash and etag and capabilities.etag:
+            if capabilities.etag.removeprefix("W/") != etag.removeprefix("W/"):
+                return "ETag mismatch"
+        return None
+
     async def _test_range_support(self, client: httpx.AsyncClient, url: str) -> bool:
         headers = self.config.get_headers()
         headers["Range"] = "bytes=0-0"
@@ -549,23 +655,47 @@ class Downloader:
         url: str,
         output_path: Path,
         progress_callback: ProgressCallbackAdapter | None,
+        resume_offset: bool = False,
     ) -> Path:
-        output_path.parent.mkdir(parents=True, exist_ok=True)
         temp_path = output_path.with_suffix(output_path.suffix + ".tmp")
 
+        offset = 0
+        if resume_offset:
+            with contextlib.suppress(OSError):
+                offset = temp_path.stat().st_size
+
+        headers = self.config.get_headers()
+        if offset > 0:
+            headers["Range"] = f"bytes={offset}-"
+
         downloaded = 0
         start_time = time.time()
 
-        async with client.stream("GET", url, follow_redirects=True) as response:
+        async with client.stream("GET", url, headers=headers, follow_redirects=True) as response:
             if response.status_code == 404:
                 raise ResourceNotFoundError(url)
             if response.status_code >= 400:
-                raise HTTPError(f"HTTP {response.status_code}", response.status_code, url)
+                raise HTTPError(
+                    f"HTTP {response.status_code}",
+                    response.status_code,
+                    url,
+                    parse_retry_after(response.headers.get("Retry-After")),
+                )
 
             content_length = response.headers.get("Content-Length")
             total_size = int(content_length) if content_length else -1
 
-            async with aiofiles.open(temp_path, "wb") as f:
+            # 206 从临时文件末尾续写；服务器忽略 Range 返回 200 时从头重写
+            mode = "wb"
+            if offset > 0 and response.status_code == 206:
+                mode = "ab"
+                downloaded = offset
+                if total_size > 0:
+                    total_size += offset
+            start_offset = downloaded
+
+            f = await open_with_dir_retry(temp_path, mode)
+            try:
                 async for chunk_data in response.aiter_bytes(chunk_size=self.config.buffer_size):
                     if self._cancelled:
                         raise CancelledError("Download cancelled", url)
@@ -577,12 +707,14 @@ class Downloader:
 
                     if progress_callback:
                         elapsed = time.time() - start_time
-                        speed = downloaded / elapsed if elapsed > 0 else 0
+                        speed = (downloaded - start_offset) / elapsed if elapsed > 0 else 0
                         if total_size > 0:
                             eta = (total_size - downloaded) / speed if speed > 0 else -1
                             await progress_callback.emit(downloaded, total_size, speed, int(eta), unknown_size=False)
                         else:
                             await progress_callback.emit(downloaded, -1, speed, -1, unknown_size=True)
+            finally:
+                await f.close()
 
         with contextlib.suppress(Exception):
             temp_path.rename(output_path)
@@ -597,15 +729,26 @@ class Downloader:
         file_size: int,
         progress_callback: ProgressCallbackAdapter | None,
         chunk_callback: ChunkCallbackAdapter | None,
+        source_manager: MultiSourceManager | None = None,
     ) -> Path:
+        metadata = self._resume_manager.metadata if self._resume_manager else None
+        existing_chunks = metadata.chunks if metadata else []
+
+        max_chunks = self.config.max_chunks
+        if source_manager and not existing_chunks:
+            # 多源时切得更细，测得更快的源可以领到更多区间
+            max_chunks = max(max_chunks, source_manager.get_stats()["available_sources"] * 4)
+
         self._chunk_manager = ChunkManager(
             file_size=file_size,
-            max_chunks=self.config.max_chunks,
+            max_chunks=max_chunks,
             min_chunk_size=self.config.min_chunk_size,
         )
-
-        existing_progress = self._resume_manager.get_progress_dict() if self._resume_manager else {}
-        self._chunk_manager.initialize_chunks(existing_progress)
+        # 续传时按记录的字节区间恢复分片，否则已下载的偏移会错位
+        if not (existing_chunks and self._chunk_manager.restore_chunks(existing_chunks)):
+            self._chunk_manager.initialize_chunks()
+        if self._resume_manager:
+            await self._resume_manager.adopt_layout(self._chunk_manager)
 
         self._monitor = DownloadMonitor(
             total_size=file_size,
@@ -651,13 +794,17 @@ class Downloader:
                     self._monitor.set_active_workers(self._scheduler.get_stats().active_workers)
 
                 try:
-                    await self._h2_downloader.download_chunk(
-                        chunk=chunk,
-                        url=url,
-                        progress_callback=None,
-                    )
+                    if source_manager:
+                        await self._download_chunk_multi_source(chunk, url, source_manager)
+                    else:
+                        await self._h2_downloader.download_chunk(
+                            chunk=chunk,
+                            url=url,
+                            progress_callback=None,
+                        )
                     return chunk.index, True, None
                 except Exception as e:
+                    self._note_chunk_error(e)
                     return chunk.index, False, str(e)
                 finally:
                     if self._scheduler:
@@ -732,9 +879,18 @@ class Downloader:
         if not self._chunk_manager.is_completed:
             # 如果有失败的分片，尝试重试一次
             if self._chunk_manager.failed_chunks and self.config.retry:
-                await self._retry_failed_chunks(url, progress_callback)
+                await self._retry_failed_chunks(url, progress_callback, source_manager)
 
             if not self._chunk_manager.is_completed:
+                error = self._chunk_http_error
+                if error is not None:
+                    # 保留分片的状态码和出错的源，批量下载器据此向该主机的限速器反馈
+                    raise HTTPError(
+                        f"Download incomplete: HTTP {error.status_code}",
+                        error.status_code,
+                        error.url or url,
+                        error.retry_after,
+                    )
                 raise DownloadError("Download incomplete")
 
         if self._resume_manager:
@@ -747,6 +903,7 @@ class Downloader:
         self,
         url: str,
         progress_callback: ProgressCallbackAdapter | None,
+        source_manager: MultiSourceManager | None = None,
     ) -> None:
         """重试失败的分片"""
         if not self._chunk_manager or not self._h2_downloader:
@@ -757,14 +914,72 @@ class Downloader:
             if chunk.error_count < self.config.retry.max_retries:
                 chunk.reset()
                 try:
-                    await self._h2_downloader.download_chunk(
-                        chunk=chunk,
-                        url=url,
-                        progress_callback=None,
-                    )
+                    if source_manager:
+                        await self._download_chunk_multi_source(chunk, url, source_manager)
+                    else:
+                        await self._h2_downloader.download_chunk(
+                            chunk=chunk,
+                            url=url,
+                            progress_callback=None,
+                        )
                     await self._chunk_manager.complete_chunk(chunk.index)
-                except Exception:
-                    pass
+                except Exception as e:
+                    self._note_chunk_error(e)
+
+    def _note_chunk_error(self, error: BaseException) -> None:
+        """记下分片的 HTTP 错误；429/503 一旦出现就不再被其他状态码覆盖"""
+        if not isinstance(error, HTTPError):
+            return
+        current = self._chunk_http_error
+        if current is None or current.status_code not in THROTTLE_STATUS_CODES:
+            self._chunk_http_error = error
+
+    async def _download_chunk_multi_source(
+        self,
+        chunk: Chunk,
+        url: str,
+        source_manager: MultiSourceManager,
+    ) -> None:
+        """
+        在多个源之间下载一个分片
+
+        每个区间按实测吞吐量挑选源；某个源因网络或 HTTP 错误失败时，剩余字节立即切到
+        下一个尚未试过的可用源继续，每个源只试一次，都试过后抛出最后的错误。
+        一开始就没有可用源时只用主源试一次。本地写盘等与源无关的错误直接抛出，不标记源失败。
+        """
+        if not self._h2_downloader:
+            raise DownloadError("Downloader not initialized", url)
+
+        tried: set[str] = set()
+        while True:
+            source = source_manager.pick_range_source(exclude=tried)
+            source_url = source["url"] if source else url
+            tried.add(source_url)
+
+            before = chunk.downloaded
+            started = time.monotonic()
+            source_manager.begin_range(source_url)
+            try:
+                await self._h2_downloader.download_chunk(chunk=chunk, url=source_url, progress_callback=None)
+            except CancelledError:
+                raise
+            except Exception as e:
+                source_manager.record_transfer(source_url, chunk.downloaded - before, time.monotonic() - started)
+                if not isinstance(e, _SOURCE_ERRORS):
+                    raise
+                source_manager.mark_source_failed(source_url, str(e))
+                fallback = source_manager.pick_range_source(exclude=tried)
+                if self._cancelled or fallback is None:
+                    raise
+                logger.debug(f"Chunk {chunk.index} failed on {source_url}, switching to {fallback['url']}: {e}")
+                chunk.reset()
+                continue
+            finally:
+                source_manager.end_range(source_url)
+
+            source_manager.record_transfer(source_url, chunk.downloaded - before, time.monotonic() - started)
+            source_manager.mark_source_success(source_url)
+            return
 
     def _validate_file_size_constraints(self, file_size: int) -> None:
         if file_size <= 0:
@@ -830,7 +1045,7 @@ class Downloader:
     async def _cleanup(self) -> None:
         if self._scheduler:
             await self._scheduler.stop()
-        if self._connection_pool:
+        if self._connection_pool and self._connection_pool is not self._shared_pool:
             await self._connection_pool.close()
         self._running = False
 
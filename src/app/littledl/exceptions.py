@@ -19,9 +19,18 @@ class TimeoutError(NetworkError):
 
 
 class HTTPError(DownloadError):
-    def __init__(self, message: str, status_code: int, url: str | None = None) -> None:
+    def __init__(
+        self, message: str, status_code: int, url: str | None = None, retry_after: float | None = None
+    ) -> None:
         super().__init__(message, url)
         self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(DownloadError):
+    def __init__(self, host: str, url: str | None = None) -> None:
+        super().__init__(f"Circuit open for host: {host}", url)
+        self.host = host
 
 
 class ResourceNotFoundError(HTTPError):
@@ -0,0 +1,197 @@
+"""
+按主机的并发与请求节奏控制
+
+批量下载时同一镜像可能承接上千个小文件请求。这里为每个主机维护：
+1. 并发连接上限（AIMD：成功时缓慢增加，429/503 时减半）
+2. 令牌桶请求节奏（默认不限速，被限流后按当时的实际速率减半起步）
+3. Retry-After 冷却期（冷却期内不再向该主机派发任务）
+
+所有方法都是同步的，由 FileScheduler 在自己的锁内调用。
+"""
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+@dataclass
+class HostPolicy:
+    max_connections: int = 8
+    min_connections: int = 1
+    request_rate: float = 0.0
+    min_request_rate: float = 1.0
+    default_cooldown: float = 1.0
+    max_cooldown: float = 60.0
+
+
+@dataclass(slots=True)
+class HostState:
+    host: str
+    connection_limit: int
+    request_rate: float
+    tokens: float = 0.0
+    last_refill: float = field(default_factory=time.monotonic)
+    active: int = 0
+    blocked_until: float = 0.0
+    consecutive_throttles: int = 0
+    successes_since_change: int = 0
+    window_start: float = field(default_factory=time.monotonic)
+    window_count: int = 0
+    observed_rate: float = 0.0
+    rate_ceiling: float = 0.0
+    requests: int = 0
+    successes: int = 0
+    throttled: int = 0
+
+
+class PerHostLimiter:
+    """按主机限制并发与请求节奏，并根据 429/503/Retry-After 自适应调整"""
+
+    def __init__(
+        self, policy: HostPolicy | None = None, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.policy = policy or HostPolicy()
+        self._clock = clock
+        self._hosts: dict[str, HostState] = {}
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            now = self._clock()
+            state = HostState(
+                host=host,
+                connection_limit=self.policy.max_connections,
+                request_rate=self.policy.request_rate,
+                tokens=max(1.0, self.policy.request_rate),
+                last_refill=now,
+                window_start=now,
+            )
+            self._hosts[host] = state
+        return state
+
+    def _refill(self, state: HostState, now: float) -> None:
+        if state.request_rate <= 0:
+            return
+        burst = max(1.0, state.request_rate)
+        state.tokens = min(burst, state.tokens + (now - state.last_refill) * state.request_rate)
+        state.last_refill = now
+
+    def can_dispatch(self, host: str, now: float | None = None) -> bool:
+        """该主机当前是否可以再发起一个请求"""
+        state = self._state(host)
+        now = self._clock() if now is None else now
+        if now < state.blocked_until:
+            return False
+        if state.active >= state.connection_limit:
+            return False
+        if state.request_rate > 0:
+            self._refill(state, now)
+            return state.tokens >= 1.0
+        return True
+
+    def set_max_connections(self, max_connections: int) -> None:
+        """调整并发上限；未被限流过的主机直接采用新上限"""
+        previous = self.policy.max_connections
+        self.policy.max_connections = max(self.policy.min_connections, max_connections)
+        for state in self._hosts.values():
+            if state.connection_limit >= previous or state.connection_limit > self.policy.max_connections:
+                state.connection_limit = self.policy.max_connections
+
+    def on_dispatch(self, host: str) -> None:
+        state = self._state(host)
+        now = self._clock()
+        state.active += 1
+        state.requests += 1
+        if state.request_rate > 0:
+            self._refill(state, now)
+            state.tokens = max(0.0, state.tokens - 1.0)
+
+        # 一秒窗口内的实际请求速率，被限流时据此确定起步节奏
+        if now - state.window_start >= 1.0:
+            elapsed = now - state.window_start
+            state.observed_rate = state.window_count / elapsed
+            state.window_start = now
+            state.window_count = 0
+        state.window_count += 1
+
+    def on_release(self, host: str) -> None:
+        state = self._state(host)
+        if state.active > 0:
+            state.active -= 1
+
+    def active_count(self, host: str) -> int:
+        state = self._hosts.get(host)
+        return state.active if state else 0
+
+    def record_success(self, host: str) -> None:
+        """成功响应：加性增大并发上限，逐步放开请求节奏"""
+        state = self._state(host)
+        state.successes += 1
+        state.consecutive_throttles = 0
+        state.successes_since_change += 1
+
+        if state.connection_limit < self.policy.max_connections and (
+            state.successes_since_change >= state.connection_limit
+        ):
+            state.connection_limit += 1
+            state.successes_since_change = 0
+
+        if state.request_rate > 0 and state.rate_ceiling > 0:
+            state.request_rate *= 1.05
+            if state.request_rate >= state.rate_ceiling:
+                # 恢复到被限流前的水平，回到策略默认节奏
+                state.request_rate = self.policy.request_rate
+                state.rate_ceiling = 0.0
+
+    def record_throttle(self, host: str, status_code: int, retry_after: float | None = None) -> None:
+        """429/503：并发上限与请求速率减半，并按 Retry-After 冷却"""
+        state = self._state(host)
+        now = self._clock()
+        state.throttled += 1
+        state.consecutive_throttles += 1
+        state.successes_since_change = 0
+
+        state.connection_limit = max(self.policy.min_connections, state.connection_limit // 2)
+
+        current_rate = state.request_rate
+        if current_rate <= 0:
+            elapsed = now - state.window_start
+            current_rate = state.observed_rate or (state.window_count / elapsed if elapsed > 0 else 0.0)
+            current_rate = current_rate or float(state.connection_limit)
+            state.rate_ceiling = current_rate
+        state.request_rate = max(self.policy.min_request_rate, current_rate / 2)
+        state.tokens = min(state.tokens, 1.0)
+        state.last_refill = now
+
+        if retry_after is not None and retry_after >= 0:
+            cooldown = min(retry_after, self.policy.max_cooldown)
+        else:
+            cooldown = min(
+                self.policy.default_cooldown * (2 ** (state.consecutive_throttles - 1)),
+                self.policy.max_cooldown,
+            )
+        state.blocked_until = max(state.blocked_until, now + cooldown)
+
+    def record_response(self, host: str, status_code: int, retry_after: float | None = None) -> None:
+        if status_code in THROTTLE_STATUS_CODES:
+            self.record_throttle(host, status_code, retry_after)
+        elif status_code < 400:
+            self.record_success(host)
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        now = self._clock()
+        return {
+            host: {
+                "active": state.active,
+                "connection_limit": state.connection_limit,
+                "request_rate": state.request_rate,
+                "cooldown_remaining": max(0.0, state.blocked_until - now),
+                "requests": state.requests,
+                "successes": state.successes,
+                "throttled": state.throttled,
+            }
+            for host, state in self._hosts.items()
+        }
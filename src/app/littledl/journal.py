@@ -0,0 +1,259 @@
+"""
+批次级追加式日志 - 崩溃后恢复批量下载
+
+每条记录是一行 JSON，只追加不改写：
+- begin：一次安装开始，记录安装 ID 和说明
+- start：文件开始下载
+- done：文件已完整落盘（记录大小、mtime、哈希以及是否已校验）
+- fail：文件下载失败
+
+写入后立即 flush 到操作系统；fsync 按时间/条数分组提交，进程崩溃不丢记录，
+断电最多丢失最后一个提交窗口。重放时忽略被截断的最后一行。
+
+每条文件记录都带有写入它的安装 ID，同一个日志被多次安装共用时，in_flight() 只返回
+之前的安装中断时留下的文件，不会把本次安装正在下载的文件算进去。
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(slots=True)
+class JournalEntry:
+    path: str
+    state: str
+    size: int = -1
+    mtime_ns: int = 0
+    sha1: str | None = None
+    verified: bool = False
+    error: str | None = None
+    install_id: str | None = None
+
+
+def _journal_key(path: str | Path) -> str:
+    return os.path.normcase(os.path.abspath(str(path)))
+
+
+class BatchJournal:
+    """批量下载的追加式日志"""
+
+    def __init__(
+        self,
+        path: str | Path,
+        fsync_interval: float = 1.0,
+        fsync_every: int = 256,
+        install_id: str | None = None,
+        label: str | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.install_id = install_id or uuid.uuid4().hex
+        self.label = label
+        self.fsync_interval = fsync_interval
+        self.fsync_every = fsync_every
+
+        self._entries: dict[str, JournalEntry] = {}
+        self._file: Any = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._replayed_records = 0
+        # 重放时看到的最后一次安装 (install_id, label)
+        self.previous_install: tuple[str, str | None] | None = None
+
+    def open(self) -> "BatchJournal":
+        """重放已有日志并以追加方式打开；记录明显冗余时先压缩，然后写入本次安装的 begin 记录"""
+        with self._lock:
+            if self._file is not None:
+                return self
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._replay()
+            if self._replayed_records > max(64, 2 * len(self._entries)):
+                self._compact()
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._append({"op": "begin", "label": self.label, "ts": round(time.time(), 3)})
+        return self
+
+    def _replay(self) -> None:
+        self._entries.clear()
+        self._replayed_records = 0
+        self.previous_install = None
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                self._apply(record)
+                self._replayed_records += 1
+
+    def _apply(self, record: dict[str, Any]) -> None:
+        path = record.get("path")
+        op = record.get("op")
+        install_id = record.get("install")
+        if op == "begin":
+            if install_id and install_id != self.install_id:
+                self.previous_install = (install_id, record.get("label"))
+            return
+        if not path or not op:
+            return
+        key = _journal_key(path)
+        if op == "start":
+            self._entries[key] = JournalEntry(path=path, state="started", install_id=install_id)
+        elif op == "done":
+            self._entries[key] = JournalEntry(
+                path=path,
+                state="done",
+                size=record.get("size", -1),
+                mtime_ns=record.get("mtime_ns", 0),
+                sha1=record.get("sha1"),
+                verified=bool(record.get("verified", False)),
+                install_id=install_id,
+            )
+        elif op == "fail":
+            self._entries[key] = JournalEntry(
+                path=path, state="failed", error=record.get("error"), install_id=install_id
+            )
+
+    def _compact(self) -> None:
+        temp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(self._entry_record(entry), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._replayed_records = len(self._entries)
+
+    @staticmethod
+    def _entry_record(entry: JournalEntry) -> dict[str, Any]:
+        if entry.state == "done":
+            record = {
+                "op": "done",
+                "path": entry.path,
+                "size": entry.size,
+                "mtime_ns": entry.mtime_ns,
+                "sha1": entry.sha1,
+                "verified": entry.verified,
+            }
+        elif entry.state == "failed":
+            record = {"op": "fail", "path": entry.path, "error": entry.error}
+        else:
+            record = {"op": "start", "path": entry.path}
+        if entry.install_id:
+            record["install"] = entry.install_id
+        return record
+
+    def _append(self, record: dict[str, Any]) -> None:
+        record["install"] = self.install_id
+        with self._lock:
+            self._apply(record)
+            if self._file is None:
+                return
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            now = time.monotonic()
+            if self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+                self._last_sync = now
+
+    def record_started(self, path: str | Path) -> None:
+        self._append({"op": "start", "path": str(path)})
+
+    def record_completed(
+        self,
+        path: str | Path,
+        sha1: str | None = None,
+        verified: bool = False,
+    ) -> None:
+        """记录文件已完整落盘；大小和 mtime 取自磁盘上的文件"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        self._append(
+            {
+                "op": "done",
+                "path": str(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha1": sha1.lower() if sha1 else None,
+                "verified": verified,
+            }
+        )
+
+    def record_failed(self, path: str | Path, error: str | None = None) -> None:
+        self._append({"op": "fail", "path": str(path), "error": error})
+
+    def get_entry(self, path: str | Path) -> JournalEntry | None:
+        return self._entries.get(_journal_key(path))
+
+    def is_verified(self, path: str | Path, sha1: str | None = None) -> bool:
+        """文件已校验且磁盘上的大小和 mtime 与记录一致，无需重新计算哈希"""
+        entry = self.get_entry(path)
+        if entry is None or entry.state != "done" or not entry.verified:
+            return False
+        if sha1 and entry.sha1 and entry.sha1 != sha1.lower():
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == entry.size and stat.st_mtime_ns == entry.mtime_ns
+
+    def in_flight(self) -> list[str]:
+        """之前的安装中断时仍在下载的文件（不含本次安装正在下载的文件）
+
+        这些文件可能只写了一部分，恢复时不能只凭文件存在或大小就跳过。
+        """
+        return [
+            entry.path
+            for entry in self._entries.values()
+            if entry.state == "started" and entry.install_id != self.install_id
+        ]
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+                self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "BatchJournal":
+        return self.open()
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def get_stats(self) -> dict[str, int]:
+        states: dict[str, int] = {}
+        for entry in self._entries.values():
+            states[entry.state] = states.get(entry.state, 0) + 1
+        return {
+            "entries": len(self._entries),
+            "verified": sum(1 for e in self._entries.values() if e.verified),
+            **states,
+        }
@@ -1,12 +1,15 @@
 import asyncio
 import contextlib
 import json
+import os
+import struct
 import time
+import zlib
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
-from .chunk import Chunk, ChunkManager
+from .chunk import Chunk, ChunkManager, ChunkStatus
 from .exceptions import ResumeDataCorruptedError
 from .utils import generate_download_id, generate_meta_filename
 
@@ -66,7 +69,158 @@ class DownloadMetadata:
         )
 
 
+# 二进制元数据格式（小端）：
+#   头部    magic(4s) version(H) flags(H) file_size(q) created_at(d) updated_at(d)
+#           total_downloaded(q) chunk_count(I) strings_len(I) crc32(I)
+#   字符串  strings_len 字节的 UTF-8 JSON（URL、文件名、ETag、状态等），只在内容变化时整体重写
+#   分片表  chunk_count 条定长记录 index(I) status(B) error_count(H) start(q) end(q) downloaded(q) crc32(I)
+# 检查点只用 pwrite 原地改写头部和有变化的分片记录；新增分片追加在表尾。
+META_MAGIC = b"LDLR"
+META_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHqddqII")
+_RECORD = struct.Struct("<IBxHqqq")
+_CRC = struct.Struct("<I")
+HEADER_SIZE = _HEADER.size + _CRC.size
+RECORD_SIZE = _RECORD.size + _CRC.size
+
+_FLAG_SUPPORTS_RANGE = 0x1
+_STATUS_VALUES = [status.value for status in ChunkStatus]
+_STATUS_CODES = {value: code for code, value in enumerate(_STATUS_VALUES)}
+
+
+def _pack_record(index: int, status: str, error_count: int, start: int, end: int, downloaded: int) -> bytes:
+    body = _RECORD.pack(index, _STATUS_CODES.get(status, 0), min(error_count, 0xFFFF), start, end, downloaded)
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def _pack_chunk_dict(data: dict[str, Any]) -> bytes:
+    return _pack_record(
+        data.get("index", 0),
+        data.get("status", "pending"),
+        data.get("error_count", 0),
+        data.get("start_byte", 0),
+        data.get("end_byte", 0),
+        data.get("downloaded", 0),
+    )
+
+
+def _unpack_record(record: bytes, file_size: int) -> dict[str, Any]:
+    body = record[: _RECORD.size]
+    index, status_code, error_count, start, end, downloaded = _RECORD.unpack(body)
+    (crc,) = _CRC.unpack_from(record, _RECORD.size)
+    status = _STATUS_VALUES[status_code] if status_code < len(_STATUS_VALUES) else "pending"
+    if crc != zlib.crc32(body):
+        # 记录写到一半时崩溃：丢弃这一段的进度，重新下载
+        status, downloaded = "pending", 0
+    return {
+        "index": index,
+        "start_byte": start,
+        "end_byte": end,
+        "total_size": file_size,
+        "status": status,
+        "downloaded": downloaded,
+        "error_count": error_count,
+    }
+
+
+def _encode_strings(metadata: "DownloadMetadata") -> bytes:
+    return json.dumps(
+        {
+            "download_id": metadata.download_id,
+            "url": metadata.url,
+            "filename": metadata.filename,
+            "save_path": metadata.save_path,
+            "etag": metadata.etag,
+            "last_modified": metadata.last_modified,
+            "content_type": metadata.content_type,
+            "status": metadata.status,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _pack_header(metadata: "DownloadMetadata", chunk_count: int, strings_len: int) -> bytes:
+    body = _HEADER.pack(
+        META_MAGIC,
+        META_VERSION,
+        _FLAG_SUPPORTS_RANGE if metadata.supports_range else 0,
+        metadata.file_size,
+        metadata.created_at,
+        metadata.updated_at,
+        metadata.total_downloaded,
+        chunk_count,
+        strings_len,
+    )
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def _decode_binary(content: bytes) -> tuple["DownloadMetadata", bytes, list[bytes]]:
+    if len(content) < HEADER_SIZE:
+        raise ValueError("truncated header")
+    body = content[: _HEADER.size]
+    (crc,) = _CRC.unpack_from(content, _HEADER.size)
+    if crc != zlib.crc32(body):
+        raise ValueError("header checksum mismatch")
+    magic, version, flags, file_size, created_at, updated_at, total, chunk_count, strings_len = _HEADER.unpack(body)
+    if version != META_VERSION:
+        raise ValueError(f"unsupported version {version}")
+    table_offset = HEADER_SIZE + strings_len
+    strings = content[HEADER_SIZE:table_offset]
+    info = json.loads(strings.decode("utf-8"))
+    # 表尾追加的记录可能只写了一部分，只取完整的记录
+    chunk_count = min(chunk_count, (len(content) - table_offset) // RECORD_SIZE)
+    records = [
+        content[table_offset + i * RECORD_SIZE : table_offset + (i + 1) * RECORD_SIZE] for i in range(chunk_count)
+    ]
+    chunks = [_unpack_record(record, file_size) for record in records]
+    metadata = DownloadMetadata(
+        download_id=info["download_id"],
+        url=info["url"],
+        file_size=file_size,
+        filename=info["filename"],
+        save_path=info["save_path"],
+        created_at=created_at,
+        updated_at=updated_at,
+        chunks=chunks,
+        supports_range=bool(flags & _FLAG_SUPPORTS_RANGE),
+        etag=info.get("etag"),
+        last_modified=info.get("last_modified"),
+        content_type=info.get("content_type"),
+        total_downloaded=sum(chunk["downloaded"] for chunk in chunks) if chunks else total,
+        status=info.get("status", "pending"),
+    )
+    return metadata, strings, records
+
+
+def _write_at(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        if hasattr(os, "pwrite"):
+            written = os.pwrite(fd, view, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+
+
+def _read_meta_status(meta_file: Path) -> str | None:
+    content = meta_file.read_bytes()
+    if content.startswith(META_MAGIC):
+        return _decode_binary(content)[0].status
+    return json.loads(content.decode("utf-8")).get("status")
+
+
 class ResumeManager:
+    """断点续传元数据
+
+    元数据以紧凑的二进制格式保存（见模块顶部的格式说明）。每秒一次的检查点只改写
+    头部和发生变化的分片记录；URL、状态等字符串变化或首次保存时才整体重写。
+    旧版本的 JSON 元数据可以直接加载，下次保存时转换为二进制格式。
+    """
+
     def __init__(self, save_dir: Path, download_id: str | None = None) -> None:
         self.save_dir = save_dir
         self.download_id = download_id or generate_download_id("")
@@ -76,6 +230,12 @@ class ResumeManager:
         self._save_interval: float = 1.0
         self._pending_save: bool = False
 
+        self._slots: dict[int, int] = {}
+        self._records: list[bytes] = []
+        self._dirty: set[int] = set()
+        self._strings: bytes = b""
+        self._needs_rewrite: bool = True
+
     @property
     def metadata(self) -> DownloadMetadata | None:
         return self._metadata
@@ -98,7 +258,9 @@ class ResumeManager:
         last_modified: str | None = None,
         content_type: str | None = None,
     ) -> None:
+        """建立新的元数据；已加载的元数据与本次下载是同一份内容时保留分片进度"""
         now = time.time()
+        previous = self._metadata
         self._metadata = DownloadMetadata(
             download_id=self.download_id,
             url=url,
@@ -113,17 +275,41 @@ class ResumeManager:
             content_type=content_type,
             status="downloading",
         )
+        if (
+            previous is not None
+            and previous.url == url
+            and previous.file_size == file_size
+            and (not etag or not previous.etag or previous.etag == etag)
+        ):
+            self._metadata.created_at = previous.created_at
+            self._metadata.chunks = previous.chunks
+            self._metadata.total_downloaded = previous.total_downloaded
+        self._rebuild_records()
+
+    def _rebuild_records(self) -> None:
+        chunks = self._metadata.chunks if self._metadata else []
+        self._records = [_pack_chunk_dict(chunk) for chunk in chunks]
+        self._slots = {chunk.get("index", 0): slot for slot, chunk in enumerate(chunks)}
+        self._dirty.clear()
+        self._needs_rewrite = True
 
     async def load(self) -> DownloadMetadata | None:
         async with self._lock:
             if not self.meta_path.exists():
                 return None
             try:
-                content = await self._read_file(self.meta_path)
-                data = json.loads(content)
-                self._metadata = DownloadMetadata.from_dict(data)
+                content = await asyncio.to_thread(self.meta_path.read_bytes)
+                if content.startswith(META_MAGIC):
+                    self._metadata, self._strings, self._records = _decode_binary(content)
+                    self._slots = {chunk["index"]: slot for slot, chunk in enumerate(self._metadata.chunks)}
+                    self._dirty.clear()
+                    self._needs_rewrite = False
+                else:
+                    # 旧版 JSON 元数据，下次保存时整体转换
+                    self._metadata = DownloadMetadata.from_dict(json.loads(content.decode("utf-8")))
+                    self._rebuild_records()
                 return self._metadata
-            except json.JSONDecodeError as e:
+            except (json.JSONDecodeError, UnicodeDecodeError, ValueError, struct.error) as e:
                 raise ResumeDataCorruptedError(f"Invalid metadata format: {e}") from None
             except Exception as e:
                 raise ResumeDataCorruptedError(f"Failed to load metadata: {e}") from None
@@ -139,33 +325,86 @@ class ResumeManager:
             if not self._metadata:
                 return
             self._metadata.updated_at = now
-            self._metadata.total_downloaded = sum(chunk.get("downloaded", 0) for chunk in self._metadata.chunks)
-            try:
-                content = json.dumps(self._metadata.to_dict(), indent=2, ensure_ascii=False)
-                await self._write_file(self.meta_path, content)
-                self._last_save_time = now
-                self._pending_save = False
-            except Exception:
-                raise
+            strings = _encode_strings(self._metadata)
+            if strings != self._strings:
+                self._needs_rewrite = True
+
+            if self._needs_rewrite or not self.meta_path.exists():
+                content = b"".join(
+                    [_pack_header(self._metadata, len(self._records), len(strings)), strings, *self._records]
+                )
+                await asyncio.to_thread(self._write_full, content)
+                self._strings = strings
+                self._needs_rewrite = False
+            else:
+                header = _pack_header(self._metadata, len(self._records), len(strings))
+                table_offset = HEADER_SIZE + len(strings)
+                writes = [(table_offset + slot * RECORD_SIZE, self._records[slot]) for slot in sorted(self._dirty)]
+                await asyncio.to_thread(self._write_in_place, writes, header)
+            self._dirty.clear()
+            self._last_save_time = now
+            self._pending_save = False
+
+    def _write_full(self, content: bytes) -> None:
+        self.meta_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.meta_path.with_suffix(".tmp_write")
+        temp_path.write_bytes(content)
+        os.replace(temp_path, self.meta_path)
+
+    def _write_in_place(self, writes: list[tuple[int, bytes]], header: bytes) -> None:
+        fd = os.open(self.meta_path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+        try:
+            # 先写分片记录再写头部：头部里的分片数只在记录落盘后才增加
+            for offset, record in writes:
+                _write_at(fd, record, offset)
+            _write_at(fd, header, 0)
+        finally:
+            os.close(fd)
+
+    def _stage_chunk(self, chunk: Chunk) -> int:
+        """更新分片对应的记录，返回下载量的变化"""
+        assert self._metadata is not None
+        record = _pack_record(
+            chunk.index, chunk.status.value, chunk.error_count, chunk.start_byte, chunk.end_byte, chunk.downloaded
+        )
+        slot = self._slots.get(chunk.index)
+        if slot is None:
+            slot = len(self._records)
+            self._slots[chunk.index] = slot
+            self._records.append(record)
+            self._metadata.chunks.append(chunk.to_dict())
+            self._dirty.add(slot)
+            return chunk.downloaded
+        if self._records[slot] == record:
+            return 0
+        previous = self._metadata.chunks[slot].get("downloaded", 0)
+        self._records[slot] = record
+        self._metadata.chunks[slot] = chunk.to_dict()
+        self._dirty.add(slot)
+        return chunk.downloaded - previous
 
     async def update_from_chunk_manager(self, chunk_manager: ChunkManager) -> None:
+        if not self._metadata:
+            return
+        async with self._lock:
+            for chunk in chunk_manager.chunks:
+                self._stage_chunk(chunk)
+            self._metadata.total_downloaded = chunk_manager.total_downloaded
+
+    async def adopt_layout(self, chunk_manager: ChunkManager) -> None:
+        """分片布局整体变化（如续传时重新编号）后重建分片表"""
         if not self._metadata:
             return
         async with self._lock:
             self._metadata.chunks = chunk_manager.to_dict()
             self._metadata.total_downloaded = chunk_manager.total_downloaded
+            self._rebuild_records()
 
     async def update_chunk_progress(self, chunk: Chunk) -> None:
         if not self._metadata:
             return
         async with self._lock:
-            for i, chunk_data in enumerate(self._metadata.chunks):
-                if chunk_data.get("index") == chunk.index:
-                    self._metadata.chunks[i] = chunk.to_dict()
-                    break
-            else:
-                self._metadata.chunks.append(chunk.to_dict())
-            self._metadata.total_downloaded = sum(c.get("downloaded", 0) for c in self._metadata.chunks)
+            self._metadata.total_downloaded += self._stage_chunk(chunk)
 
     def can_resume(self) -> bool:
         if not self._metadata:
@@ -201,31 +440,13 @@ class ResumeManager:
             if self.meta_path.exists():
                 with contextlib.suppress(Exception):
                     await self._delete_file(self.meta_path)
+            self._needs_rewrite = True
 
     async def flush_pending(self) -> None:
         if self._pending_save:
             await self.save(force=True)
 
-    async def _read_file(self, path: Path) -> str:
-        import aiofiles
-
-        async with aiofiles.open(path, encoding="utf-8") as f:
-            return await f.read()
-
-    async def _write_file(self, path: Path, content: str) -> None:
-        import aiofiles
-
-        path.parent.mkdir(parents=True, exist_ok=True)
-        temp_path = path.with_suffix(".tmp_write")
-        async with aiofiles.open(temp_path, "w", encoding="utf-8") as f:
-            await f.write(content)
-        if path.exists():
-            await self._delete_file(path)
-        temp_path.rename(path)
-
     async def _delete_file(self, path: Path) -> None:
-        import os
-
         await asyncio.to_thread(os.remove, path)
 
     @staticmethod
@@ -234,9 +455,7 @@ class ResumeManager:
         pending: list[Path] = []
         for meta_file in meta_files:
             try:
-                content = meta_file.read_text(encoding="utf-8")
-                data = json.loads(content)
-                if data.get("status") in ("downloading", "paused"):
+                if _read_meta_status(meta_file) in ("downloading", "paused"):
                     pending.append(meta_file)
             except Exception:
                 continue
@@ -312,6 +312,9 @@ class MultiSourceManager:
             "is_failed": False,
             "is_single_thread": single_thread_only,
             "last_error": None,
+            "bytes": 0,
+            "elapsed": 0.0,
+            "active": 0,
         }
 
         if single_thread_only:
@@ -341,6 +344,10 @@ class MultiSourceManager:
 
         return None
 
+    def get_available_sources(self) -> list[dict[str, Any]]:
+        """按优先级返回所有未失效的源（多线程源在前）"""
+        return [s for s in self._sources + self._single_thread_sources if not s["is_failed"]]
+
     def mark_source_failed(self, url: str, error: str | None = None) -> None:
         """标记源为失败"""
         for source in self._sources + self._single_thread_sources:
@@ -360,6 +367,59 @@ class MultiSourceManager:
                 source["last_error"] = None
                 break
 
+    def _find_source(self, url: str) -> dict[str, Any] | None:
+        for source in self._sources + self._single_thread_sources:
+            if source["url"] == url:
+                return source
+        return None
+
+    def pick_range_source(self, exclude: set[str] | None = None) -> dict[str, Any] | None:
+        """
+        为下一个字节区间挑选下载源
+
+        策略：
+        1. 尚未测速的源优先（每个源先分到一个区间用于测速）
+        2. 其余按 吞吐量 / (在途区间数 + 1) 择优，快源自然分到更多区间
+
+        exclude 中的源（如本区间已经试过的源）不参与挑选。
+        """
+        candidates = [s for s in self._sources if not s["is_failed"] and not (exclude and s["url"] in exclude)]
+        if not candidates:
+            return None
+
+        for source in candidates:
+            if source["elapsed"] <= 0 and source["active"] == 0:
+                return source
+
+        return max(candidates, key=lambda s: self.get_throughput(s["url"]) / (s["active"] + 1))
+
+    def begin_range(self, url: str) -> None:
+        """标记一个区间开始在该源上传输"""
+        source = self._find_source(url)
+        if source:
+            source["active"] += 1
+
+    def end_range(self, url: str) -> None:
+        """标记一个区间在该源上结束（无论成功与否）"""
+        source = self._find_source(url)
+        if source and source["active"] > 0:
+            source["active"] -= 1
+
+    def record_transfer(self, url: str, nbytes: int, elapsed: float) -> None:
+        """记录一次区间传输的字节数与耗时，用于估算源吞吐量"""
+        source = self._find_source(url)
+        if source is None or nbytes <= 0:
+            return
+        source["bytes"] += nbytes
+        source["elapsed"] += max(elapsed, 1e-3)
+
+    def get_throughput(self, url: str) -> float:
+        """源的实测吞吐量（字节/秒），未测速时返回 0"""
+        source = self._find_source(url)
+        if source is None or source["elapsed"] <= 0:
+            return 0.0
+        return source["bytes"] / source["elapsed"]
+
     def _should_disable(self, source: dict[str, Any]) -> bool:
         """判断是否应该禁用此源"""
         if source["is_single_thread"]:
@@ -412,6 +472,7 @@ class MultiSourceManager:
             "available_sources": len([s for s in all_sources if not s["is_failed"]]),
             "failed_sources": len([s for s in all_sources if s["is_failed"]]),
             "current_source": self._sources[self._current_index]["url"] if self._sources else None,
+            "throughput": {s["url"]: self.get_throughput(s["url"]) for s in all_sources if s["elapsed"] > 0},
         }
 
 
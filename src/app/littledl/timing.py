@@ -0,0 +1,258 @@
+"""
+逐文件分阶段计时
+
+每个文件的耗时拆成以下阶段：
+- queue：进入队列到被派发
+- connect：DNS 解析与 TCP 建连（复用连接时为 0）
+- tls：TLS 握手
+- ttfb：请求发出到收到响应头
+- transfer：接收响应体（走 Downloader 的大文件为整个下载过程）
+- write：写入磁盘
+- hash：哈希校验
+- rename：临时文件原子替换
+
+按主机和大小档位聚合成对数分桶直方图，另外持续采样事件循环延迟，
+用来判断慢在镜像、磁盘还是本进程的事件循环。可选地把每个文件的计时
+以 JSON Lines 写入跟踪文件。
+"""
+
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, TextIO
+
+PHASES = ("queue", "connect", "tls", "ttfb", "transfer", "write", "hash", "rename")
+
+SIZE_CLASSES: tuple[tuple[float, str], ...] = (
+    (16 * 1024, "<16K"),
+    (256 * 1024, "16K-256K"),
+    (4 * 1024 * 1024, "256K-4M"),
+    (64 * 1024 * 1024, "4M-64M"),
+    (math.inf, ">=64M"),
+)
+
+# 直方图桶上界（毫秒），覆盖 0.05ms 到 60s
+BUCKET_BOUNDS_MS: tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000,
+)
+
+# httpcore trace 事件（去掉协议前缀）到阶段的映射：(阶段, 是否为开始事件)
+_TRACE_EVENTS = {
+    "connect_tcp.started": ("connect", True),
+    "connect_tcp.complete": ("connect", False),
+    "start_tls.started": ("tls", True),
+    "start_tls.complete": ("tls", False),
+    "send_request_headers.started": ("ttfb", True),
+    "receive_response_headers.complete": ("ttfb", False),
+    "receive_response_body.started": ("transfer", True),
+    "receive_response_body.complete": ("transfer", False),
+}
+
+
+def size_class(size: int) -> str:
+    if size < 0:
+        return "unknown"
+    for bound, name in SIZE_CLASSES:
+        if size < bound:
+            return name
+    return SIZE_CLASSES[-1][1]
+
+
+class PhaseHistogram:
+    """对数分桶直方图，分位数按桶内线性插值估算"""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, seconds: float) -> None:
+        ms = seconds * 1000
+        index = len(BUCKET_BOUNDS_MS)
+        for i, bound in enumerate(BUCKET_BOUNDS_MS):
+            if ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, pct: float) -> float:
+        if self.count == 0:
+            return 0.0
+        target = self.count * pct / 100
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= target:
+                low = BUCKET_BOUNDS_MS[i - 1] if i > 0 else 0.0
+                high = BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return min(low + (high - low) * (target - seen) / n, self.max_ms)
+            seen += n
+        return self.max_ms
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p90_ms": round(self.percentile(90), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+@dataclass(slots=True)
+class FileTiming:
+    """单个文件一次下载尝试的各阶段耗时（秒）"""
+
+    task_id: str
+    url: str
+    host: str
+    size: int
+    lane: str = ""
+    attempt: int = 0
+    started_at: float = field(default_factory=time.time)
+    finished_at: float = 0.0
+    phases: dict[str, float] = field(default_factory=dict)
+    _marks: dict[str, float] = field(default_factory=dict)
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + max(0.0, seconds)
+
+    def begin(self, phase: str) -> None:
+        self._marks[phase] = time.perf_counter()
+
+    def end(self, phase: str) -> None:
+        start = self._marks.pop(phase, None)
+        if start is not None:
+            self.add(phase, time.perf_counter() - start)
+
+    async def trace(self, event_name: str, info: dict[str, Any]) -> None:
+        """httpx 请求扩展 trace 回调：extensions={"trace": timing.trace}"""
+        _, _, suffix = event_name.partition(".")
+        mapping = _TRACE_EVENTS.get(suffix)
+        if mapping is None:
+            return
+        phase, is_start = mapping
+        if is_start:
+            self.begin(phase)
+        else:
+            self.end(phase)
+
+
+class TimingCollector:
+    """收集逐文件计时并按主机、大小档位聚合"""
+
+    def __init__(self, trace_path: str | Path | None = None, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.trace_path = Path(trace_path) if trace_path else None
+        self._trace_file: TextIO | None = None
+        self._lock = threading.Lock()
+        self._enqueued: dict[str, float] = {}
+        self._attempts: dict[str, int] = {}
+        self._phases: dict[str, PhaseHistogram] = {}
+        self._by_host: dict[str, dict[str, PhaseHistogram]] = {}
+        self._by_size: dict[str, dict[str, PhaseHistogram]] = {}
+        self._loop_lag = PhaseHistogram()
+        self._outcomes: dict[str, int] = {}
+        self._listeners: list[Callable[[FileTiming, str], None]] = []
+
+    def add_listener(self, callback: Callable[[FileTiming, str], None]) -> None:
+        """每次尝试结束后以 (timing, outcome) 调用，用于导出时间线等"""
+        self._listeners.append(callback)
+
+    def mark_enqueued(self, task_id: str) -> None:
+        if self.enabled:
+            self._enqueued[task_id] = time.monotonic()
+
+    def start_file(self, task_id: str, url: str, host: str, size: int, lane: str = "") -> FileTiming:
+        attempt = self._attempts.get(task_id, 0) + 1
+        self._attempts[task_id] = attempt
+        timing = FileTiming(task_id=task_id, url=url, host=host, size=size, lane=lane, attempt=attempt)
+        enqueued = self._enqueued.pop(task_id, None)
+        if enqueued is not None:
+            timing.add("queue", time.monotonic() - enqueued)
+        return timing
+
+    def finish_file(self, timing: FileTiming, outcome: str, size: int | None = None) -> None:
+        """一次尝试结束（completed / failed / retry），计入直方图并写跟踪文件"""
+        if outcome != "retry":
+            self._attempts.pop(timing.task_id, None)
+        if not self.enabled:
+            return
+        timing.finished_at = time.time()
+        if size is not None and size >= 0:
+            timing.size = size
+        klass = size_class(timing.size)
+        with self._lock:
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+            if outcome == "completed":
+                host_hists = self._by_host.setdefault(timing.host, {})
+                size_hists = self._by_size.setdefault(klass, {})
+                total = 0.0
+                for phase, seconds in timing.phases.items():
+                    total += seconds
+                    for hists in (self._phases, host_hists, size_hists):
+                        hist = hists.get(phase)
+                        if hist is None:
+                            hist = hists[phase] = PhaseHistogram()
+                        hist.add(seconds)
+                for hists in (self._phases, host_hists, size_hists):
+                    hists.setdefault("total", PhaseHistogram()).add(total)
+            self._write_trace(timing, outcome, klass)
+        for callback in self._listeners:
+            callback(timing, outcome)
+
+    def record_loop_lag(self, seconds: float) -> None:
+        with self._lock:
+            self._loop_lag.add(seconds)
+
+    def _write_trace(self, timing: FileTiming, outcome: str, klass: str) -> None:
+        if self.trace_path is None:
+            return
+        if self._trace_file is None:
+            self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+            self._trace_file = open(self.trace_path, "a", encoding="utf-8")
+        record = {
+            "ts": round(timing.started_at, 6),
+            "task_id": timing.task_id,
+            "url": timing.url,
+            "host": timing.host,
+            "lane": timing.lane,
+            "attempt": timing.attempt,
+            "size": timing.size,
+            "size_class": klass,
+            "outcome": outcome,
+            "phases_ms": {phase: round(seconds * 1000, 3) for phase, seconds in timing.phases.items()},
+        }
+        self._trace_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "outcomes": dict(self._outcomes),
+                "phases": _dump(self._phases),
+                "by_host": {host: _dump(hists) for host, hists in self._by_host.items()},
+                "by_size_class": {klass: _dump(hists) for klass, hists in self._by_size.items()},
+                "loop_lag": self._loop_lag.to_dict(),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._trace_file is not None:
+                self._trace_file.close()
+                self._trace_file = None
+
+
+def _dump(hists: dict[str, PhaseHistogram]) -> dict[str, dict[str, Any]]:
+    order = {phase: i for i, phase in enumerate((*PHASES, "total"))}
+    return {phase: hists[phase].to_dict() for phase in sorted(hists, key=lambda p: order.get(p, len(order)))}
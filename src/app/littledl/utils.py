@@ -1,9 +1,12 @@
 import contextlib
 import hashlib
 import mimetypes
+import os
 import re
+import threading
 import time
 import uuid
+from collections.abc import Iterable
 from pathlib import Path
 from urllib.parse import parse_qs, unquote, urlparse
 
@@ -223,6 +226,36 @@ def normalize_url(url: str) -> str:
     return url
 
 
+def extract_host(url: str) -> str:
+    """Return the key used for per-host limits: the hostname, plus the port when one is given."""
+    try:
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        if host and parsed.port:
+            return f"{host}:{parsed.port}"
+        return host
+    except Exception:
+        return ""
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        from email.utils import parsedate_to_datetime
+
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
 def validate_url(url: str) -> bool:
     try:
         parsed = urlparse(url)
@@ -255,10 +288,68 @@ def extract_chunk_index(filename: str) -> int:
     return 0
 
 
+# 进程内已确认存在的目录。资源文件只分布在 256 个 objects/xx 目录里，
+# 没有缓存时每个文件都会为同一个目录再发一次 mkdir。
+_known_dirs: set[str] = set()
+_known_dirs_lock = threading.Lock()
+_fs_op_stats = {"mkdir_calls": 0, "mkdir_skipped": 0}
+
+
+def _dir_key(path: str | Path) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def ensure_dir(path: str | Path, trust_cache: bool = True) -> None:
+    """确保目录存在；同一进程内已确认过的目录不再发起系统调用
+
+    缓存可能因目录被外部删除而过期：trust_cache=False 时总是 mkdir 并刷新缓存，
+    打开文件遇到 FileNotFoundError 的调用方应先 forget_dir 再重试（见 open_with_dir_retry）。
+    """
+    key = _dir_key(path)
+    with _known_dirs_lock:
+        if trust_cache and key in _known_dirs:
+            _fs_op_stats["mkdir_skipped"] += 1
+            return
+    os.makedirs(key, exist_ok=True)
+    with _known_dirs_lock:
+        _fs_op_stats["mkdir_calls"] += 1
+        _known_dirs.add(key)
+        # 父目录必然也存在
+        parent = os.path.dirname(key)
+        while parent and parent not in _known_dirs and parent != os.path.dirname(parent):
+            _known_dirs.add(parent)
+            parent = os.path.dirname(parent)
+
+
+def ensure_dirs(paths: Iterable[str | Path]) -> int:
+    """批量预建目录，每个不同的目录只处理一次；返回实际发起 mkdir 的次数
+
+    预建步骤每个批次只执行一次，不信任缓存：上次批次之后被删掉的目录在这里重新创建，
+    并刷新缓存供之后逐文件写入时使用。
+    """
+    before = _fs_op_stats["mkdir_calls"]
+    for key in sorted({_dir_key(path) for path in paths}):
+        ensure_dir(key, trust_cache=False)
+    return _fs_op_stats["mkdir_calls"] - before
+
+
+def forget_dir(path: str | Path) -> None:
+    """目录可能已被外部删除时移出缓存，下次 ensure_dir 会重新创建"""
+    key = _dir_key(path)
+    with _known_dirs_lock:
+        for known in [d for d in _known_dirs if d == key or d.startswith(key + os.sep)]:
+            _known_dirs.discard(known)
+
+
+def get_fs_op_stats() -> dict[str, int]:
+    with _known_dirs_lock:
+        return {**_fs_op_stats, "known_dirs": len(_known_dirs)}
+
+
 def safe_move(src: Path, dst: Path) -> None:
     import shutil
 
-    dst.parent.mkdir(parents=True, exist_ok=True)
+    ensure_dir(dst.parent)
     temp_dst = dst.with_suffix(dst.suffix + ".tmp_move")
     shutil.move(str(src), str(temp_dst))
     temp_dst.rename(dst)
@@ -5,12 +5,42 @@
 
 import asyncio
 import time
+import weakref
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 import aiofiles
 
+from .utils import ensure_dir, forget_dir
+
+# 进程内仍打开的缓冲写入器，用于统计缓冲区占用的内存
+_open_writers: "weakref.WeakSet[BufferedFileWriter]" = weakref.WeakSet()
+
+
+async def open_with_dir_retry(file_path: Path, mode: str) -> Any:
+    """确保父目录存在后打开文件
+
+    目录缓存可能已过期（目录在确认存在之后被外部删除），打开时遇到 FileNotFoundError
+    就把该目录移出缓存、重新创建后再试一次。
+    """
+    ensure_dir(file_path.parent)
+    try:
+        return await aiofiles.open(file_path, mode)
+    except FileNotFoundError:
+        forget_dir(file_path.parent)
+        ensure_dir(file_path.parent)
+        return await aiofiles.open(file_path, mode)
+
+
+def get_buffer_memory_stats() -> dict[str, int]:
+    """所有打开中的 BufferedFileWriter 的缓冲区内存占用"""
+    writers = list(_open_writers)
+    return {
+        "open_writers": len(writers),
+        "buffered_bytes": sum(w.buffer_memory for w in writers),
+    }
+
 
 @dataclass
 class WriteBuffer:
@@ -58,19 +88,16 @@ class BufferedFileWriter:
         self._running = False
         self._total_buffered = 0
         self._total_written = 0
+        self._buffer_memory = 0
 
     async def open(self) -> None:
         """打开文件并启动后台刷新任务"""
-        self.file_path.parent.mkdir(parents=True, exist_ok=True)
-
-        if self.mode == "wb":
-            self._file = await aiofiles.open(self.file_path, "wb")
-        else:
-            self._file = await aiofiles.open(self.file_path, "r+b")
+        self._file = await open_with_dir_retry(self.file_path, "wb" if self.mode == "wb" else "r+b")
 
         self._fd = self._file.fileno()
         self._running = True
         self._flush_task = asyncio.create_task(self._background_flush())
+        _open_writers.add(self)
 
     async def close(self) -> None:
         """关闭文件前强制刷新所有缓冲"""
@@ -89,6 +116,7 @@ class BufferedFileWriter:
         if self._file:
             await self._file.close()
             self._file = None
+        _open_writers.discard(self)
 
     async def write_at(self, offset: int, data: bytes) -> int:
         """在指定偏移量写入数据（缓冲模式）
@@ -125,6 +153,7 @@ class BufferedFileWriter:
             # 确保缓冲区足够大
             required_size = relative_offset + len(data)
             if required_size > len(buffer.data):
+                self._buffer_memory += required_size - len(buffer.data)
                 buffer.data.extend(b"\x00" * (required_size - len(buffer.data)))
 
             # 写入数据到缓冲区
@@ -205,7 +234,7 @@ class BufferedFileWriter:
 
         oldest_key = min(self._buffers.keys(), key=lambda k: self._buffers[k].last_write_time)
         await self._flush_buffer(oldest_key)
-        del self._buffers[oldest_key]
+        self._buffer_memory -= len(self._buffers.pop(oldest_key).data)
 
     async def _flush_all_buffers(self) -> None:
         """刷新所有缓冲区"""
@@ -213,6 +242,7 @@ class BufferedFileWriter:
             for buffer_key in list(self._buffers.keys()):
                 await self._flush_buffer(buffer_key)
             self._buffers.clear()
+            self._buffer_memory = 0
 
     async def _background_flush(self) -> None:
         """后台刷新任务 - 定期刷新脏缓冲区"""
@@ -233,6 +263,11 @@ class BufferedFileWriter:
                 # 后台任务不应崩溃，继续运行
                 await asyncio.sleep(1.0)
 
+    @property
+    def buffer_memory(self) -> int:
+        """当前缓冲区占用的字节数（已刷盘但尚未释放的缓冲区也计入）"""
+        return self._buffer_memory
+
     @property
     def stats(self) -> dict[str, Any]:
         """获取写入统计信息"""
@@ -254,11 +289,7 @@ class DirectFileWriter:
         self._lock = asyncio.Lock()
 
     async def open(self) -> None:
-        self.file_path.parent.mkdir(parents=True, exist_ok=True)
-        if self.mode == "wb":
-            self._file = await aiofiles.open(self.file_path, "wb")
-        else:
-            self._file = await aiofiles.open(self.file_path, "r+b")
+        self._file = await open_with_dir_retry(self.file_path, "wb" if self.mode == "wb" else "r+b")
 
     async def close(self) -> None:
         if self._file:
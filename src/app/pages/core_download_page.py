@@ -13,6 +13,8 @@ from ..services.download_service_v2 import (
     DownloadProgress,
 )
 from ..services.download_manager import DownloadManager, DownloadTask, TaskStatus
+from ..services.download_engine import DownloadEngine
+from ..services.progress_bridge import ProgressBridge
 from ..services.config_service import ConfigService
 from ..services.logger_service import LoggerService
 
@@ -58,6 +60,7 @@ class CoreDownloadPage:
 
         # 下载管理器
         self._download_manager = DownloadManager.instance()
+        self._progress_bridge = ProgressBridge.instance()
 
     def _load_version_dirs(self) -> list[dict]:
         """加载版本目录列表"""
@@ -90,12 +93,28 @@ class CoreDownloadPage:
         self.page.run_task(self._navigate_to, "/download_manager")
 
     # -------------------- 数据加载 --------------------
-    def _load_versions(self):
-        """在线程中调用的阻塞函数，返回 manifest 字典"""
-        downloader = MinecraftDownloader(self.mc_root)
-        return downloader.get_version_manifest()
+    def _is_offline(self) -> bool:
+        return bool(self.cfg.get_download_config().get("offline_mode", False))
+
+    def _load_versions(self, revalidate: bool = False):
+        """在线程中调用的阻塞函数，返回 manifest 字典
+
+        默认先用磁盘缓存中的版本列表立即渲染，后台重新验证后再刷新；
+        revalidate=True（手动刷新）时等待重新验证的结果
+        """
+        downloader = MinecraftDownloader(self.mc_root, offline=self._is_offline())
+        return downloader.get_version_manifest(
+            stale_while_revalidate=not revalidate,
+            on_refresh=self._on_manifest_refreshed,
+        )
+
+    def _on_manifest_refreshed(self, manifest: dict):
+        """后台重新验证发现版本列表有更新"""
+        self.logger.info("版本列表已在后台更新，重新渲染")
+        self._manifest = manifest
+        self._schedule_async_render_manifest()
 
-    def _async_load_versions(self):
+    def _async_load_versions(self, revalidate: bool = False):
         """异步版本加载"""
 
         def _load_complete(future):
@@ -105,7 +124,7 @@ class CoreDownloadPage:
             except Exception as err:
                 self._dispatch_ui(lambda: self._show_error(str(err)))
 
-        future = self._executor.submit(self._load_versions)
+        future = self._executor.submit(self._load_versions, revalidate)
         future.add_done_callback(_load_complete)
 
     def _on_manifest_loaded(self, manifest: dict):
@@ -251,7 +270,7 @@ class CoreDownloadPage:
             )
         ]
         self.page.update()
-        self._async_load_versions()
+        self._async_load_versions(revalidate=True)
 
     def _show_error(self, err: str):
         self._versions_column.controls = [
@@ -362,7 +381,7 @@ class CoreDownloadPage:
             current_file = progress.current_file or progress.status or task.current_file
 
             if progress.status and "失败" in progress.status:
-                task.update(error=progress.status)
+                self._progress_bridge.push(task, error=progress.status)
 
             update_data = {
                 "speed": progress.speed,
@@ -382,8 +401,8 @@ class CoreDownloadPage:
                 update_data["downloaded"] = progress.finished_files
 
             if "total" in update_data:
-                task.update(**update_data)
-                self._download_manager._notify()
+                # 由进度桥按帧率合并后写入任务并刷新界面，下载线程不等待界面
+                self._progress_bridge.push(task, **update_data)
 
         # 获取下载配置
         download_cfg = self.cfg.get_download_config()
@@ -428,6 +447,7 @@ class CoreDownloadPage:
                     config=config,
                     download_source=download_source,
                     progress_callback=progress_callback,
+                    offline=download_cfg.get("offline_mode", False),
                 )
 
                 ok = downloader.download_version(
@@ -435,7 +455,10 @@ class CoreDownloadPage:
                     cancel_event=task._cancel_event,
                     custom_name=custom_name,
                     target_dir=target_dir,
+                    trace_path=self.cfg.get_trace_path("install", display_name),
                 )
+                # 先写入最后一帧内还没刷新的进度（总量、失败原因等），再写入结束状态
+                self._progress_bridge.flush_task(task)
 
                 if ok:
                     msg = f"版本 {display_name} 下载完成"
@@ -471,6 +494,7 @@ class CoreDownloadPage:
                 tb = traceback.format_exc()
                 print(f"[下载线程] 异常: {ex}\n{tb}")
                 err_msg = f"下载异常: {ex}"
+                self._progress_bridge.flush_task(task)
                 task.update(
                     status=TaskStatus.FAILED,
                     error=err_msg,
@@ -486,7 +510,9 @@ class CoreDownloadPage:
             if task.is_cancelled():
                 task.delete_files()
 
-        threading.Thread(target=do_download, daemon=True).start()
+        # 安装规划（解析版本 JSON、资源索引）是阻塞的，交给下载引擎的工作线程；
+        # 批量下载本身在引擎的事件循环上运行，与其他下载共用连接池
+        DownloadEngine.instance().submit_call(do_download, name=display_name)
 
     # -------------------- 构建视图 --------------------
     def build(self) -> ft.View:
@@ -9,6 +9,7 @@ from ..services.download_manager import (
     TaskStatus,
     DownloadHistory,
 )
+from ..services.download_engine import DownloadEngine
 
 
 def format_size(size: int) -> str:
@@ -168,6 +169,17 @@ def download_manager_page(page: ft.Page):
         # 详细信息
         is_mc_download = bool(task.version_id)
 
+        # 优先级通道：交互式下载进行时，后台安装会暂时让出连接
+        if task.lane == "interactive":
+            lane_text, lane_color = "前台", ft.Colors.BLUE
+        elif (
+            task.status == TaskStatus.DOWNLOADING
+            and DownloadEngine.instance().is_background_yielding()
+        ):
+            lane_text, lane_color = "后台 · 已让出", ft.Colors.ORANGE
+        else:
+            lane_text, lane_color = "后台", ft.Colors.GREY
+
         details = ft.Column(
             [
                 ft.Row(
@@ -176,6 +188,7 @@ def download_manager_page(page: ft.Page):
                         ft.Text(
                             task.name, size=14, weight=ft.FontWeight.BOLD, expand=True
                         ),
+                        ft.Text(lane_text, color=lane_color, size=12),
                         ft.Text(task.status.value, color=status_color, size=12),
                     ]
                 ),
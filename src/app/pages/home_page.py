@@ -13,6 +13,7 @@ from app.services.utils_service import UtilsService
 from app.services.logger_service import LoggerService
 from app.services.version_detector import VersionDetector, McInstanceState, Version
 from app.services.launch_service import LaunchService
+from app.services.download_service_v2 import MinecraftDownloader
 from app.services.auth_service import AuthService
 from app.services.account_service import AccountService, LoginResult, LOGIN_LEGACY
 
@@ -122,16 +123,17 @@ class HomePage:
                 return
 
         progress_text = ft.Text("准备启动...", size=14)
+        progress_row = ft.Row(
+            [
+                ft.ProgressRing(width=24, height=24, stroke_width=2),
+                progress_text,
+            ],
+            alignment=ft.MainAxisAlignment.START,
+        )
         dialog = ft.AlertDialog(
             modal=True,
             title=ft.Text("启动游戏"),
-            content=ft.Row(
-                [
-                    ft.ProgressRing(width=24, height=24, stroke_width=2),
-                    progress_text,
-                ],
-                alignment=ft.MainAxisAlignment.START,
-            ),
+            content=progress_row,
         )
         self.page.show_dialog(dialog)
 
@@ -167,6 +169,7 @@ class HomePage:
                 None,
                 False,
                 update_progress,
+                trace_path=self.cfg.get_trace_path("launch", version_folder),
             )
 
             if not config:
@@ -194,6 +197,43 @@ class HomePage:
                 f"Game args ({len(config.game_arguments)}): {' '.join(config.game_arguments[:15])}"
             )
 
+            if config.integrity_issues:
+                choice = await self._ask_integrity_repair(
+                    dialog, config.integrity_issues
+                )
+                if choice is None:
+                    if dialog.open:
+                        self.page.pop_dialog()
+                    return
+                dialog.title = ft.Text("启动游戏")
+                dialog.content = progress_row
+                dialog.actions = []
+                dialog.update()
+                if choice == "repair":
+                    update_progress("正在修复缺失或损坏的文件...")
+
+                    def on_repair_progress(progress):
+                        if progress.status:
+                            update_progress(progress.status)
+
+                    downloader = MinecraftDownloader(
+                        str(Path(version_root).parent),
+                        progress_callback=on_repair_progress,
+                    )
+                    if not await asyncio.to_thread(
+                        downloader.repair_version, version_folder
+                    ):
+                        if dialog.open:
+                            dialog.title = ft.Text("修复失败")
+                            dialog.content = ft.Text(
+                                f"修复 {version_folder} 失败: {downloader.last_error}"
+                            )
+                            dialog.actions = [
+                                ft.TextButton("关闭", on_click=close_dialog)
+                            ]
+                            dialog.update()
+                        return
+
             update_progress("正在执行启动命令...")
             proc = await asyncio.to_thread(launch_service.launch, config)
 
@@ -239,6 +279,36 @@ class HomePage:
                 dialog.actions = [ft.TextButton("关闭", on_click=close_dialog)]
                 dialog.update()
 
+    async def _ask_integrity_repair(
+        self, dialog: ft.AlertDialog, issues: list[str]
+    ) -> str | None:
+        """启动前检查发现缺失或损坏的文件时询问是否先修复
+
+        返回 "repair"（修复后启动）、"launch"（直接启动），取消时返回 None
+        """
+        choice: asyncio.Future[str | None] = asyncio.get_running_loop().create_future()
+
+        def choose(value: str | None):
+            async def handler(e):
+                if not choice.done():
+                    choice.set_result(value)
+
+            return handler
+
+        shown = "\n".join(Path(path).name for path in issues[:5])
+        more = f"\n... 等 {len(issues)} 个文件" if len(issues) > 5 else ""
+        dialog.title = ft.Text("游戏文件不完整")
+        dialog.content = ft.Text(
+            f"检测到 {len(issues)} 个文件缺失或已被改动，直接启动可能失败：\n{shown}{more}"
+        )
+        dialog.actions = [
+            ft.TextButton("取消", on_click=choose(None)),
+            ft.TextButton("仍然启动", on_click=choose("launch")),
+            ft.FilledButton("修复后启动", on_click=choose("repair")),
+        ]
+        dialog.update()
+        return await choice
+
     def _create_navigate_handler(self, route: str):
         """创建导航事件处理器 - 正确处理异步调用"""
 
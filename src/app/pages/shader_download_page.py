@@ -2,7 +2,8 @@ import flet as ft
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import os
+
+from ..services.download_manager import DownloadManager, DownloadTask, TaskStatus
 
 
 MODRINTH_SEARCH_API = "https://api.modrinth.com/v2/search"
@@ -11,24 +12,21 @@ MODRINTH_PROJECT_API = "https://api.modrinth.com/v2/project/"
 
 # 下载指定光影包并显示进度条，支持自定义保存路径
 def download_shader(file_url, file_name, page, progress_bar, save_folder):
-    save_path = os.path.join(save_folder, file_name)
-    try:
-        r = requests.get(file_url, stream=True)
-        total = int(r.headers.get("content-length", 0))
-        downloaded = 0
-        with open(save_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total > 0:
-                        progress_bar.value = downloaded / total
-                        page.update()
-        page.show_dialog(ft.SnackBar(ft.Text(f"下载完成: {file_name}")))
-    except Exception as e:
-        page.show_dialog(ft.SnackBar(ft.Text(f"下载失败: {e}")))
-    progress_bar.value = 0
-    page.update()
+    # 交给下载引擎在后台下载，不阻塞界面；任务同时显示在下载管理器中
+    def on_update(task: DownloadTask):
+        if task.status == TaskStatus.COMPLETED:
+            progress_bar.value = 0
+            page.show_dialog(ft.SnackBar(ft.Text(f"下载完成: {file_name}")))
+        elif task.status == TaskStatus.FAILED:
+            progress_bar.value = 0
+            page.show_dialog(ft.SnackBar(ft.Text(f"下载失败: {task.error}")))
+        elif task.total > 0:
+            progress_bar.value = task.progress
+        page.update()
+
+    DownloadManager().start_file_download(
+        file_name, file_url, save_folder, file_name, on_update=on_update
+    )
 
 
 def shader_download_page(page: ft.Page):
@@ -4,6 +4,8 @@ import flet as ft
 from pathlib import Path
 from app.services.utils_service import UtilsService
 from app.services.version_detector import VersionDetector, McInstanceState, Version
+from app.services.download_engine import DownloadEngine
+from app.services.download_service_v2 import MinecraftDownloader
 
 
 class VersionsPage:
@@ -80,7 +82,21 @@ class VersionsPage:
             versions_card.append(
                 ft.Card(
                     content=ft.Container(
-                        ft.Text(main_text, size=14),
+                        ft.Row(
+                            [
+                                ft.Text(main_text, size=14, expand=True),
+                                ft.IconButton(
+                                    icon=ft.Icons.FACT_CHECK,
+                                    tooltip="快速校验",
+                                    on_click=lambda _, n=folder: self._verify_version(n),
+                                ),
+                                ft.IconButton(
+                                    icon=ft.Icons.BUILD,
+                                    tooltip="修复（逐个校验哈希，只重新下载缺失或损坏的文件）",
+                                    on_click=lambda _, n=folder: self._repair_version(n),
+                                ),
+                            ]
+                        ),
                         padding=10,
                         tooltip=tooltip_text if tooltip_text else None,
                     ),
@@ -100,6 +116,39 @@ class VersionsPage:
             scroll=ft.ScrollMode.AUTO,
         )
 
+    def _show_message(self, text: str):
+        self.page.show_dialog(ft.SnackBar(ft.Text(text)))
+
+    def _verify_version(self, folder: str):
+        self._show_message(f"正在校验 {folder} ...")
+
+        def do_verify():
+            try:
+                report = MinecraftDownloader(str(self.root.parent)).verify_version(folder)
+            except Exception as ex:
+                self._show_message(f"校验失败: {ex}")
+                return
+            if report.ok:
+                self._show_message(f"{folder} 校验通过（{report.checked} 个文件）")
+            else:
+                self._show_message(
+                    f"{folder}: 缺失 {len(report.missing)} 个文件，损坏 {len(report.corrupt)} 个，可点击修复"
+                )
+
+        DownloadEngine.instance().submit_call(do_verify, name=f"校验 {folder}")
+
+    def _repair_version(self, folder: str):
+        self._show_message(f"正在修复 {folder} ...")
+
+        def do_repair():
+            downloader = MinecraftDownloader(str(self.root.parent))
+            if downloader.repair_version(folder, deep=True):
+                self._show_message(f"{folder} 修复完成")
+            else:
+                self._show_message(f"{folder} 修复失败: {downloader.last_error}")
+
+        DownloadEngine.instance().submit_call(do_repair, name=f"修复 {folder}")
+
     def _get_loader_info(self, info) -> str:
         if info.state == McInstanceState.Forge and info.forge_version:
             return f"Forge {info.forge_version}"
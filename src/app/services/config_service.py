@@ -1,4 +1,6 @@
 from __future__ import annotations
+import re
+import time
 import rtoml
 from pathlib import Path
 from typing import Any, Dict
@@ -55,12 +57,25 @@ class ConfigService:
             "resume_enabled": True,
             "download_source": "auto",
             "version_source": "bmclapi_first",
+            "ui_refresh_fps": 10,
+            # 离线模式：版本列表和版本 JSON 只从元数据缓存读取
+            "offline_mode": False,
             "smart_segment": {
                 "min_chunk_size_kb": 512,
                 "max_chunk_size_mb": 10,
                 "dynamic_adjustment": True,
             },
         },
+        "Debug": {
+            # 安装和启动时导出 Trace Event Format 时间线，便于附在问题反馈里
+            "trace_export": False,
+            "trace_dir": "MineLauncher/trace",
+        },
+        "Metrics": {
+            # 本机 Prometheus 指标端点，仅监听 127.0.0.1
+            "Enabled": False,
+            "Port": 9464,
+        },
         "DownloadHistory": [],
         "VersionDirectoryEntries": [],
         "SelectedLaunchVersion": None,
@@ -136,6 +151,16 @@ class ConfigService:
         cfg["Download"] = download_cfg
         self.save(cfg)
 
+    def get_trace_path(self, kind: str, name: str) -> str | None:
+        """启用时间线导出时返回本次 install/launch 的跟踪文件路径，否则返回 None"""
+        debug = self.load().get("Debug", self.DEFAULT["Debug"])
+        if not debug.get("trace_export", False):
+            return None
+        safe_name = re.sub(r"[^\w.-]+", "_", name)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        trace_dir = Path(debug.get("trace_dir") or self.DEFAULT["Debug"]["trace_dir"])
+        return str(trace_dir / f"{kind}-{safe_name}-{stamp}.json")
+
     def add_download_history(self, record: Dict[str, Any]) -> None:
         cfg = self.load()
         history = cfg.get("DownloadHistory", [])
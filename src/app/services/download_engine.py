@@ -0,0 +1,387 @@
+"""下载引擎 - 所有下载共用的常驻事件循环线程
+
+版本安装、模组/光影下载和下载管理器都把任务提交到这里，而不是各自
+asyncio.run 一个临时事件循环：
+- 一个专用线程上运行唯一的事件循环，线程安全地接收任务
+- 所有下载共享同一个连接池，同时进行的安装可以复用连接
+- submit 返回 concurrent.futures.Future 和进度流，调用方可以阻塞等待、
+  注册回调或在其他线程里迭代进度
+- 任务分为交互式（用户点击下载的单个文件）和后台（版本安装等批量下载）两个
+  优先级通道：有交互式任务进行时，后台批次不再派发新文件，直到同时下载的文件数
+  降到 background_yield_files 以下；已在下载的文件不限速、不暂停，照常下完。
+  安装批次以小文件为主，在途文件很快结束，连接随之让给交互式任务；正在下载的
+  大文件（如客户端 jar）仍会占用带宽直到完成。交互式任务结束后恢复，后台批次
+  不会被取消
+"""
+
+from __future__ import annotations
+import asyncio
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from ..littledl import DownloadConfig, Downloader
+from ..littledl.connection import ConnectionPool
+from ..services.logger_service import LoggerService
+from ..services.metrics_service import MetricsService
+
+INTERACTIVE_LANE = "interactive"
+BACKGROUND_LANE = "background"
+
+
+@dataclass
+class JobProgress:
+    """任务进度快照"""
+
+    downloaded: int = 0
+    total: int = 0
+    speed: float = 0.0
+    eta: float = 0.0
+    status: str = ""
+    finished: bool = False
+    error: Optional[str] = None
+
+
+class ProgressStream:
+    """线程安全的进度流
+
+    只保留最新一份快照：生产者更新频率再高，消费者也只会看到最新进度，
+    不会堆积。可以注册回调，也可以在任意线程里迭代。
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._latest = JobProgress()
+        self._version = 0
+        self._closed = False
+        self._callbacks: List[Callable[[JobProgress], None]] = []
+
+    def publish(self, **changes: Any) -> None:
+        with self._cond:
+            current = self._latest
+            self._latest = JobProgress(
+                **{**current.__dict__, **changes},
+            )
+            self._version += 1
+            snapshot = self._latest
+            callbacks = list(self._callbacks)
+            self._cond.notify_all()
+        for cb in callbacks:
+            try:
+                cb(snapshot)
+            except Exception:
+                pass
+
+    def close(self, error: Optional[str] = None) -> None:
+        self.publish(finished=True, error=error)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def subscribe(self, callback: Callable[[JobProgress], None]) -> None:
+        """注册进度回调（在发布进度的线程里调用）"""
+        with self._cond:
+            self._callbacks.append(callback)
+
+    def latest(self) -> JobProgress:
+        with self._cond:
+            return self._latest
+
+    def __iter__(self):
+        seen = -1
+        while True:
+            with self._cond:
+                while self._version == seen and not self._closed:
+                    self._cond.wait()
+                if self._version == seen and self._closed:
+                    return
+                seen = self._version
+                snapshot = self._latest
+            yield snapshot
+            if snapshot.finished:
+                return
+
+
+@dataclass
+class DownloadJob:
+    """提交给引擎的任务句柄"""
+
+    job_id: int
+    name: str
+    future: Future
+    lane: str = BACKGROUND_LANE
+    progress: ProgressStream = field(default_factory=ProgressStream)
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        return self.future.result(timeout)
+
+    def cancel(self) -> bool:
+        return self.future.cancel()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def add_done_callback(self, callback: Callable[["DownloadJob"], None]) -> None:
+        self.future.add_done_callback(lambda _f: callback(self))
+
+
+class DownloadEngine:
+    """下载引擎单例"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        self.logger = LoggerService().logger
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._jobs: Dict[int, DownloadJob] = {}
+        self._pool: Optional[ConnectionPool] = None
+        # 以下状态只在引擎线程上读写
+        self._interactive_active = 0
+        self._background_batches: List[Any] = []
+        # 有交互式任务时，每个后台批次最多同时下载的文件数（只限制新派发的文件）
+        self.background_yield_files = 2
+        # 阻塞型任务（如解析版本清单后再提交批量下载）在这里运行，不占用事件循环；
+        # 随事件循环线程一起创建，shutdown 后再次使用引擎时重新创建
+        self._call_executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def instance(cls) -> "DownloadEngine":
+        return cls()
+
+    # -------------------- 事件循环线程 --------------------
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None and self._thread and self._thread.is_alive():
+            return self._loop
+        with self._start_lock:
+            if self._call_executor is None:
+                self._call_executor = ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="download-engine-call"
+                )
+            if self._loop is None or not (self._thread and self._thread.is_alive()):
+                self._ready.clear()
+                self._thread = threading.Thread(
+                    target=self._run_loop, name="download-engine", daemon=True
+                )
+                self._thread.start()
+                self._ready.wait()
+        assert self._loop is not None
+        return self._loop
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def in_engine_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    async def get_connection_pool(self) -> ConnectionPool:
+        """引擎内共享的连接池，只能在引擎线程里使用"""
+        if self._pool is None:
+            self._pool = ConnectionPool(DownloadConfig())
+            await self._pool.initialize()
+        return self._pool
+
+    # -------------------- 优先级通道 --------------------
+    def register_background_batch(self, batch: Any) -> None:
+        """登记后台批次（需支持 set_dispatch_cap），必须在引擎线程上调用"""
+        self._background_batches.append(batch)
+        if self._interactive_active:
+            batch.set_dispatch_cap(max(1, self.background_yield_files))
+
+    def unregister_background_batch(self, batch: Any) -> None:
+        if batch in self._background_batches:
+            self._background_batches.remove(batch)
+        batch.set_dispatch_cap(None)
+
+    def is_background_yielding(self) -> bool:
+        return self._interactive_active > 0
+
+    def _interactive_started(self) -> None:
+        self._interactive_active += 1
+        if self._interactive_active == 1:
+            for batch in self._background_batches:
+                batch.set_dispatch_cap(max(1, self.background_yield_files))
+            if self._background_batches:
+                self.logger.debug(
+                    f"交互式下载开始，{len(self._background_batches)} 个后台批次让出连接"
+                )
+
+    def _interactive_finished(self) -> None:
+        self._interactive_active = max(0, self._interactive_active - 1)
+        if self._interactive_active == 0:
+            for batch in self._background_batches:
+                batch.set_dispatch_cap(None)
+
+    # -------------------- 提交任务 --------------------
+    def submit(
+        self,
+        job: Callable[[ProgressStream], Awaitable[Any]],
+        name: str = "",
+        lane: str = BACKGROUND_LANE,
+    ) -> DownloadJob:
+        """提交协程任务；job 接收进度流，返回值作为 future 的结果"""
+        loop = self._ensure_started()
+        progress = ProgressStream()
+
+        async def runner() -> Any:
+            if lane == INTERACTIVE_LANE:
+                self._interactive_started()
+            try:
+                result = await job(progress)
+            except BaseException as e:
+                progress.close(error=str(e) or type(e).__name__)
+                raise
+            finally:
+                if lane == INTERACTIVE_LANE:
+                    self._interactive_finished()
+            progress.close()
+            return result
+
+        future = asyncio.run_coroutine_threadsafe(runner(), loop)
+        return self._track(name, future, progress, lane)
+
+    def submit_call(
+        self, fn: Callable[..., Any], *args: Any, name: str = "", **kwargs: Any
+    ) -> DownloadJob:
+        """提交阻塞函数，在引擎的工作线程里运行（可在其中调用 run 等待协程）"""
+        self._ensure_started()
+        executor = self._call_executor
+        assert executor is not None
+        progress = ProgressStream()
+
+        def runner() -> Any:
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                progress.close(error=str(e) or type(e).__name__)
+                raise
+            progress.close()
+            return result
+
+        future = executor.submit(runner)
+        return self._track(name, future, progress, BACKGROUND_LANE)
+
+    def submit_file(
+        self,
+        url: str,
+        save_path: str,
+        filename: Optional[str] = None,
+        backup_urls: Optional[List[str]] = None,
+        expected_sha1: Optional[str] = None,
+        name: str = "",
+        lane: str = INTERACTIVE_LANE,
+    ) -> DownloadJob:
+        """提交单个文件下载，使用引擎共享的连接池；默认按交互式任务优先"""
+
+        async def job(progress: ProgressStream) -> Path:
+            config = DownloadConfig()
+            if expected_sha1:
+                config.verify_hash = True
+                config.expected_hash = expected_sha1
+                config.hash_algorithm = "sha1"
+            downloader = Downloader(config)
+            downloader.set_connection_pool(await self.get_connection_pool())
+
+            def on_progress(downloaded: int, total: int, speed: float, eta: int) -> None:
+                progress.publish(
+                    downloaded=downloaded, total=total, speed=speed, eta=float(eta)
+                )
+
+            metrics = MetricsService()
+            metrics.single_file_started()
+            ok = False
+            try:
+                path = await downloader.download(
+                    url=url,
+                    save_path=save_path,
+                    filename=filename,
+                    progress_callback=on_progress,
+                    backup_urls=backup_urls,
+                )
+                ok = True
+                return path
+            finally:
+                metrics.single_file_finished(
+                    urlparse(url).hostname or "", progress.latest().downloaded, ok
+                )
+
+        return self.submit(job, name=name or filename or url, lane=lane)
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        """在引擎循环上运行协程并阻塞等待结果，替代 asyncio.run"""
+        if self.in_engine_thread():
+            raise RuntimeError("DownloadEngine.run() called from the engine thread")
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def _track(
+        self, name: str, future: Future, progress: ProgressStream, lane: str
+    ) -> DownloadJob:
+        job = DownloadJob(
+            job_id=next(self._job_ids),
+            name=name,
+            future=future,
+            lane=lane,
+            progress=progress,
+        )
+        self._jobs[job.job_id] = job
+        future.add_done_callback(lambda _f: self._jobs.pop(job.job_id, None))
+        return job
+
+    def get_active_jobs(self) -> List[DownloadJob]:
+        return list(self._jobs.values())
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """关闭共享连接池并停止事件循环（应用退出时调用）
+
+        之后再提交任务时引擎会重新启动事件循环和工作线程
+        """
+        loop = self._loop
+        if loop is None:
+            return
+
+        async def close_pool() -> None:
+            if self._pool is not None:
+                await self._pool.close()
+                self._pool = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(close_pool(), loop).result(timeout)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread:
+            self._thread.join(timeout)
+        with self._start_lock:
+            self._loop = None
+            self._thread = None
+            executor, self._call_executor = self._call_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -62,6 +62,7 @@ class DownloadTask:
     completed_files: int = 0
     current_file: str = ""
     connections: int = 0
+    lane: str = "background"  # interactive: 用户点击的单个文件；background: 版本安装等批量下载
     chunks: List[ChunkProgress] = field(default_factory=list)
 
     _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
@@ -192,6 +193,7 @@ class DownloadTask:
             "average_speed": self.get_average_speed(),
             "file_count": self.file_count,
             "completed_files": self.completed_files,
+            "lane": self.lane,
             "error": self.error,
         }
 
@@ -303,6 +305,77 @@ class DownloadManager:
         self.tasks[task.task_id] = task
         self._notify()
 
+    def start_file_download(
+        self,
+        name: str,
+        url: str,
+        save_folder: str,
+        file_name: str,
+        on_update: Optional[Callable[[DownloadTask], None]] = None,
+    ) -> DownloadTask:
+        """通过下载引擎下载单个文件（模组、光影等），并作为任务显示在下载管理器中"""
+        from ..services.download_engine import DownloadEngine
+        from ..services.progress_bridge import ProgressBridge
+
+        task = DownloadTask(
+            task_id=f"file_{int(time.time() * 1000)}_{file_name}",
+            name=name,
+            lane="interactive",
+            target_dir=save_folder,
+            status=TaskStatus.DOWNLOADING,
+            file_count=1,
+            current_file=file_name,
+        )
+        task.started_at = time.time()
+        task.add_file_path(str(Path(save_folder) / file_name))
+        if on_update:
+            task.on_update(on_update)
+        self.add_task(task)
+
+        job = DownloadEngine.instance().submit_file(
+            url, save_folder, filename=file_name, name=name
+        )
+
+        bridge = ProgressBridge.instance()
+
+        def on_progress(progress):
+            if not progress.finished:
+                bridge.push(
+                    task,
+                    downloaded=progress.downloaded,
+                    total=progress.total,
+                    speed=progress.speed,
+                )
+
+        def on_done(finished_job):
+            # 先写入最后一帧内还没刷新的进度，再写入结束状态
+            bridge.flush_task(task)
+            if task.is_cancelled() or finished_job.future.cancelled():
+                task.update(status=TaskStatus.CANCELLED, completed_at=time.time())
+                task.delete_files()
+            else:
+                error = finished_job.future.exception()
+                if error is None:
+                    task.update(
+                        status=TaskStatus.COMPLETED,
+                        completed_at=time.time(),
+                        downloaded=task.total or task.downloaded,
+                        completed_files=1,
+                    )
+                else:
+                    task.update(
+                        status=TaskStatus.FAILED,
+                        error=str(error) or type(error).__name__,
+                        completed_at=time.time(),
+                    )
+            self.archive_task(task.task_id)
+
+        job.progress.subscribe(on_progress)
+        job.add_done_callback(on_done)
+        # 在下载管理器里取消任务时同时取消引擎中的下载
+        task.on_update(lambda t: job.cancel() if t.is_cancelled() else None)
+        return task
+
     def get_task(self, task_id: str) -> Optional[DownloadTask]:
         """获取任务"""
         return self.tasks.get(task_id)
@@ -5,14 +5,18 @@ Minecraft版本下载服务 - 基于littledl高性能下载库
 
 from __future__ import annotations
 import os
+import sys
 import json
 import enum
+import itertools
 import asyncio
 import threading
 import time
+from array import array
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional, Callable, Tuple, Any
+from typing import List, Dict, Optional, Callable, Tuple, Any, Iterable, Iterator, Set
 from pathlib import Path
+import orjson
 import requests
 from dataclasses import dataclass, field
 
@@ -35,11 +39,18 @@ from ..littledl import (
     BatchProgress,
     FileTask,
     FileTaskStatus,
+    ensure_dirs,
 )
 from ..littledl.batch import FileProgress
+from ..littledl.journal import BatchJournal
 
 from ..info import UA
 from ..services.logger_service import LoggerService
+from ..services.download_engine import BACKGROUND_LANE, DownloadEngine
+from ..services.install_receipt import InstallReceipt, sha1_of_file
+from ..services.metadata_cache import CachedResponse, MetadataCache, MetadataCacheMiss
+from ..services.metrics_service import MetricsService
+from ..services.trace_service import TraceRecorder
 
 
 class DownloadSource(enum.Enum):
@@ -119,6 +130,28 @@ class DownloadProgress:
         )
 
 
+@dataclass
+class VerifyReport:
+    """已安装版本的校验结果"""
+
+    version: str
+    deep: bool
+    checked: int = 0
+    hashed: int = 0
+    hashed_bytes: int = 0
+    missing: List["NetFile"] = field(default_factory=list)
+    corrupt: List["NetFile"] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing and not self.corrupt
+
+    @property
+    def broken(self) -> List["NetFile"]:
+        return self.missing + self.corrupt
+
+
 @dataclass
 class MinecraftDownloadConfig:
     """Minecraft下载配置"""
@@ -153,9 +186,18 @@ class MinecraftDownloadConfig:
     # 下载源
     download_source: str = "auto"
 
+    # 批量安装时同时下载的文件数
+    max_concurrent_files: int = 16
+
+    # 小文件走 HTTP/2 多路复用通道；默认关闭，需要 h2 包且下载源支持 HTTP/2
+    enable_h2_lane: bool = False
+
     # 验证
     verify_hash: bool = True
 
+    # 逐文件分阶段计时的 JSON Lines 跟踪文件，留空则只在内存中聚合
+    timing_trace_path: str = ""
+
     def to_littledl_config(self) -> DownloadConfig:
         """转换为littledl配置"""
         # 速度限制配置
@@ -207,7 +249,11 @@ class MinecraftDownloadConfig:
 
 
 class NetFile:
-    """网络文件信息"""
+    """网络文件信息
+
+    min_size 是跳过判断用的大小下限，元数据没给出大小时是估计值；
+    size 是元数据给出的精确大小，未知时为 0
+    """
 
     def __init__(
         self,
@@ -216,14 +262,146 @@ class NetFile:
         check_hash: Optional[str] = None,
         min_size: int = 0,
         file_name: str = "",
+        size: int = 0,
     ):
         self.urls = urls
         self.local_path = local_path
         self.check_hash = check_hash
         self.min_size = min_size
+        self.size = size
         self.file_name = file_name or Path(local_path).name
 
 
+# 流式加入资源文件时下载器中排队文件的上下水位：高于上限暂停生成任务，降到下限再继续
+PLAN_FEED_HIGH_WATERMARK = 512
+PLAN_FEED_LOW_WATERMARK = 256
+# 跳过判断（stat、必要时计算 sha1）在线程里按批进行，每批的文件数
+SKIP_CHECK_BATCH = 256
+
+
+class AssetPlan:
+    """资源对象的列式下载计划
+
+    上万个资源对象不再各自对应 NetFile、Path 和下载任务：sha1 以 20 字节二进制
+    连续存放在 bytearray 中，大小存放在 array('q') 中，各下载源的地址前缀和
+    objects 目录只保存一份。NetFile 在送入下载器时才逐个生成。
+    """
+
+    __slots__ = ("objects_dir", "base_urls", "_hashes", "_sizes")
+
+    def __init__(self, objects_dir: Path, base_urls: List[str]):
+        self.objects_dir = sys.intern(os.path.normcase(os.path.abspath(objects_dir)))
+        self.base_urls = [sys.intern(url.rstrip("/")) for url in base_urls]
+        self._hashes = bytearray()
+        self._sizes = array("q")
+
+    @classmethod
+    def from_index(cls, data: bytes, objects_dir: Path, base_urls: List[str]) -> "AssetPlan":
+        """解析资源索引，去重；不同路径可能指向同一个对象"""
+        plan = cls(objects_dir, base_urls)
+        seen = set()
+        for info in orjson.loads(data).get("objects", {}).values():
+            asset_hash = info.get("hash")
+            if asset_hash and asset_hash not in seen:
+                seen.add(asset_hash)
+                plan.append(asset_hash, info.get("size", 0))
+        return plan
+
+    @classmethod
+    def merge(cls, plans: List["AssetPlan"]) -> "AssetPlan":
+        """合并多个版本的资源计划，同一对象只保留一次；地址前缀和目录取第一个计划"""
+        merged = cls(Path(plans[0].objects_dir), plans[0].base_urls)
+        seen = set()
+        for plan in plans:
+            for i in range(0, len(plan._hashes), 20):
+                digest = bytes(plan._hashes[i : i + 20])
+                if digest not in seen:
+                    seen.add(digest)
+                    merged._hashes += digest
+                    merged._sizes.append(plan._sizes[i // 20])
+        return merged
+
+    def append(self, asset_hash: str, size: int) -> None:
+        self._hashes += bytes.fromhex(asset_hash)
+        self._sizes.append(size)
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def hash_at(self, index: int) -> str:
+        return self._hashes[index * 20 : index * 20 + 20].hex()
+
+    def size_at(self, index: int) -> int:
+        return self._sizes[index]
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes)
+
+    def parent_dirs(self) -> List[Path]:
+        """计划涉及的 objects/xx 目录（最多 256 个）"""
+        prefixes = {self._hashes[i] for i in range(0, len(self._hashes), 20)}
+        return [Path(self.objects_dir) / f"{prefix:02x}" for prefix in sorted(prefixes)]
+
+    def net_file(self, index: int) -> NetFile:
+        asset_hash = self.hash_at(index)
+        relative = f"{asset_hash[:2]}/{asset_hash}"
+        return NetFile(
+            urls=[f"{base}/{relative}" for base in self.base_urls],
+            local_path=os.path.join(self.objects_dir, asset_hash[:2], asset_hash),
+            check_hash=asset_hash,
+            min_size=self._sizes[index],
+            file_name=asset_hash,
+            size=self._sizes[index],
+        )
+
+    def __iter__(self) -> Iterator[NetFile]:
+        for index in range(len(self._sizes)):
+            yield self.net_file(index)
+
+    def hash_for_path(self, path: Path) -> Optional[str]:
+        """objects/xx/<sha1> 路径对应的期望哈希，不属于本计划时返回 None"""
+        path = os.path.normcase(os.path.abspath(path))
+        if os.path.dirname(os.path.dirname(path)) != self.objects_dir:
+            return None
+        return os.path.basename(path)
+
+
+class SourceLatencyTracker:
+    """记录本进程内各版本列表源的响应耗时
+
+    官方源响应 < 4000ms 且不比 BMCLAPI 慢时优先使用官方源（AUTO 模式），
+    请求失败记为无穷大。
+    """
+
+    OFFICIAL_THRESHOLD_MS = 4000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency_ms: Dict[str, float] = {}
+
+    def record(self, source: str, elapsed_ms: Optional[float]) -> None:
+        with self._lock:
+            self._latency_ms[source] = (
+                float("inf") if elapsed_ms is None else elapsed_ms
+            )
+
+    def get(self, source: str) -> Optional[float]:
+        with self._lock:
+            return self._latency_ms.get(source)
+
+    def prefer_official(self) -> bool:
+        with self._lock:
+            official = self._latency_ms.get("mojang")
+            mirror = self._latency_ms.get("bmclapi")
+        if official is None or official >= self.OFFICIAL_THRESHOLD_MS:
+            return False
+        return mirror is None or official <= mirror
+
+
+_source_latency = SourceLatencyTracker()
+
+
 class MinecraftDownloader:
     """Minecraft下载器 - 基于littledl"""
 
@@ -234,12 +412,16 @@ class MinecraftDownloader:
         download_source: DownloadSource = DownloadSource.AUTO,
         version_source: VersionSource = VersionSource.BMCLAPI_FIRST,
         progress_callback: Optional[Callable[[DownloadProgress], None]] = None,
+        offline: bool = False,
     ):
         self.mc_folder = Path(mc_folder).resolve()
         self.config = config or MinecraftDownloadConfig()
         self.download_source = download_source
         self.version_source = version_source
         self.progress_callback = progress_callback
+        # 离线模式：版本列表和版本 JSON 只从元数据缓存读取
+        self.offline = offline
+        self._metadata_cache = MetadataCache.instance()
 
         # 确保目录存在
         self.mc_folder.mkdir(exist_ok=True, parents=True)
@@ -278,10 +460,16 @@ class MinecraftDownloader:
         self._version_manifest_cache: Optional[Dict] = None
         self._version_list_loader_state = "idle"
 
-        # 自动速度检测标志（响应时间 < 4000ms 则认为官方源可用）
-        self._prefer_official: bool = False
         self._version_list_load_time: float = 0
 
+        # 时间线记录，仅在 download_version 传入 trace_path 时启用
+        self._trace = TraceRecorder(enabled=False)
+
+    @property
+    def _prefer_official(self) -> bool:
+        """自动速度检测结果，进程内所有下载器共享"""
+        return _source_latency.prefer_official()
+
     def _standardize_version_id(self, version_id: str) -> str:
         """标准化版本ID
 
@@ -319,21 +507,52 @@ class MinecraftDownloader:
                 h.update(data)
         return h.hexdigest()
 
-    def _should_skip(self, net_file: NetFile) -> Tuple[bool, str]:
-        """检查是否跳过文件"""
+    def _interrupted_paths(self, journal: BatchJournal) -> Set[str]:
+        """读取之前的安装中断时正在下载的文件，返回规范化路径集合"""
+        paths = journal.in_flight()
+        if paths:
+            previous = journal.previous_install
+            label = previous[1] if previous and previous[1] else "未知"
+            self.logger.info(
+                f"检测到未完成的安装（{label}），{len(paths)} 个文件需校验后才能跳过"
+            )
+        return {os.path.normcase(os.path.abspath(path)) for path in paths}
+
+    def _should_skip(
+        self,
+        net_file: NetFile,
+        journal: Optional[BatchJournal] = None,
+        receipt: Optional[InstallReceipt] = None,
+        interrupted: Optional[Set[str]] = None,
+    ) -> Tuple[bool, str]:
+        """检查是否跳过文件
+
+        安装回执或日志中记录为已校验且大小、修改时间未变的文件直接跳过，不再重新计算哈希。
+        interrupted 中的文件（规范化路径）在上次安装中断时正在写入，只有哈希一致才跳过
+        """
         p = Path(net_file.local_path)
         if not p.exists():
             return False, ""
+        partial = bool(interrupted) and os.path.normcase(os.path.abspath(p)) in interrupted
         try:
+            if not partial:
+                if receipt is not None and receipt.matches(p, net_file.check_hash):
+                    return True, "与安装回执一致"
+                if journal is not None and journal.is_verified(p, net_file.check_hash):
+                    return True, "日志记录已验证"
+            elif not net_file.check_hash:
+                return False, ""
             size_ok = (net_file.min_size == 0) or (
                 p.stat().st_size >= net_file.min_size
             )
             if not size_ok:
                 return False, ""
-            if net_file.check_hash and self.config.verify_hash:
+            if net_file.check_hash and (self.config.verify_hash or partial):
                 local_hash = self._hash_file(p, "sha1")
                 if local_hash.lower() != net_file.check_hash.lower():
                     return False, ""
+                if journal is not None:
+                    journal.record_completed(p, local_hash, verified=True)
             return True, "已存在且验证通过"
         except Exception:
             return False, ""
@@ -390,71 +609,151 @@ class MinecraftDownloader:
         if is_special_mod_url:
             return [mirror_url]
 
-        if self.download_source == DownloadSource.BMCLAPI_FIRST:
+        return self._order_sources(original_url, mirror_url)
+
+    def _order_sources(self, original_url: str, mirror_url: str) -> List[str]:
+        """按下载源设置排列官方地址和镜像地址；仅用单一来源时不提供备用源"""
+        if self.download_source in (
+            DownloadSource.BMCLAPI_FIRST,
+            DownloadSource.MIRROR_FIRST,
+        ):
             return [mirror_url, original_url]
         elif self.download_source == DownloadSource.OFFICIAL_FIRST:
             return [original_url, mirror_url]
+        elif self.download_source == DownloadSource.MIRROR_ONLY:
+            return [mirror_url]
+        elif self.download_source == DownloadSource.OFFICIAL_ONLY:
+            return [original_url]
         else:  # AUTO
             if self._prefer_official:
                 return [original_url, mirror_url]
             else:
                 return [mirror_url, original_url]
 
-    def get_version_manifest(self) -> Dict:
+    def get_version_manifest(
+        self,
+        stale_while_revalidate: bool = False,
+        on_refresh: Optional[Callable[[Dict], None]] = None,
+    ) -> Dict:
         """获取版本列表
 
-        根据PCL逻辑：
-        1. 先测试Mojang源响应时间
-        2. 如果 < 4000ms，则优先使用官方源
-        3. 否则使用BMCLAPI镜像源
+        stale_while_revalidate=True 且有缓存时立即返回缓存的版本列表，同时在后台
+        重新验证；内容有变化时以新的版本列表调用 on_refresh。离线模式只读缓存。
         """
-        mojang_url = self.mirrors["mojang"]["version_list"]
-        bmclapi_url = self.mirrors["bmclapi"]["version_list"]
+        if self.offline:
+            cached = self._latest_cached_manifest()
+            if cached is None:
+                raise MetadataCacheMiss("版本列表尚未缓存，无法在离线模式下获取")
+            data = cached.json()
+            self._version_manifest_cache = data
+            self._version_list_loader_state = "completed"
+            return data
+
+        if stale_while_revalidate:
+            cached = self._latest_cached_manifest()
+            if cached is not None:
+                data = cached.json()
+                self._version_manifest_cache = data
 
-        # 先测试Mojang官方源的响应时间
-        try:
-            start_time = time.time()
-            response = self._session.get(mojang_url, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+                def revalidate():
+                    try:
+                        fresh = self._fetch_version_list()
+                    except Exception as e:
+                        self.logger.warning(f"后台刷新版本列表失败: {e}")
+                        return
+                    if fresh != data and on_refresh:
+                        on_refresh(fresh)
+
+                threading.Thread(
+                    target=revalidate, name="manifest-revalidate", daemon=True
+                ).start()
+                return data
 
-            versions = data.get("versions", [])
-            if len(versions) >= 200:
-                elapsed_ms = (time.time() - start_time) * 1000
-                self._prefer_official = elapsed_ms < 4000
-                self._version_list_load_time = elapsed_ms
+        return self._fetch_version_list()
 
-                self.logger.info(
-                    f"Mojang官方源加载耗时：{elapsed_ms:.0f}ms，"
-                    f"{'可优先使用官方源' if self._prefer_official else '将使用BMCLAPI镜像源'}"
-                )
+    def _latest_cached_manifest(self) -> Optional[CachedResponse]:
+        entries = [
+            self._metadata_cache.get(self.mirrors[source]["version_list"])
+            for source in ("mojang", "bmclapi")
+        ]
+        entries = [entry for entry in entries if entry is not None]
+        return max(entries, key=lambda entry: entry.fetched_at) if entries else None
 
-                self._version_manifest_cache = data
-                self._version_list_loader_state = "completed"
-                return data
-        except Exception as e:
-            self.logger.warning(f"Mojang官方源获取失败: {e}")
+    def _fetch_version_list(self) -> Dict:
+        """联网获取版本列表（经元数据缓存做条件请求）
 
-        # Mojang失败，尝试BMCLAPI镜像
-        try:
-            response = self._session.get(bmclapi_url, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+        官方源与 BMCLAPI 同时请求，先返回有效版本列表的一方胜出，不再等官方源
+        超时后才回退镜像。落后的一方在后台继续完成，两边的耗时都计入
+        SourceLatencyTracker，决定本进程内 AUTO 模式是否优先官方源。
+        """
+        sources = {
+            "mojang": self.mirrors["mojang"]["version_list"],
+            "bmclapi": self.mirrors["bmclapi"]["version_list"],
+        }
+        executor = ThreadPoolExecutor(
+            max_workers=len(sources), thread_name_prefix="manifest-race"
+        )
+        futures = {
+            executor.submit(self._fetch_version_list_from, source, url): source
+            for source, url in sources.items()
+        }
+        # 不等待落后的请求，它在后台完成后只更新耗时统计
+        executor.shutdown(wait=False)
 
-            versions = data.get("versions", [])
-            if len(versions) >= 200:
-                self._prefer_official = False
-                self._version_list_loader_state = "completed"
-                return data
-        except Exception as e:
-            self.logger.warning(f"BMCLAPI镜像源获取失败: {e}")
+        stale: Optional[CachedResponse] = None
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                response, data, elapsed_ms = future.result()
+            except Exception as e:
+                self.logger.warning(f"版本列表源 {source} 获取失败: {e}")
+                continue
+            if not response.revalidated:
+                # 请求失败后回退到的旧缓存，留作两边都失败时的兜底
+                if stale is None or response.fetched_at > stale.fetched_at:
+                    stale = response
+                continue
+            if len(data.get("versions", [])) < 200:
+                continue
+
+            self._version_list_load_time = elapsed_ms
+            self.logger.info(
+                f"版本列表由 {source} 率先返回，耗时 {elapsed_ms:.0f}ms，"
+                f"{'可优先使用官方源' if self._prefer_official else '将使用BMCLAPI镜像源'}"
+            )
+            self._version_manifest_cache = data
+            self._version_list_loader_state = "completed"
+            return data
+
+        if stale is not None:
+            # 两个源都不可用，使用较新的那份旧缓存
+            data = stale.json()
+            self._version_manifest_cache = data
+            self._version_list_loader_state = "completed"
+            return data
 
         raise Exception("无法获取版本列表")
 
+    def _fetch_version_list_from(
+        self, source: str, url: str
+    ) -> Tuple[CachedResponse, Dict, float]:
+        start_time = time.time()
+        try:
+            response = self._metadata_cache.fetch(self._session, url, timeout=30)
+            data = response.json()
+        except Exception:
+            _source_latency.record(source, None)
+            raise
+        elapsed_ms = (time.time() - start_time) * 1000
+        valid = response.revalidated and len(data.get("versions", [])) >= 200
+        _source_latency.record(source, elapsed_ms if valid else None)
+        return response, data, elapsed_ms
+
     def get_version_info(self, version_id: str) -> Dict:
         """获取版本详细信息（处理继承链）"""
         standardized_id = self._standardize_version_id(version_id)
-        manifest = self.get_version_manifest()
+        with self._trace.span("fetch version manifest", "metadata"):
+            manifest = self._version_manifest_cache or self.get_version_manifest()
 
         version_url = None
         for version in manifest.get("versions", []):
@@ -465,22 +764,28 @@ class MinecraftDownloader:
         if not version_url:
             raise Exception(f"找不到版本: {version_id}")
 
-        version_info = self._fetch_version_manifest(version_url)
+        with self._trace.span("fetch version json", "metadata", version=standardized_id):
+            version_info = self._fetch_version_manifest(version_url)
 
         if version_info and "inheritsFrom" in version_info:
             parent_info = self.get_version_info(version_info["inheritsFrom"])
-            version_info = self._merge_version_info(parent_info, version_info)
+            with self._trace.span("merge version json", "metadata", version=standardized_id):
+                version_info = self._merge_version_info(parent_info, version_info)
 
         return version_info
 
     def _fetch_version_manifest(self, version_url: str) -> Dict:
         """获取版本Manifest JSON"""
         urls = self._get_source_urls(version_url)
+        if self.offline:
+            for url in urls:
+                cached = self._metadata_cache.get(url)
+                if cached is not None:
+                    return cached.json()
+            raise MetadataCacheMiss(f"版本 JSON 尚未缓存，无法在离线模式下获取: {version_url}")
         for url in urls:
             try:
-                response = self._session.get(url, timeout=15)
-                response.raise_for_status()
-                return response.json()
+                return self._metadata_cache.fetch(self._session, url, timeout=15).json()
             except Exception:
                 continue
         raise Exception("无法获取版本Manifest")
@@ -646,15 +951,33 @@ class MinecraftDownloader:
             )
             self.progress_callback(progress)
 
-    def _download_batch(self, net_files: List[NetFile]) -> Tuple[bool, List[str]]:
+    def _download_batch(
+        self,
+        net_files: List[NetFile],
+        journal: Optional[BatchJournal] = None,
+        late_files: Optional[Callable[[], Optional[AssetPlan]]] = None,
+        receipt: Optional[InstallReceipt] = None,
+        interrupted: Optional[Set[str]] = None,
+    ) -> Tuple[bool, List[str]]:
         """使用 BatchDownloader 批量下载文件
 
+        Args:
+            net_files: 待下载文件
+            journal: 批次日志，传入时记录每个文件的状态，中断后可据此恢复
+            late_files: 获取资源计划的函数（在线程中调用，如获取并解析资源索引）。
+                net_files 先开始下载，计划中的文件再按下载器排队水位流式加入同一批次
+            receipt: 上次安装的回执，其中大小和 mtime 未变的文件直接跳过
+            interrupted: 上次安装中断时正在下载的文件（见 _interrupted_paths），不按存在与否跳过
+
         Returns:
             Tuple[bool, List[str]]: (是否全部成功, 失败文件列表)
         """
         try:
-            result = asyncio.run(self._async_download_batch(net_files))
-            return result
+            # 在常驻下载引擎的事件循环上运行，复用引擎的连接池，
+            # 而不是每次安装都新建事件循环和连接
+            return DownloadEngine.instance().run(
+                self._async_download_batch(net_files, journal, late_files, receipt, interrupted)
+            )
         except Exception as e:
             self.logger.error(f"批量下载异常: {e}")
             return False, [f.file_name for f in net_files]
@@ -666,15 +989,47 @@ class MinecraftDownloader:
             )
 
     async def _async_download_batch(
-        self, net_files: List[NetFile]
+        self,
+        net_files: List[NetFile],
+        journal: Optional[BatchJournal] = None,
+        late_files: Optional[Callable[[], Optional[AssetPlan]]] = None,
+        receipt: Optional[InstallReceipt] = None,
+        interrupted: Optional[Set[str]] = None,
     ) -> Tuple[bool, List[str]]:
         """异步批量下载实现"""
+        jobs = max(1, self.config.max_concurrent_files)
         downloader = MCBatchDownloader(
-            max_concurrent_files=min(16, len(net_files)),
-            max_total_threads=20,
+            max_concurrent_files=(
+                jobs if late_files else max(1, min(jobs, len(net_files)))
+            ),
+            max_total_threads=max(20, jobs + 4),
+            enable_h2_lane=self.config.enable_h2_lane,
+            timing_trace_path=self.config.timing_trace_path or None,
+            # 已结束的任务不再保留，内存只随排队和进行中的文件增长
+            retain_finished_tasks=False,
         )
+        downloader.set_journal(journal)
+        if self._trace.enabled:
+            downloader.add_timing_listener(self._trace.add_file_timing)
+        engine = DownloadEngine.instance()
+        downloader.set_connection_pool(await engine.get_connection_pool())
+        # 版本安装属于后台任务，用户同时下载模组等单个文件时让出连接
+        engine.register_background_batch(downloader)
+        MetricsService().track_batch(downloader)
 
         failed_files: List[str] = []
+        # 路径 -> 期望 sha1；资源计划中的文件由计划按路径给出，不逐个登记
+        hashes_by_path: Dict[str, str] = {}
+        asset_plan: Optional[AssetPlan] = None
+        # 资源计划中尚未送入下载器的文件，计入进度总数
+        unfed_files = 0
+        unfed_bytes = 0
+
+        def expected_hash_for(path: Path) -> Optional[str]:
+            expected = hashes_by_path.get(os.path.normcase(os.path.abspath(path)))
+            if expected is None and asset_plan is not None:
+                expected = asset_plan.hash_for_path(path)
+            return expected
 
         def batch_progress_callback(progress: BatchProgress):
             """批量下载进度回调"""
@@ -685,16 +1040,17 @@ class MinecraftDownloader:
                 if current
                 else f"下载中... ({progress.completed_files}/{progress.total_files})"
             )
-            total_bytes = getattr(progress, "total_bytes", 0) or 0
+            total_bytes = (getattr(progress, "total_bytes", 0) or 0) + unfed_bytes
             downloaded_bytes = getattr(progress, "downloaded_bytes", 0) or 0
+            total_files = progress.total_files + unfed_files
             self._update_progress(
                 status=status_msg,
                 current=downloaded_bytes,
-                total=total_bytes if total_bytes > 0 else progress.total_files,
+                total=total_bytes if total_bytes > 0 else total_files,
                 speed=getattr(progress, "smooth_speed", 0) or 0,
                 eta=getattr(progress, "eta", 0) or 0,
                 current_file=current.filename if current else "",
-                total_files=progress.total_files,
+                total_files=total_files,
                 finished_files=progress.completed_files,
                 failed_files=getattr(progress, "failed_files", 0) or 0,
                 active_files=getattr(progress, "active_files", 0) or 0,
@@ -702,7 +1058,7 @@ class MinecraftDownloader:
                 elapsed_time=getattr(progress, "elapsed_time", 0.0) or 0.0,
             )
 
-        def file_complete_callback(task: FileTask):
+        async def file_complete_callback(task: FileTask):
             """文件完成回调"""
             filename = task.filename or "unknown"
             if task.status == FileTaskStatus.FAILED:
@@ -710,39 +1066,192 @@ class MinecraftDownloader:
                 failed_files.append(filename)
             elif task.status == FileTaskStatus.COMPLETED:
                 self.logger.info(f"文件下载完成: {filename}")
+                if journal is None or not self.config.verify_hash:
+                    return
+                path = Path(task.save_path) / filename
+                if task.expected_hash and not task.is_existing_reused:
+                    # 下载器已按期望哈希校验过，并把哈希随完成记录写入了日志
+                    return
+                expected = expected_hash_for(path)
+                if not expected:
+                    return
+                local_hash = await asyncio.to_thread(self._hash_file, path, "sha1")
+                if local_hash.lower() == expected.lower():
+                    journal.record_completed(path, local_hash, verified=True)
+                else:
+                    self.logger.warning(f"文件校验失败: {filename}")
+                    journal.record_failed(path, "sha1 mismatch")
+                    failed_files.append(filename)
 
         downloader.set_progress_callback(batch_progress_callback)
         downloader.set_file_complete_callback(file_complete_callback)
 
+        precreated = 0
         added_count = 0
         skipped_count = 0
-        for net_file in net_files:
-            if self._cancelled.is_set():
-                await downloader.cancel()
-                return False, failed_files
 
-            skip, reason = self._should_skip(net_file)
-            if skip:
-                self.logger.info(f"跳过: {net_file.file_name} - {reason}")
-                skipped_count += 1
-                continue
+        def check_skips(batch: List[NetFile]) -> List[Tuple[bool, str]]:
+            return [self._should_skip(f, journal, receipt, interrupted) for f in batch]
+
+        async def enqueue(
+            files: Iterable[NetFile], parent_dirs: List[Path], streaming: bool = False
+        ) -> bool:
+            """把文件加入批次（已完成的跳过），被取消时返回 False
+
+            streaming 为 True 时批次已在运行，按排队水位逐个生成并加入，
+            下载任务只为即将开始下载的文件创建
+            """
+            nonlocal precreated, added_count, skipped_count, unfed_files, unfed_bytes
+            # 先一次性建好所有不同的父目录（资源文件只有 256 个 objects/xx 目录），
+            # 之后写文件时命中进程级目录缓存，不再逐个文件 mkdir
+            precreated += await asyncio.to_thread(ensure_dirs, parent_dirs)
+            files = iter(files)
+            while True:
+                if self._cancelled.is_set():
+                    await downloader.cancel()
+                    return False
+                if streaming and downloader.backlog >= PLAN_FEED_HIGH_WATERMARK:
+                    await downloader.wait_for_backlog_below(PLAN_FEED_LOW_WATERMARK)
+
+                batch = list(itertools.islice(files, SKIP_CHECK_BATCH))
+                if not batch:
+                    break
+                if streaming:
+                    unfed_files -= len(batch)
+                    unfed_bytes -= sum(net_file.min_size for net_file in batch)
+                else:
+                    for net_file in batch:
+                        if net_file.check_hash:
+                            key = os.path.normcase(os.path.abspath(net_file.local_path))
+                            hashes_by_path[key] = net_file.check_hash
+
+                # 跳过判断会 stat 文件，没有回执和日志记录时还要计算 sha1，
+                # 放到线程里按批进行，不阻塞引擎事件循环上正在进行的下载
+                decisions = await asyncio.to_thread(check_skips, batch)
+                for net_file, (skip, reason) in zip(batch, decisions):
+                    if skip:
+                        self.logger.info(f"跳过: {net_file.file_name} - {reason}")
+                        skipped_count += 1
+                        continue
 
-            Path(net_file.local_path).parent.mkdir(exist_ok=True, parents=True)
+                    save_path = str(Path(net_file.local_path).parent)
+                    filename = Path(net_file.local_path).name
+                    await downloader.add_url(
+                        net_file.urls[0],
+                        save_path,
+                        filename,
+                        backup_urls=net_file.urls[1:] or None,
+                        # 只有精确大小才交给下载器：已知大小的小文件会跳过 HEAD 走轻量路径，
+                        # 下限值会让大文件被误当成小文件
+                        size=net_file.size or None,
+                        expected_hash=net_file.check_hash if self.config.verify_hash else None,
+                    )
+                    added_count += 1
+                # 批次运行中时让出事件循环，已加入的文件边加边下载
+                await asyncio.sleep(0)
 
-            save_path = str(Path(net_file.local_path).parent)
-            filename = Path(net_file.local_path).name
-            await downloader.add_url(net_file.urls[0], save_path, filename)
-            added_count += 1
+            if not streaming:
+                self._update_progress(
+                    status=f"开始下载 {added_count} 个文件 ({skipped_count} 个跳过)...",
+                    total_files=len(net_files),
+                    finished_files=skipped_count,
+                )
+            return True
 
-        total_to_download = len(net_files)
-        self._update_progress(
-            status=f"开始下载 {added_count} 个文件 ({skipped_count} 个跳过)...",
-            total_files=total_to_download,
-            finished_files=skipped_count,
-        )
-        await downloader.start()
+        eager_dirs = [Path(f.local_path).parent for f in net_files]
 
-        return len(failed_files) == 0, failed_files
+        try:
+            if late_files is None:
+                if not await enqueue(net_files, eager_dirs):
+                    return False, failed_files
+                await downloader.start()
+            else:
+                # 流水线：已知文件立即开始下载，同时在线程中获取资源计划，
+                # 下载通道在规划期间不空闲；输入关闭且队列清空后批次才结束
+                downloader.open_input()
+                if not await enqueue(net_files, eager_dirs):
+                    downloader.close_input()
+                    return False, failed_files
+                run = asyncio.create_task(downloader.start())
+                try:
+                    try:
+                        asset_plan = await asyncio.to_thread(late_files)
+                    except Exception as e:
+                        # 已开始的客户端和库文件照常下完，但批次记为失败
+                        self.logger.error(f"获取资源索引失败: {e}")
+                        self.last_error = f"获取资源索引失败: {e}"
+                        failed_files.append("资源索引")
+                        asset_plan = None
+                    if asset_plan is not None:
+                        unfed_files = len(asset_plan)
+                        unfed_bytes = asset_plan.total_bytes
+                        if not await enqueue(
+                            asset_plan, asset_plan.parent_dirs(), streaming=True
+                        ):
+                            return False, failed_files
+                finally:
+                    downloader.close_input()
+                    await run
+
+            fs_ops = downloader.get_fs_op_stats()
+            self.logger.debug(
+                f"目录操作: 预建 {precreated} 次, 下载中 mkdir {fs_ops['mkdir_calls']} 次, "
+                f"命中缓存 {fs_ops['mkdir_skipped']} 次"
+            )
+            timing = downloader.get_timing_stats()
+            phases = ", ".join(
+                f"{phase} p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms"
+                for phase, stats in timing["phases"].items()
+            )
+            self.logger.debug(
+                f"分阶段耗时: {phases or '无'}; "
+                f"事件循环延迟 p99={timing['loop_lag']['p99_ms']}ms"
+            )
+
+            return len(failed_files) == 0, failed_files
+        finally:
+            engine.unregister_background_batch(downloader)
+            MetricsService().release_batch(downloader)
+            # 共享连接池归引擎所有，这里只停止本批次的后台任务
+            await downloader.stop()
+
+    def _load_asset_index(
+        self, index_url: str, index_hash: Optional[str], index_path: Path
+    ) -> AssetPlan:
+        """获取资源索引并解析为列式的资源计划
+
+        本地索引的 sha1 与版本 JSON 一致时直接读取，不发任何请求；否则经下载引擎
+        按镜像顺序下载一次并保存到 assets/indexes，不再另行请求一遍。
+        """
+        if not (
+            index_path.exists()
+            and index_hash
+            and self._hash_file(index_path, "sha1").lower() == index_hash.lower()
+        ):
+            urls = self._get_source_urls(index_url)
+            # 全新的游戏目录里还没有 assets/indexes；保存目录不存在时下载器会把它当作
+            # 目标文件名，索引就会被写成一个名为 indexes 的文件
+            index_dir = index_path.parent
+            if index_dir.is_file():
+                index_dir.unlink()
+            index_dir.mkdir(parents=True, exist_ok=True)
+            job = DownloadEngine.instance().submit_file(
+                urls[0],
+                str(index_dir),
+                index_path.name,
+                backup_urls=urls[1:] or None,
+                expected_sha1=index_hash,
+                name=f"资源索引 {index_path.stem}",
+                lane=BACKGROUND_LANE,
+            )
+            job.result()
+        # 各下载源的资源地址前缀，按当前源的优先顺序
+        base_urls = self._get_source_urls(
+            f"{self.mirrors['mojang']['asset_base']}/", is_asset=True
+        )
+        return AssetPlan.from_index(
+            index_path.read_bytes(), self.mc_folder / "assets" / "objects", base_urls
+        )
 
     def download_version(
         self,
@@ -750,29 +1259,114 @@ class MinecraftDownloader:
         cancel_event: Optional[threading.Event] = None,
         custom_name: Optional[str] = None,
         target_dir: Optional[str] = None,
+        trace_path: Optional[str] = None,
+    ) -> bool:
+        """下载Minecraft版本
+
+        trace_path 不为空时，把整个安装过程（元数据获取、下载计划、逐文件下载）
+        导出为 Trace Event Format JSON，可在 chrome://tracing 或 Perfetto 中查看
+        """
+        self._trace = TraceRecorder(f"install {version_id}", enabled=bool(trace_path))
+        try:
+            with self._trace.span("download_version", version=version_id):
+                return self._download_version(version_id, cancel_event, custom_name, target_dir)
+        finally:
+            if trace_path and self._trace.save(trace_path):
+                self.logger.info(f"安装时间线已导出: {trace_path}")
+            self._trace = TraceRecorder(enabled=False)
+
+    def _watch_cancel(self, cancel_event: Optional[threading.Event]) -> None:
+        """监听外部取消事件"""
+        if not cancel_event:
+            return
+
+        def check_cancel():
+            while not cancel_event.is_set():
+                time.sleep(0.1)
+            self._cancelled.set()
+
+        threading.Thread(target=check_cancel, daemon=True).start()
+
+    def _version_folder(self, version_name: str, target_dir: Optional[str]) -> Path:
+        if target_dir:
+            return Path(target_dir) / version_name
+        return self.mc_folder / "versions" / version_name
+
+    def _collect_version_files(
+        self, version_info: Dict, version_folder: Path, version_name: str
+    ) -> List[NetFile]:
+        """版本 JSON 中的客户端 JAR 和库文件（资源文件见资源计划）"""
+        net_files: List[NetFile] = []
+
+        # 客户端JAR
+        client_info = version_info.get("downloads", {}).get("client")
+        if client_info:
+            client_url = client_info.get("url")
+            client_hash = client_info.get("sha1")
+            client_size = client_info.get("size", 0)
+            client_path = version_folder / f"{version_name}.jar"
+            net_files.append(
+                NetFile(
+                    urls=self._get_source_urls(client_url),
+                    local_path=str(client_path),
+                    check_hash=client_hash,
+                    min_size=client_size if client_size > 0 else 1024 * 100,
+                    file_name=f"{version_name}.jar",
+                    size=max(client_size, 0),
+                )
+            )
+
+        # 库文件
+        libraries = version_info.get("libraries", [])
+        for lib in libraries:
+            downloads = lib.get("downloads", {})
+            artifact = downloads.get("artifact")
+            if artifact:
+                lib_name = lib.get("name", "")
+                if not lib_name:
+                    continue
+                parts = lib_name.split(":")
+                if len(parts) < 3:
+                    continue
+                group, name, version = parts[:3]
+                path_parts = group.split(".") + [name, version]
+                filename = f"{name}-{version}.jar"
+                if len(parts) > 3:
+                    filename = f"{name}-{version}-{parts[3]}.jar"
+                local_path = (
+                    self.mc_folder / "libraries" / os.path.join(*path_parts) / filename
+                )
+                url = artifact.get("url")
+                hash_value = artifact.get("sha1")
+                size = artifact.get("size", 0)
+                net_files.append(
+                    NetFile(
+                        urls=self._get_source_urls(url, is_library=True),
+                        local_path=str(local_path),
+                        check_hash=hash_value,
+                        min_size=size if size > 0 else 1024,
+                        file_name=filename,
+                        size=max(size, 0),
+                    )
+                )
+        return net_files
+
+    def _download_version(
+        self,
+        version_id: str,
+        cancel_event: Optional[threading.Event],
+        custom_name: Optional[str],
+        target_dir: Optional[str],
     ) -> bool:
-        """下载Minecraft版本"""
         try:
             self.last_error = ""
             # 设置取消事件
-            if cancel_event:
-                # 监听取消事件
-                def check_cancel():
-                    while not cancel_event.is_set():
-                        time.sleep(0.1)
-                    self._cancelled.set()
-
-                threading.Thread(target=check_cancel, daemon=True).start()
+            self._watch_cancel(cancel_event)
 
             version_info = self.get_version_info(version_id)
 
             # 确定版本目录
-            if target_dir:
-                version_folder = Path(target_dir) / (custom_name or version_id)
-            else:
-                version_folder = (
-                    self.mc_folder / "versions" / (custom_name or version_id)
-                )
+            version_folder = self._version_folder(custom_name or version_id, target_dir)
 
             version_folder.mkdir(exist_ok=True, parents=True)
 
@@ -782,118 +1376,68 @@ class MinecraftDownloader:
                 json.dump(version_info, f, indent=2)
 
             # 收集所有需要下载的文件
-            net_files: List[NetFile] = []
-
-            # 客户端JAR
-            client_info = version_info.get("downloads", {}).get("client")
-            if client_info:
-                client_url = client_info.get("url")
-                client_hash = client_info.get("sha1")
-                client_size = client_info.get("size", 0)
-                client_path = version_folder / f"{custom_name or version_id}.jar"
-                net_files.append(
-                    NetFile(
-                        urls=self._get_source_urls(client_url),
-                        local_path=str(client_path),
-                        check_hash=client_hash,
-                        min_size=1024 * 100,
-                        file_name=f"{custom_name or version_id}.jar",
-                    )
-                )
-
-            # 库文件
-            libraries = version_info.get("libraries", [])
-            for lib in libraries:
-                downloads = lib.get("downloads", {})
-                artifact = downloads.get("artifact")
-                if artifact:
-                    lib_name = lib.get("name", "")
-                    if not lib_name:
-                        continue
-                    parts = lib_name.split(":")
-                    if len(parts) < 3:
-                        continue
-                    group, name, version = parts[:3]
-                    path_parts = group.split(".") + [name, version]
-                    filename = f"{name}-{version}.jar"
-                    if len(parts) > 3:
-                        filename = f"{name}-{version}-{parts[3]}.jar"
-                    local_path = (
-                        self.mc_folder
-                        / "libraries"
-                        / os.path.join(*path_parts)
-                        / filename
-                    )
-                    url = artifact.get("url")
-                    hash_value = artifact.get("sha1")
-                    size = artifact.get("size", 0)
-                    net_files.append(
-                        NetFile(
-                            urls=self._get_source_urls(url, is_library=True),
-                            local_path=str(local_path),
-                            check_hash=hash_value,
-                            min_size=size if size > 0 else 1024,
-                            file_name=filename,
-                        )
-                    )
+            plan_started = time.time()
+            net_files = self._collect_version_files(
+                version_info, version_folder, custom_name or version_id
+            )
 
-            # 资源文件
+            # 资源文件：资源索引在批次运行期间获取，客户端和库文件不必等它
             asset_index = version_info.get("assetIndex")
+            load_assets: Optional[Callable[[], Optional[AssetPlan]]] = None
+            asset_plans: List[AssetPlan] = []
             if asset_index:
                 index_url = asset_index.get("url")
                 index_hash = asset_index.get("sha1")
                 index_id = asset_index.get("id")
                 index_path = self.mc_folder / "assets" / "indexes" / f"{index_id}.json"
-                net_files.append(
-                    NetFile(
-                        urls=self._get_source_urls(index_url, is_asset=True),
-                        local_path=str(index_path),
-                        check_hash=index_hash,
-                        min_size=1024,
-                        file_name=f"{index_id}.json",
-                    )
-                )
 
-                # 获取资源对象
-                try:
-                    resp = self._session.get(index_url, timeout=15)
-                    resp.raise_for_status()
-                    assets = resp.json().get("objects", {})
-                    for asset_path, asset_info in assets.items():
-                        asset_hash = asset_info.get("hash")
-                        if not asset_hash:
-                            continue
-                        hash_dir = asset_hash[:2]
-                        local_asset_path = (
-                            self.mc_folder
-                            / "assets"
-                            / "objects"
-                            / hash_dir
-                            / asset_hash
-                        )
-                        asset_url = f"{self.mirrors['mojang']['asset_base']}/{hash_dir}/{asset_hash}"
-                        net_files.append(
-                            NetFile(
-                                urls=self._get_source_urls(asset_url, is_asset=True),
-                                local_path=str(local_asset_path),
-                                check_hash=asset_hash,
-                                min_size=asset_info.get("size", 0),
-                                file_name=asset_hash,
-                            )
-                        )
-                except Exception as e:
-                    self.logger.warning(f"获取资源索引失败: {e}")
+                def load_assets() -> Optional[AssetPlan]:
+                    # 获取资源对象；失败时抛出，由批次记为失败，不能当作没有资源
+                    with self._trace.span(
+                        "fetch asset index", "metadata", id=index_id
+                    ) as span_args:
+                        plan = self._load_asset_index(index_url, index_hash, index_path)
+                        span_args["objects"] = len(plan)
+                    asset_plans.append(plan)
+                    return plan
 
             # 下载所有文件（使用 BatchDownloader）
             total_files = len(net_files)
+            self._trace.add_complete(
+                "build plan", "plan", plan_started, time.time(), args={"files": total_files}
+            )
 
             self._update_progress(
                 status="准备下载...", total_files=total_files, finished_files=0
             )
 
-            success, failed_files = self._download_batch(net_files)
+            # 批次日志：上次中断时已完成并校验的文件无需重新哈希；
+            # 重新安装时上次的回执中未改动的文件直接跳过
+            receipt = InstallReceipt.load(version_folder)
+            journal = BatchJournal(
+                version_folder / ".install.journal", label=version_id
+            ).open()
+            try:
+                interrupted = self._interrupted_paths(journal)
+                with self._trace.span("download files", "download") as span_args:
+                    success, failed_files = self._download_batch(
+                        net_files,
+                        journal,
+                        late_files=load_assets,
+                        receipt=receipt,
+                        interrupted=interrupted,
+                    )
+                    # 资源文件在下载过程中才确定
+                    total_files = span_args["files"] = len(net_files) + sum(
+                        len(plan) for plan in asset_plans
+                    )
+            finally:
+                journal.close()
 
-            # 下载完成
+            # 下载完成；有资源索引却没有得到资源计划时不能算安装成功，也不写回执
+            if asset_index and not asset_plans and success and not failed_files:
+                success = False
+                self.last_error = self.last_error or "资源索引未能加载"
             if not success or failed_files:
                 if not self.last_error:
                     self.last_error = f"下载失败文件: {', '.join(failed_files[:3])}"
@@ -907,6 +1451,10 @@ class MinecraftDownloader:
                 )
                 return False
             else:
+                with self._trace.span("write install receipt", files=total_files):
+                    self._write_receipt(
+                        custom_name or version_id, version_folder, json_path, net_files, asset_plans
+                    )
                 self._update_progress(
                     status=f"版本 {version_id} 下载完成",
                     total_files=total_files,
@@ -920,6 +1468,421 @@ class MinecraftDownloader:
             self.logger.exception(f"版本下载异常: version={version_id}")
             return False
 
+    def download_versions(
+        self,
+        version_ids: List[str],
+        cancel_event: Optional[threading.Event] = None,
+        target_dir: Optional[str] = None,
+        trace_path: Optional[str] = None,
+    ) -> Dict[str, bool]:
+        """同时安装多个版本，共用一个下载计划
+
+        各版本的客户端、库文件和资源计划按目标路径（及 sha1）合并去重，共享的库和
+        资源只下载一次，全部文件在同一个批次中下载；完成后再写入各版本的 JSON 和
+        安装回执。返回 版本 -> 是否安装成功。
+        """
+        version_ids = list(dict.fromkeys(version_ids))
+        self._trace = TraceRecorder(
+            f"install {len(version_ids)} versions", enabled=bool(trace_path)
+        )
+        try:
+            with self._trace.span("download_versions", versions=len(version_ids)):
+                return self._download_versions(version_ids, cancel_event, target_dir)
+        finally:
+            if trace_path and self._trace.save(trace_path):
+                self.logger.info(f"安装时间线已导出: {trace_path}")
+            self._trace = TraceRecorder(enabled=False)
+
+    def _download_versions(
+        self,
+        version_ids: List[str],
+        cancel_event: Optional[threading.Event],
+        target_dir: Optional[str],
+    ) -> Dict[str, bool]:
+        results = {version_id: False for version_id in version_ids}
+        if not version_ids:
+            return results
+        try:
+            self.last_error = ""
+            self._watch_cancel(cancel_event)
+
+            # 版本列表只取一次，各版本 JSON 并发获取
+            with self._trace.span("fetch version manifest", "metadata"):
+                if self._version_manifest_cache is None:
+                    self._version_manifest_cache = self.get_version_manifest()
+            infos: Dict[str, Dict] = {}
+            with ThreadPoolExecutor(
+                max_workers=min(8, len(version_ids)), thread_name_prefix="version-json"
+            ) as pool:
+                futures = {
+                    pool.submit(self.get_version_info, version_id): version_id
+                    for version_id in version_ids
+                }
+                for future in as_completed(futures):
+                    version_id = futures[future]
+                    try:
+                        infos[version_id] = future.result()
+                    except Exception as e:
+                        self.logger.warning(f"获取版本信息失败: {version_id}, {e}")
+            if not infos:
+                self.last_error = "无法获取任何版本的信息"
+                return results
+
+            # 合并下载计划：同一路径只下载一次，sha1 不一致时保留先出现的版本的文件
+            plan_started = time.time()
+            version_files: Dict[str, List[NetFile]] = {}
+            merged: Dict[str, NetFile] = {}
+            asset_indexes: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+            version_asset_ids: Dict[str, str] = {}
+            for version_id in version_ids:
+                version_info = infos.get(version_id)
+                if version_info is None:
+                    continue
+                version_folder = self._version_folder(version_id, target_dir)
+                version_folder.mkdir(exist_ok=True, parents=True)
+                files = self._collect_version_files(version_info, version_folder, version_id)
+                version_files[version_id] = files
+                for net_file in files:
+                    key = os.path.normcase(os.path.abspath(net_file.local_path))
+                    existing = merged.get(key)
+                    if existing is None:
+                        merged[key] = net_file
+                    elif (
+                        existing.check_hash
+                        and net_file.check_hash
+                        and existing.check_hash.lower() != net_file.check_hash.lower()
+                    ):
+                        self.logger.warning(
+                            f"{version_id} 的 {net_file.file_name} 与其他版本 sha1 不一致，"
+                            "使用先出现的版本"
+                        )
+                asset_index = version_info.get("assetIndex")
+                if asset_index:
+                    index_id = asset_index.get("id")
+                    asset_indexes.setdefault(
+                        index_id, (asset_index.get("url"), asset_index.get("sha1"))
+                    )
+                    version_asset_ids[version_id] = index_id
+            net_files = list(merged.values())
+
+            # 资源索引按 id 去重，批次运行期间并发获取后合并为一个资源计划
+            asset_plans: Dict[str, AssetPlan] = {}
+
+            def load_index(index_id: str) -> None:
+                index_url, index_hash = asset_indexes[index_id]
+                index_path = self.mc_folder / "assets" / "indexes" / f"{index_id}.json"
+                try:
+                    with self._trace.span(
+                        "fetch asset index", "metadata", id=index_id
+                    ) as span_args:
+                        plan = self._load_asset_index(index_url, index_hash, index_path)
+                        span_args["objects"] = len(plan)
+                except Exception as e:
+                    # 只让使用该索引的版本失败，其他索引的资源照常下载
+                    self.logger.error(f"获取资源索引失败: {index_id}, {e}")
+                    self.last_error = f"获取资源索引失败: {index_id}, {e}"
+                    return
+                asset_plans[index_id] = plan
+
+            def load_assets() -> Optional[AssetPlan]:
+                with ThreadPoolExecutor(
+                    max_workers=len(asset_indexes), thread_name_prefix="asset-index"
+                ) as pool:
+                    list(pool.map(load_index, asset_indexes))
+                if not asset_plans:
+                    return None
+                return AssetPlan.merge(list(asset_plans.values()))
+
+            self._trace.add_complete(
+                "build plan",
+                "plan",
+                plan_started,
+                time.time(),
+                args={
+                    "versions": len(version_files),
+                    "files": len(net_files),
+                    "deduplicated": sum(map(len, version_files.values())) - len(net_files),
+                },
+            )
+            self._update_progress(
+                status="准备下载...", total_files=len(net_files), finished_files=0
+            )
+
+            # 各版本上次的安装回执合并后用于跳过判断；批次日志放在游戏目录下，各版本共用
+            receipt: Optional[InstallReceipt] = None
+            for version_id in version_files:
+                previous = InstallReceipt.load(self._version_folder(version_id, target_dir))
+                if previous is None:
+                    continue
+                if receipt is None:
+                    receipt = previous
+                else:
+                    receipt.extend(previous)
+            journal = BatchJournal(
+                self.mc_folder / "versions" / ".install.journal",
+                label=",".join(version_files),
+            ).open()
+            try:
+                with self._trace.span("download files", "download") as span_args:
+                    success, failed_files = self._download_batch(
+                        net_files,
+                        journal,
+                        late_files=load_assets if asset_indexes else None,
+                        receipt=receipt,
+                        interrupted=self._interrupted_paths(journal),
+                    )
+                    total_files = span_args["files"] = len(net_files) + sum(
+                        len(plan) for plan in asset_plans.values()
+                    )
+            finally:
+                journal.close()
+
+            # 按版本归属失败文件，未受影响的版本照常写入 JSON 和回执
+            failed = set(failed_files)
+            for version_id, files in version_files.items():
+                index_id = version_asset_ids.get(version_id)
+                plan = asset_plans.get(index_id) if index_id else None
+                if index_id and plan is None:
+                    # 资源索引没有加载，资源文件一个都没下载，该版本安装失败
+                    continue
+                plan_files = [plan] if plan is not None else []
+                broken = any(f.file_name in failed for f in itertools.chain(files, *plan_files))
+                if broken or self._cancelled.is_set():
+                    continue
+                version_folder = self._version_folder(version_id, target_dir)
+                json_path = version_folder / f"{version_id}.json"
+                with open(json_path, "w", encoding="utf-8") as f:
+                    json.dump(infos[version_id], f, indent=2)
+                with self._trace.span("write install receipt", version=version_id):
+                    self._write_receipt(version_id, version_folder, json_path, files, plan_files)
+                results[version_id] = True
+
+            installed = [version_id for version_id, ok in results.items() if ok]
+            if not success or len(installed) < len(version_ids):
+                if not self.last_error:
+                    self.last_error = (
+                        f"{len(version_ids) - len(installed)} 个版本未完成安装，"
+                        f"失败文件: {', '.join(failed_files[:3])}"
+                    )
+                self.logger.error(
+                    f"多版本安装未全部成功: installed={installed}, failed_count={len(failed_files)}"
+                )
+            self._update_progress(
+                status=f"{len(installed)}/{len(version_ids)} 个版本下载完成",
+                total_files=total_files,
+                finished_files=total_files - len(failed_files),
+            )
+            return results
+
+        except Exception as e:
+            self.last_error = f"下载失败: {str(e)}"
+            self._update_progress(status=self.last_error)
+            self.logger.exception(f"多版本下载异常: versions={version_ids}")
+            return results
+
+    def _write_receipt(
+        self,
+        version_name: str,
+        version_folder: Path,
+        json_path: Path,
+        net_files: List[NetFile],
+        asset_plans: List[AssetPlan],
+    ) -> None:
+        """安装成功后记录全部文件的路径、大小、sha1 和 mtime
+
+        之后的跳过判断、启动检查和 verify_version 都信任回执，只能在资源计划已加载、
+        计划中的文件全部完成后调用
+        """
+        files = itertools.chain(net_files, *asset_plans)
+        receipt = InstallReceipt.build(
+            version_name,
+            json_path,
+            self.mc_folder,
+            ((f.local_path, f.check_hash) for f in files),
+        )
+        if receipt.save(version_folder):
+            self.logger.debug(f"安装回执已写入: {version_name}, {len(receipt)} 个文件")
+
+    # -------------------- 校验与修复 --------------------
+    def _read_installed_version(self, version_folder: Path, version_name: str) -> Dict:
+        """读取已安装版本的 JSON，有 inheritsFrom 时与同级目录中的父版本合并"""
+        with open(version_folder / f"{version_name}.json", "rb") as f:
+            version_info = orjson.loads(f.read())
+        parent = version_info.get("inheritsFrom")
+        if parent:
+            parent_info = self._read_installed_version(version_folder.parent / parent, parent)
+            version_info = self._merge_version_info(parent_info, version_info)
+        return version_info
+
+    def verify_version(
+        self, version_name: str, deep: bool = False, target_dir: Optional[str] = None
+    ) -> VerifyReport:
+        """校验已安装的版本，不下载任何游戏文件
+
+        按合并后的版本 JSON 和资源索引列出应有的文件：
+        - 快速校验：只看文件是否存在、大小是否足够，以及大小、mtime 是否与安装回执
+          （没有回执时为安装日志）中的记录一致；记录之后被改动过的文件才计算哈希
+        - 深度校验（deep=True）：所有文件按 CPU 核数并行计算 sha1，结果写回安装日志，
+          之后的快速校验和安装可以直接信任这些文件
+        """
+        started = time.time()
+        version_folder = self._version_folder(version_name, target_dir)
+        version_info = self._read_installed_version(version_folder, version_name)
+        report = VerifyReport(version=version_name, deep=deep)
+
+        files: Iterable[NetFile] = self._collect_version_files(
+            version_info, version_folder, version_name
+        )
+        asset_index = version_info.get("assetIndex")
+        if asset_index:
+            index_path = self.mc_folder / "assets" / "indexes" / f"{asset_index.get('id')}.json"
+            plan = self._load_asset_index(asset_index.get("url"), asset_index.get("sha1"), index_path)
+            files = itertools.chain(files, plan)
+
+        receipt = InstallReceipt.load(version_folder)
+        receipt_changed = False
+        journal = BatchJournal(version_folder / ".install.journal").open()
+        try:
+            to_hash: List[NetFile] = []
+            for net_file in files:
+                report.checked += 1
+                try:
+                    stat = os.stat(net_file.local_path)
+                except OSError:
+                    report.missing.append(net_file)
+                    continue
+                if stat.st_size < net_file.min_size:
+                    report.corrupt.append(net_file)
+                    journal.record_failed(net_file.local_path, "verify: size mismatch")
+                    continue
+                if not net_file.check_hash:
+                    continue
+                if deep:
+                    to_hash.append(net_file)
+                    continue
+                if receipt is not None and receipt.lookup(net_file.local_path) is not None:
+                    if not receipt.matches(net_file.local_path, net_file.check_hash, stat):
+                        to_hash.append(net_file)
+                    continue
+                entry = journal.get_entry(net_file.local_path)
+                if entry is not None and not journal.is_verified(
+                    net_file.local_path, net_file.check_hash
+                ):
+                    # 安装后被改动过，或上次未完成
+                    to_hash.append(net_file)
+
+            self._update_progress(
+                status=f"校验中: 0/{len(to_hash)}", total_files=len(to_hash), finished_files=0
+            )
+            workers = min(32, os.cpu_count() or 4)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verify") as pool:
+                digests = pool.map(sha1_of_file, [f.local_path for f in to_hash])
+                for index, (net_file, digest) in enumerate(zip(to_hash, digests), 1):
+                    if self._cancelled.is_set():
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        break
+                    report.hashed += 1
+                    if digest is None:
+                        report.missing.append(net_file)
+                    elif digest != net_file.check_hash.lower():
+                        report.corrupt.append(net_file)
+                        journal.record_failed(net_file.local_path, "verify: sha1 mismatch")
+                    else:
+                        report.hashed_bytes += os.path.getsize(net_file.local_path)
+                        journal.record_completed(net_file.local_path, digest, verified=True)
+                        if receipt is not None:
+                            receipt_changed |= receipt.update(net_file.local_path, digest)
+                    if index % 256 == 0:
+                        self._update_progress(
+                            status=f"校验中: {index}/{len(to_hash)}",
+                            total_files=len(to_hash),
+                            finished_files=index,
+                        )
+        finally:
+            journal.close()
+        if receipt_changed:
+            receipt.save(version_folder)
+
+        report.elapsed = time.time() - started
+        self.logger.info(
+            f"版本校验完成: version={version_name}, deep={deep}, files={report.checked}, "
+            f"hashed={report.hashed} ({report.hashed_bytes / 1024 / 1024:.1f}MB), "
+            f"missing={len(report.missing)}, corrupt={len(report.corrupt)}, "
+            f"elapsed={report.elapsed:.2f}s"
+        )
+        return report
+
+    def repair_version(
+        self,
+        version_name: str,
+        deep: bool = False,
+        target_dir: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> bool:
+        """校验已安装的版本，只重新下载缺失或损坏的文件"""
+        self.last_error = ""
+        self._watch_cancel(cancel_event)
+        try:
+            report = self.verify_version(version_name, deep=deep, target_dir=target_dir)
+        except Exception as e:
+            self.last_error = f"校验失败: {e}"
+            self._update_progress(status=self.last_error)
+            self.logger.exception(f"版本校验异常: version={version_name}")
+            return False
+        if self._cancelled.is_set():
+            return False
+        if report.ok:
+            self._update_progress(
+                status=f"版本 {version_name} 完好，无需修复",
+                total_files=report.checked,
+                finished_files=report.checked,
+            )
+            return True
+
+        broken = report.broken
+        self.logger.info(
+            f"修复版本: version={version_name}, 缺失 {len(report.missing)} 个, 损坏 {len(report.corrupt)} 个"
+        )
+        for net_file in report.corrupt:
+            # 损坏的文件先删除，避免下载器把同名文件当作可复用的已有文件
+            Path(net_file.local_path).unlink(missing_ok=True)
+
+        version_folder = self._version_folder(version_name, target_dir)
+        journal = BatchJournal(version_folder / ".install.journal", label=version_name).open()
+        try:
+            success, failed_files = self._download_batch(
+                broken, journal, interrupted=self._interrupted_paths(journal)
+            )
+        finally:
+            journal.close()
+
+        receipt = InstallReceipt.load(version_folder)
+        if receipt is not None:
+            # 重新下载的文件刷新回执中的记录，之后的快速检查不必再计算哈希
+            failed = set(failed_files)
+            for net_file in broken:
+                if net_file.file_name not in failed:
+                    receipt.update(net_file.local_path, net_file.check_hash)
+            receipt.save(version_folder)
+
+        if not success or failed_files:
+            self.last_error = f"修复失败文件: {', '.join(failed_files[:3])}"
+            self._update_progress(
+                status=self.last_error,
+                total_files=len(broken),
+                finished_files=len(broken) - len(failed_files),
+            )
+            self.logger.error(
+                f"版本修复失败: version={version_name}, failed_count={len(failed_files)}"
+            )
+            return False
+        self._update_progress(
+            status=f"版本 {version_name} 修复完成（{len(broken)} 个文件）",
+            total_files=len(broken),
+            finished_files=len(broken),
+        )
+        return True
+
     def cancel(self):
         """取消下载"""
         self._cancelled.set()
@@ -0,0 +1,231 @@
+"""安装回执 - 记录一次成功安装落盘的全部文件
+
+download_version 成功后在版本目录写入 .install.receipt，列出每个文件的路径、大小、
+sha1 和 mtime，以及版本 JSON 的 sha1。之后的启动前检查、校验修复和重新安装时的
+跳过判断只需批量 stat：大小和 mtime 与回执一致即视为完好，有变化的文件才重新计算哈希。
+
+路径相对于回执记录的根目录（通常是 .minecraft）保存，一万个资源文件的回执约 1MB。
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from ..services.logger_service import LoggerService
+
+RECEIPT_NAME = ".install.receipt"
+RECEIPT_SCHEMA = 1
+
+# 计算哈希时读文件的块大小；hashlib 处理大块数据时释放 GIL，多个线程可以同时计算
+HASH_READ_SIZE = 1024 * 1024
+
+_hash_buffers = threading.local()
+
+
+def sha1_of_file(path: str | Path) -> Optional[str]:
+    """计算文件 sha1，读取失败返回 None；每个线程复用一个缓冲区，不为每块数据分配新对象"""
+    buffer = getattr(_hash_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _hash_buffers.buffer = bytearray(HASH_READ_SIZE)
+    view = memoryview(buffer)
+    h = hashlib.sha1()
+    try:
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                h.update(view[:n])
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def _key(path: str | Path) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+@dataclass
+class ReceiptEntry:
+    path: str
+    size: int
+    sha1: Optional[str]
+    mtime_ns: int
+
+
+@dataclass
+class ReceiptCheck:
+    """按回执检查的结果；rehashed 为 stat 有变化但哈希仍然一致的文件
+
+    complete 为 False 表示超出时间预算提前结束，只检查了前 checked 个文件
+    """
+
+    checked: int = 0
+    rehashed: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    corrupt: List[str] = field(default_factory=list)
+    complete: bool = True
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing and not self.corrupt
+
+
+class InstallReceipt:
+    """一个版本的安装回执"""
+
+    def __init__(
+        self,
+        version: str,
+        version_json_sha1: str,
+        root: str | Path,
+        created_at: float = 0.0,
+    ):
+        self.version = version
+        self.version_json_sha1 = version_json_sha1
+        self.root = os.path.abspath(root)
+        self.created_at = created_at or time.time()
+        self._entries: Dict[str, ReceiptEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def build(
+        cls,
+        version: str,
+        version_json_path: Path,
+        root: str | Path,
+        files: Iterable[Tuple[str, Optional[str]]],
+    ) -> "InstallReceipt":
+        """由 (路径, sha1) 列表生成回执，大小和 mtime 取自磁盘；不存在的文件不记录"""
+        receipt = cls(version, sha1_of_file(version_json_path) or "", root)
+        for path, sha1 in files:
+            receipt.update(path, sha1)
+        return receipt
+
+    def update(self, path: str | Path, sha1: Optional[str]) -> bool:
+        """记录（或刷新）一个文件的当前大小和 mtime"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        self._entries[_key(path)] = ReceiptEntry(
+            path=os.path.abspath(path),
+            size=stat.st_size,
+            sha1=sha1.lower() if sha1 else None,
+            mtime_ns=stat.st_mtime_ns,
+        )
+        return True
+
+    def extend(self, other: "InstallReceipt") -> None:
+        """并入另一份回执的记录（多版本一起安装时共用一份用于跳过判断）"""
+        self._entries.update(other._entries)
+
+    def lookup(self, path: str | Path) -> Optional[ReceiptEntry]:
+        return self._entries.get(_key(path))
+
+    def matches(
+        self, path: str | Path, sha1: Optional[str] = None, stat: Optional[os.stat_result] = None
+    ) -> bool:
+        """回执中有该文件、sha1 一致，且磁盘上的大小和 mtime 未变"""
+        entry = self.lookup(path)
+        if entry is None:
+            return False
+        if sha1 and entry.sha1 != sha1.lower():
+            return False
+        if stat is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+        return stat.st_size == entry.size and stat.st_mtime_ns == entry.mtime_ns
+
+    def covers_json(self, data: bytes) -> bool:
+        """回执是否对应这份版本 JSON（安装后被覆盖或改动过则不再适用）"""
+        return bool(self.version_json_sha1) and hashlib.sha1(data).hexdigest() == self.version_json_sha1
+
+    def check(self, time_budget: Optional[float] = None) -> ReceiptCheck:
+        """批量 stat 所有文件，有变化的才计算哈希；哈希仍一致的文件刷新记录
+
+        time_budget 为秒数时超时即停止（如启动前检查不能拖慢启动），结果标记为未完成
+        """
+        result = ReceiptCheck()
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        for entry in list(self._entries.values()):
+            if deadline is not None and time.monotonic() >= deadline:
+                result.complete = False
+                break
+            result.checked += 1
+            try:
+                stat = os.stat(entry.path)
+            except OSError:
+                result.missing.append(entry.path)
+                continue
+            if stat.st_size == entry.size and stat.st_mtime_ns == entry.mtime_ns:
+                continue
+            if entry.sha1 is None:
+                self.update(entry.path, None)
+                continue
+            if stat.st_size == entry.size and sha1_of_file(entry.path) == entry.sha1:
+                self.update(entry.path, entry.sha1)
+                result.rehashed.append(entry.path)
+            else:
+                result.corrupt.append(entry.path)
+        return result
+
+    # -------------------- 读写 --------------------
+    def _relative(self, path: str) -> str:
+        inside = path.startswith(self.root.rstrip(os.sep) + os.sep)
+        relative = os.path.relpath(path, self.root) if inside else path
+        return relative.replace(os.sep, "/")
+
+    def to_dict(self) -> dict:
+        return {
+            "schema": RECEIPT_SCHEMA,
+            "version": self.version,
+            "version_json_sha1": self.version_json_sha1,
+            "root": self.root,
+            "created_at": self.created_at,
+            "files": [
+                [self._relative(e.path), e.size, e.sha1, e.mtime_ns] for e in self._entries.values()
+            ],
+        }
+
+    def save(self, version_folder: Path) -> Optional[Path]:
+        path = Path(version_folder) / RECEIPT_NAME
+        temp_path = path.with_name(f".{path.name}.part")
+        try:
+            temp_path.write_bytes(orjson.dumps(self.to_dict()))
+            os.replace(temp_path, path)
+        except OSError as e:
+            LoggerService().logger.warning(f"写入安装回执失败: {path}, {e}")
+            return None
+        return path
+
+    @classmethod
+    def load(cls, version_folder: Path) -> Optional["InstallReceipt"]:
+        """读取版本目录中的回执，不存在或格式不符时返回 None"""
+        try:
+            data = orjson.loads((Path(version_folder) / RECEIPT_NAME).read_bytes())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("schema") != RECEIPT_SCHEMA:
+            return None
+        receipt = cls(
+            data.get("version", ""),
+            data.get("version_json_sha1", ""),
+            data.get("root", ""),
+            data.get("created_at", 0.0),
+        )
+        for relative, size, sha1, mtime_ns in data.get("files", []):
+            path = os.path.normpath(os.path.join(receipt.root, relative))
+            receipt._entries[_key(path)] = ReceiptEntry(path=path, size=size, sha1=sha1, mtime_ns=mtime_ns)
+        return receipt
@@ -4,14 +4,21 @@ import re
 import shutil
 import subprocess
 import sys
+import time
 import zipfile
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Optional, Callable
 import orjson
+from app.services.install_receipt import InstallReceipt
 from app.services.logger_service import LoggerService
+from app.services.metrics_service import MetricsService
+from app.services.trace_service import TraceRecorder
 from enum import IntEnum
 
+# 启动前按回执检查文件的时间上限（秒），超出后剩余文件留给版本管理中的校验
+RECEIPT_CHECK_BUDGET = 2.0
+
 
 class ModLoaderType(IntEnum):
     VANILLA = 0
@@ -50,6 +57,11 @@ class LaunchConfig:
     wrapper_path: str = ""
     env_vars: dict = field(default_factory=dict)
     close_launcher: bool = False
+    # build_launch_config 启用时间线导出时携带，launch() 会追加进程启动耗时并重新写出
+    trace: Optional[TraceRecorder] = None
+    trace_path: str = ""
+    # 按安装回执检查发现缺失或损坏的文件，不阻止启动，由界面提示是否先修复
+    integrity_issues: list[str] = field(default_factory=list)
 
 
 class LaunchService:
@@ -638,19 +650,26 @@ class LaunchService:
         env_vars: Optional[dict] = None,
         close_launcher: bool = False,
         progress_callback: Optional[Callable[[str], None]] = None,
+        trace_path: Optional[str] = None,
     ) -> LaunchConfig | None:
+        """trace_path 不为空时把各步骤耗时导出为 Trace Event Format JSON"""
+        self._trace = TraceRecorder(f"launch {version_folder}", enabled=bool(trace_path))
+        started = time.time()
         if progress_callback:
             progress_callback("检测版本数据...")
         version_path = versions_root / version_folder
         json_path = version_path / f"{version_folder}.json"
 
         if not json_path.exists():
+            self._finish_prep(trace_path, started, error="version json not found")
             return None
 
         try:
-            version_data_bytes = json_path.read_bytes()
-            version_data = orjson.loads(version_data_bytes)
+            with self._trace.span("read version json"):
+                version_data_bytes = json_path.read_bytes()
+                version_data = orjson.loads(version_data_bytes)
         except Exception:
+            self._finish_prep(trace_path, started, error="invalid version json")
             return None
 
         version_json_str = version_data_bytes.decode("utf-8", errors="ignore")
@@ -660,9 +679,10 @@ class LaunchService:
             progress_callback("解析版本继承关系...")
         inherits_from = version_data.get("inheritsFrom")
         if inherits_from:
-            parent_json = self._resolve_version_json(versions_root, inherits_from)
-            if parent_json:
-                version_data = self._merge_version_json(version_data, parent_json)
+            with self._trace.span("merge version json", parent=inherits_from):
+                parent_json = self._resolve_version_json(versions_root, inherits_from)
+                if parent_json:
+                    version_data = self._merge_version_json(version_data, parent_json)
 
         game_directory = versions_root.parent
         assets_directory = game_directory / "assets"
@@ -670,21 +690,32 @@ class LaunchService:
         natives_path = version_path / "natives"
         if progress_callback:
             progress_callback("解压 Natives 文件...")
-        self._extract_natives(version_data, version_path, natives_path, versions_root)
+        natives_started = time.time()
+        with self._trace.span("extract natives"):
+            self._extract_natives(version_data, version_path, natives_path, versions_root)
+        natives_seconds = time.time() - natives_started
 
         if progress_callback:
             progress_callback("构建类路径 (Classpath)...")
 
-        classpath = self._build_classpath(version_data, versions_root, version_folder)
+        with self._trace.span("build classpath") as span_args:
+            classpath = self._build_classpath(version_data, versions_root, version_folder)
+            span_args["entries"] = len(classpath)
 
         self.logger.info(f"Classpath built with {len(classpath)} entries")
 
         if not classpath:
             self.logger.error("Classpath is empty")
+            self._finish_prep(trace_path, started, error="empty classpath")
             return None
 
+        integrity_issues = self._check_install_receipt(
+            version_path, version_data_bytes
+        )
+
         if progress_callback:
             progress_callback("处理启动参数...")
+        arguments_started = time.time()
         main_class = self._get_main_class(version_data, version_folder, mod_loader)
 
         jvm_args = self._parse_jvm_arguments(version_data, natives_path, libraries_directory)
@@ -723,6 +754,8 @@ class LaunchService:
             ]
         )
 
+        self._trace.add_complete("build arguments", "launcher", arguments_started, time.time())
+
         if progress_callback:
             progress_callback("启动环境准备完毕，即将启动游戏...")
 
@@ -730,6 +763,7 @@ class LaunchService:
             f"Launch config built: main_class={main_class}, mod_loader={mod_loader.name}, game_args count={len(game_args)}"
         )
 
+        self._finish_prep(trace_path, started, natives_seconds)
         return LaunchConfig(
             java_path=java_path,
             game_directory=game_directory,
@@ -754,8 +788,64 @@ class LaunchService:
             wrapper_path=wrapper_path,
             env_vars=env_vars or {},
             close_launcher=close_launcher,
+            trace=self._trace if trace_path else None,
+            trace_path=trace_path or "",
+            integrity_issues=integrity_issues,
         )
 
+    def _check_install_receipt(
+        self, version_path: Path, version_json: bytes
+    ) -> list[str]:
+        """按安装回执批量 stat 版本的全部文件，只有改动过的文件才计算哈希
+
+        没有回执或版本 JSON 在安装后被改动（如安装了模组加载器）时不检查；
+        检查最多用 RECEIPT_CHECK_BUDGET 秒，不拖慢启动
+        """
+        receipt = InstallReceipt.load(version_path)
+        if receipt is None or not receipt.covers_json(version_json):
+            return []
+        with self._trace.span(
+            "check install receipt", files=len(receipt)
+        ) as span_args:
+            result = receipt.check(time_budget=RECEIPT_CHECK_BUDGET)
+            span_args.update(
+                checked=result.checked,
+                rehashed=len(result.rehashed),
+                missing=len(result.missing),
+                corrupt=len(result.corrupt),
+            )
+        if not result.complete:
+            self.logger.info(
+                f"安装回执检查超出 {RECEIPT_CHECK_BUDGET}s，只检查了 {result.checked}/{len(receipt)} 个文件"
+            )
+        if result.rehashed:
+            receipt.save(version_path)
+        if not result.ok:
+            self.logger.warning(
+                f"安装回执检查: 缺失 {len(result.missing)} 个文件, 损坏 {len(result.corrupt)} 个, "
+                f"可在版本管理中修复: {(result.missing + result.corrupt)[:3]}"
+            )
+        return result.missing + result.corrupt
+
+    def _finish_prep(
+        self,
+        trace_path: Optional[str],
+        started: float,
+        natives_seconds: float = 0.0,
+        error: str = "",
+    ) -> None:
+        """启动准备结束：记录指标，启用时间线时写出跟踪文件"""
+        if error:
+            MetricsService().record_launch("prep_failed")
+        else:
+            MetricsService().record_launch_prep(time.time() - started, natives_seconds)
+        if not trace_path:
+            return
+        args = {"error": error} if error else None
+        self._trace.add_complete("build_launch_config", "launcher", started, time.time(), args=args)
+        if self._trace.save(trace_path):
+            self.logger.info(f"启动时间线已导出: {trace_path}")
+
     def launch(self, config: LaunchConfig) -> subprocess.Popen | None:
         java_cmd = [config.java_path]
 
@@ -803,6 +893,7 @@ class LaunchService:
 
         self.logger.info(f"Launch command: {' '.join(java_cmd)}")
 
+        spawn_started = time.time()
         try:
             env = os.environ.copy()
             env.update(config.env_vars)
@@ -825,11 +916,21 @@ class LaunchService:
                     stderr=subprocess.DEVNULL,
                     env=env,
                 )
+            self._finish_spawn(config, spawn_started, pid=proc.pid)
             return proc
         except Exception as e:
             self.logger.error(f"Failed to launch: {e}")
+            self._finish_spawn(config, spawn_started, error=str(e))
             return None
 
+    def _finish_spawn(self, config: LaunchConfig, started: float, **args: Any) -> None:
+        MetricsService().record_launch("spawn_failed" if "error" in args else "success")
+        if config.trace is None:
+            return
+        config.trace.add_complete("spawn process", "launcher", started, time.time(), args=args)
+        config.trace.save(config.trace_path)
+
     def __init__(self):
         self.logger = LoggerService().logger
         self.uuid: str | None = None
+        self._trace = TraceRecorder(enabled=False)
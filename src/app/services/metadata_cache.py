@@ -0,0 +1,202 @@
+"""元数据磁盘缓存 - 版本列表、版本 JSON 等小文件的 HTTP 缓存
+
+每个 URL 缓存响应体以及 ETag、Last-Modified 和获取时间：
+- 普通请求带 If-None-Match / If-Modified-Since 重新验证，304 时直接用缓存，省去下载和解析
+- 路径中带 40 位 sha1 的地址（piston-meta 的版本 JSON、资源索引）内容不可变，命中即用
+- 请求失败时回退到过期缓存，离线模式下只读缓存、不发请求
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+
+from ..services.logger_service import LoggerService
+
+DEFAULT_CACHE_DIR = Path("MineLauncher/cache/metadata")
+
+_CONTENT_ADDRESSED = re.compile(r"/[0-9a-f]{40}/")
+
+
+class MetadataCacheMiss(Exception):
+    """离线模式下缓存中没有该地址"""
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: bytes
+    etag: str = ""
+    last_modified: str = ""
+    fetched_at: float = 0.0
+    # 本次是否来自网络（200 或 304），False 表示直接用了缓存
+    revalidated: bool = False
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+def is_content_addressed(url: str) -> bool:
+    return bool(_CONTENT_ADDRESSED.search(url))
+
+
+class MetadataCache:
+    """元数据缓存单例，缓存文件位于 MineLauncher/cache/metadata"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        self.logger = LoggerService().logger
+        self.cache_dir = DEFAULT_CACHE_DIR
+        self._io_lock = threading.Lock()
+        self._stats = {"hits": 0, "revalidated": 0, "fetched": 0, "stale": 0, "misses": 0}
+
+    @classmethod
+    def instance(cls) -> "MetadataCache":
+        return cls()
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.meta.json", self.cache_dir / f"{key}.body"
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(
+            url=url,
+            body=body,
+            etag=meta.get("etag", ""),
+            last_modified=meta.get("last_modified", ""),
+            fetched_at=meta.get("fetched_at", 0.0),
+        )
+
+    def put(self, url: str, body: bytes, etag: str = "", last_modified: str = "") -> CachedResponse:
+        entry = CachedResponse(
+            url=url,
+            body=body,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=time.time(),
+            revalidated=True,
+        )
+        meta_path, body_path = self._paths(url)
+        try:
+            with self._io_lock:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                # 先写响应体再写元数据，元数据存在即说明响应体完整
+                self._write_atomic(body_path, body)
+                self._write_meta(meta_path, entry)
+        except OSError as e:
+            self.logger.warning(f"写入元数据缓存失败: {url}, {e}")
+        return entry
+
+    def _touch(self, entry: CachedResponse) -> None:
+        entry.fetched_at = time.time()
+        entry.revalidated = True
+        meta_path, _ = self._paths(entry.url)
+        try:
+            with self._io_lock:
+                self._write_meta(meta_path, entry)
+        except OSError:
+            pass
+
+    def _write_meta(self, path: Path, entry: CachedResponse) -> None:
+        meta = {
+            "url": entry.url,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "fetched_at": entry.fetched_at,
+        }
+        self._write_atomic(path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        temp_path = path.with_name(f".{path.name}.part")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+
+    def fetch(
+        self,
+        session: requests.Session,
+        url: str,
+        timeout: float = 30,
+        max_age: Optional[float] = None,
+        offline: bool = False,
+    ) -> CachedResponse:
+        """获取 url，按需用缓存或条件请求
+
+        max_age: 缓存在该秒数内直接使用；None 表示每次都重新验证，
+        内容寻址的地址始终直接使用缓存
+        """
+        cached = self.get(url)
+        if offline:
+            if cached is None:
+                self._stats["misses"] += 1
+                raise MetadataCacheMiss(url)
+            self._stats["hits"] += 1
+            return cached
+        if cached is not None and (
+            is_content_addressed(url) or (max_age is not None and cached.age < max_age)
+        ):
+            self._stats["hits"] += 1
+            return cached
+
+        headers: Dict[str, str] = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        try:
+            response = session.get(url, timeout=timeout, headers=headers)
+            if response.status_code == 304 and cached is not None:
+                self._stats["revalidated"] += 1
+                self._touch(cached)
+                return cached
+            response.raise_for_status()
+        except requests.RequestException:
+            if cached is None:
+                raise
+            self._stats["stale"] += 1
+            self.logger.warning(f"元数据请求失败，使用 {cached.age:.0f}s 前的缓存: {url}")
+            return cached
+
+        self._stats["fetched"] += 1
+        return self.put(
+            url,
+            response.content,
+            etag=response.headers.get("ETag", ""),
+            last_modified=response.headers.get("Last-Modified", ""),
+        )
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self._stats)
@@ -0,0 +1,321 @@
+"""Prometheus / OpenMetrics 文本格式的本地指标端点
+
+默认关闭，在配置 Metrics.Enabled 打开后于 127.0.0.1:Metrics.Port 提供 GET /metrics，
+供实验室机器上的 Prometheus 抓取，不需要解析日志：
+- 下载：字节数、文件数、重试次数、各主机错误数（累计），活跃连接、缓冲区内存、
+  各主机限速器的请求速率和连接上限（实时）
+- 启动：启动次数、启动准备耗时直方图、Natives 解压耗时直方图
+
+批量下载器在运行期间登记（track_batch），抓取时读取其实时统计；
+结束时（release_batch）把最终统计并入累计值。下载器在引擎线程上运行，抓取线程读取
+统计时若恰好与之冲突则沿用上一次的快照；计数取历次快照的最大值，保证单调递增。
+"""
+
+from __future__ import annotations
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..littledl import get_buffer_memory_stats
+from ..services.logger_service import LoggerService
+
+DEFAULT_METRICS_PORT = 9464
+
+# 启动准备与 Natives 解压耗时的桶上界（秒）
+LAUNCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_PREFIX = "minelauncher"
+
+
+class Histogram:
+    """Prometheus 直方图：累积桶计数 + sum + count"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class MetricsService:
+    """指标单例：累计计数 + 抓取时从登记的下载器读取实时值"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        self.logger = LoggerService().logger
+        self._data_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+
+        # 运行中的批量下载器（EnhancedBatchDownloader）-> 最近一次统计快照
+        self._batches: Dict[Any, Dict[str, Any]] = {}
+        self._totals = {"bytes": 0, "completed": 0, "failed": 0, "retries": 0}
+        self._host_errors: Dict[str, int] = {}
+        # 引擎上的单文件下载
+        self._active_single_files = 0
+
+        self._launches: Dict[str, int] = {}
+        self._launch_prep = Histogram(LAUNCH_BUCKETS)
+        self._natives_extract = Histogram(LAUNCH_BUCKETS)
+
+    @classmethod
+    def instance(cls) -> "MetricsService":
+        return cls()
+
+    # -------------------- 下载 --------------------
+    def track_batch(self, downloader: Any) -> None:
+        with self._data_lock:
+            self._batches.setdefault(downloader, {})
+
+    def release_batch(self, downloader: Any) -> None:
+        """批次结束：把最终统计并入累计值，之后不再实时读取"""
+        with self._data_lock:
+            if downloader not in self._batches:
+                return
+            snapshot = self._snapshot(downloader)
+            del self._batches[downloader]
+            self._fold(self._totals, self._host_errors, snapshot)
+
+    def _snapshot(self, downloader: Any) -> Dict[str, Any]:
+        previous = self._batches.get(downloader) or {}
+        try:
+            stats = downloader.get_stats()
+        except RuntimeError:
+            # 统计字典在引擎线程上被修改，本次沿用上一次快照
+            return previous
+        counters = {
+            "bytes": stats.get("downloaded_bytes", 0),
+            "completed": stats.get("completed_files", 0),
+            "failed": stats.get("failed_files", 0),
+            "retries": stats.get("retry_budget", {}).get("retries", 0),
+        }
+        host_errors = {host: circuit.get("failures", 0) for host, circuit in stats.get("circuits", {}).items()}
+        for key, value in previous.get("counters", {}).items():
+            counters[key] = max(counters[key], value)
+        for host, value in previous.get("host_errors", {}).items():
+            host_errors[host] = max(host_errors.get(host, 0), value)
+        snapshot = {
+            "counters": counters,
+            "host_errors": host_errors,
+            "active_files": stats.get("active_files", 0),
+            "hosts": stats.get("hosts", {}),
+        }
+        self._batches[downloader] = snapshot
+        return snapshot
+
+    @staticmethod
+    def _fold(totals: Dict[str, int], host_errors: Dict[str, int], snapshot: Dict[str, Any]) -> None:
+        for key, value in snapshot.get("counters", {}).items():
+            totals[key] += value
+        for host, count in snapshot.get("host_errors", {}).items():
+            host_errors[host] = host_errors.get(host, 0) + count
+
+    def single_file_started(self) -> None:
+        with self._data_lock:
+            self._active_single_files += 1
+
+    def single_file_finished(self, host: str, size: int, ok: bool) -> None:
+        with self._data_lock:
+            self._active_single_files = max(0, self._active_single_files - 1)
+            if ok:
+                self._totals["bytes"] += size
+                self._totals["completed"] += 1
+            else:
+                self._totals["failed"] += 1
+                self._host_errors[host] = self._host_errors.get(host, 0) + 1
+
+    # -------------------- 启动 --------------------
+    def record_launch_prep(self, prep_seconds: float, natives_seconds: float) -> None:
+        with self._data_lock:
+            self._launch_prep.observe(prep_seconds)
+            self._natives_extract.observe(natives_seconds)
+
+    def record_launch(self, result: str) -> None:
+        """result: success / spawn_failed / prep_failed"""
+        with self._data_lock:
+            self._launches[result] = self._launches.get(result, 0) + 1
+
+    # -------------------- 输出 --------------------
+    def render(self) -> str:
+        """生成 Prometheus 文本格式（0.0.4）"""
+        with self._data_lock:
+            totals = dict(self._totals)
+            host_errors = dict(self._host_errors)
+            live = [self._snapshot(batch) for batch in list(self._batches)]
+            active_single = self._active_single_files
+            launches = dict(self._launches)
+            launch_prep = self._histogram_lines(f"{_PREFIX}_launch_prep_seconds", self._launch_prep)
+            natives = self._histogram_lines(f"{_PREFIX}_natives_extract_seconds", self._natives_extract)
+
+        active_connections = active_single
+        active_files = active_single
+        host_rates: List[Tuple[Dict[str, str], float, int]] = []
+        for snapshot in live:
+            self._fold(totals, host_errors, snapshot)
+            active_files += snapshot.get("active_files", 0)
+            for key, host_stats in snapshot.get("hosts", {}).items():
+                host, _, lane = key.partition(" [")
+                labels = {"host": host, "lane": lane.rstrip("]") or "default"}
+                active_connections += host_stats.get("active", 0)
+                host_rates.append(
+                    (labels, host_stats.get("request_rate", 0.0), host_stats.get("connection_limit", 0))
+                )
+        buffers = get_buffer_memory_stats()
+
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[Tuple[Optional[Dict[str, str]], float]]):
+            full = f"{_PREFIX}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            for labels, value in samples:
+                lines.append(f"{full}{_labels(labels)} {_number(value)}")
+
+        metric("download_bytes_total", "counter", "Bytes downloaded.", [(None, totals["bytes"])])
+        metric(
+            "download_files_total",
+            "counter",
+            "Files finished, by result.",
+            [({"result": "completed"}, totals["completed"]), ({"result": "failed"}, totals["failed"])],
+        )
+        metric("download_retries_total", "counter", "Download retries spent.", [(None, totals["retries"])])
+        metric(
+            "download_host_errors_total",
+            "counter",
+            "Failed download attempts per host.",
+            [({"host": host}, count) for host, count in sorted(host_errors.items())],
+        )
+        metric("download_active_connections", "gauge", "Requests in flight.", [(None, active_connections)])
+        metric("download_active_files", "gauge", "Files being downloaded.", [(None, active_files)])
+        metric("download_active_batches", "gauge", "Batch downloads running.", [(None, len(live))])
+        metric(
+            "download_buffer_bytes",
+            "gauge",
+            "Memory held by write buffers.",
+            [(None, buffers["buffered_bytes"])],
+        )
+        metric(
+            "download_host_request_rate",
+            "gauge",
+            "Per-host limiter request rate (requests/s).",
+            [(labels, rate) for labels, rate, _ in host_rates],
+        )
+        metric(
+            "download_host_connection_limit",
+            "gauge",
+            "Per-host limiter connection limit.",
+            [(labels, limit) for labels, _, limit in host_rates],
+        )
+        metric(
+            "launches_total",
+            "counter",
+            "Game launches, by result.",
+            [({"result": result}, count) for result, count in sorted(launches.items())],
+        )
+        lines.append(f"# HELP {_PREFIX}_launch_prep_seconds Time spent building the launch config.")
+        lines.append(f"# TYPE {_PREFIX}_launch_prep_seconds histogram")
+        lines.extend(launch_prep)
+        lines.append(f"# HELP {_PREFIX}_natives_extract_seconds Time spent extracting natives.")
+        lines.append(f"# TYPE {_PREFIX}_natives_extract_seconds histogram")
+        lines.extend(natives)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(name: str, histogram: Histogram) -> List[str]:
+        lines = [
+            f'{name}_bucket{{le="{_number(float(bound))}"}} {count}'
+            for bound, count in zip(histogram.buckets, histogram.counts)
+        ]
+        lines.append(f'{name}_bucket{{le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum {_number(histogram.sum)}")
+        lines.append(f"{name}_count {histogram.count}")
+        return lines
+
+    # -------------------- HTTP 端点 --------------------
+    def start_server(self, port: int = DEFAULT_METRICS_PORT) -> bool:
+        """只监听 127.0.0.1；端口被占用时记录警告并返回 False"""
+        if self._server is not None:
+            return True
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+        except OSError as e:
+            self.logger.warning(f"指标端点启动失败: 127.0.0.1:{port}, {e}")
+            return False
+        server.daemon_threads = True
+        self._server = server
+        self._server_thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+        self._server_thread.start()
+        self.logger.info(f"指标端点已启动: http://127.0.0.1:{port}/metrics")
+        return True
+
+    def stop_server(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._server_thread = None
+
+    def start_from_config(self) -> bool:
+        from ..services.config_service import ConfigService
+
+        metrics_cfg = ConfigService().load().get("Metrics", {})
+        if not metrics_cfg.get("Enabled", False):
+            return False
+        return self.start_server(int(metrics_cfg.get("Port", DEFAULT_METRICS_PORT)))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = MetricsService().render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,215 @@
+"""下载进度桥 - 把下载线程的进度合并、限频后交给界面
+
+下载引擎每个进度节拍都可能更新任务，如果每次都 task.update + 通知下载管理器，
+界面会被整页重建并 page.update() 成百上千次，反过来拖慢下载线程。这里：
+- 下载线程只调用 push()，把字段合并进该任务的待刷新状态后立即返回，不接触 Flet
+- 界面侧的刷新线程按配置的帧率（Download.ui_refresh_fps）取出待刷新状态，
+  只把真正变化的字段写入任务，并且每帧最多通知一次下载管理器
+- 任务结束时先调用 flush_task() 写入它还没刷新的进度，再写入结束状态；
+  否则最后一帧内合并的进度会因任务已结束而被丢弃
+"""
+
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from ..services.download_manager import DownloadManager, DownloadTask, TaskStatus
+from ..services.logger_service import LoggerService
+
+DEFAULT_UI_REFRESH_FPS = 10
+
+# 任务一旦结束，之后到达的进度不再写入，避免把已完成的任务改回下载中
+_FINAL_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+
+class ProgressBridge:
+    """进度桥单例"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        self.logger = LoggerService().logger
+        self._pending_lock = threading.Lock()
+        # 刷新一帧（取出并写入待刷新状态）期间持有，flush_task 据此等待正在写入的一帧
+        self._frame_lock = threading.RLock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, DownloadTask] = {}
+        self._dirty = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.fps = self._load_fps()
+
+        self._stats = {
+            "pushes": 0,
+            "coalesced": 0,
+            "frames": 0,
+            "fields_applied": 0,
+            "fields_unchanged": 0,
+            "notifies": 0,
+            "push_time_total": 0.0,
+            "push_time_max": 0.0,
+            "frame_time_max": 0.0,
+        }
+
+    @classmethod
+    def instance(cls) -> "ProgressBridge":
+        return cls()
+
+    @staticmethod
+    def _load_fps() -> float:
+        try:
+            from ..services.config_service import ConfigService
+
+            fps = ConfigService().get_download_config().get(
+                "ui_refresh_fps", DEFAULT_UI_REFRESH_FPS
+            )
+            return max(1.0, float(fps))
+        except Exception:
+            return float(DEFAULT_UI_REFRESH_FPS)
+
+    def set_fps(self, fps: float) -> None:
+        self.fps = max(1.0, float(fps))
+
+    # -------------------- 下载线程侧 --------------------
+    def push(self, task: DownloadTask, **fields: Any) -> None:
+        """记录任务的最新进度；只做字典合并，不会等待界面"""
+        start = time.perf_counter()
+        with self._pending_lock:
+            pending = self._pending.get(task.task_id)
+            if pending is None:
+                self._pending[task.task_id] = dict(fields)
+                self._tasks[task.task_id] = task
+            else:
+                pending.update(fields)
+                self._stats["coalesced"] += 1
+            self._stats["pushes"] += 1
+            elapsed = time.perf_counter() - start
+            self._stats["push_time_total"] += elapsed
+            if elapsed > self._stats["push_time_max"]:
+                self._stats["push_time_max"] = elapsed
+        self._dirty.set()
+        if self._thread is None:
+            self._ensure_thread()
+
+    def flush_task(self, task: DownloadTask) -> None:
+        """立即把该任务待刷新的进度写入任务，在写入完成/失败等结束状态之前调用"""
+        with self._frame_lock:
+            with self._pending_lock:
+                fields = self._pending.pop(task.task_id, None)
+                self._tasks.pop(task.task_id, None)
+            if not fields or task.status in _FINAL_STATUSES:
+                return
+            changed = {
+                key: value
+                for key, value in fields.items()
+                if getattr(task, key, None) != value
+            }
+            if changed:
+                task.update(**changed)
+        with self._pending_lock:
+            self._stats["fields_applied"] += len(changed)
+            self._stats["fields_unchanged"] += len(fields) - len(changed)
+
+    # -------------------- 界面侧 --------------------
+    def _ensure_thread(self) -> None:
+        with self._pending_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="progress-bridge", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._dirty.wait()
+            if self._stopped:
+                break
+            frame_start = time.monotonic()
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.warning(f"刷新下载进度失败: {e}")
+            # 帧率上限：两次刷新之间至少间隔 1/fps 秒，期间的进度全部合并
+            remaining = 1.0 / self.fps - (time.monotonic() - frame_start)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def flush(self) -> None:
+        """把合并后的进度写入任务，并通知下载管理器刷新一次"""
+        with self._frame_lock:
+            with self._pending_lock:
+                self._dirty.clear()
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, {}
+                tasks, self._tasks = self._tasks, {}
+
+            frame_start = time.perf_counter()
+            changed_any = False
+            applied = 0
+            unchanged = 0
+            for task_id, fields in pending.items():
+                task = tasks[task_id]
+                if task.status in _FINAL_STATUSES:
+                    unchanged += len(fields)
+                    continue
+                changed = {}
+                for key, value in fields.items():
+                    if getattr(task, key, None) != value:
+                        changed[key] = value
+                unchanged += len(fields) - len(changed)
+                if changed:
+                    applied += len(changed)
+                    task.update(**changed)
+                    changed_any = True
+
+        if changed_any:
+            DownloadManager()._notify()
+
+        frame_time = time.perf_counter() - frame_start
+        with self._pending_lock:
+            self._stats["frames"] += 1
+            self._stats["fields_applied"] += applied
+            self._stats["fields_unchanged"] += unchanged
+            if changed_any:
+                self._stats["notifies"] += 1
+            if frame_time > self._stats["frame_time_max"]:
+                self._stats["frame_time_max"] = frame_time
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._dirty.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._stopped = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """合并与限频统计：pushes 与 notifies 之比即省去的界面刷新次数"""
+        with self._pending_lock:
+            stats = dict(self._stats)
+        pushes = stats["pushes"]
+        stats["fps"] = self.fps
+        stats["push_time_avg"] = stats["push_time_total"] / pushes if pushes else 0.0
+        stats["coalesce_ratio"] = stats["coalesced"] / pushes if pushes else 0.0
+        return stats
+
+    def reset_stats(self) -> None:
+        with self._pending_lock:
+            for key in self._stats:
+                self._stats[key] = 0.0 if isinstance(self._stats[key], float) else 0
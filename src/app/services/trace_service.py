@@ -0,0 +1,168 @@
+"""安装与启动过程的 Trace Event Format 导出
+
+把一次版本安装（MinecraftDownloader.download_version）或一次启动准备
+（LaunchService.build_launch_config / launch）记录成 Chrome Trace Event Format 的 JSON，
+可以直接拖进 chrome://tracing 或 https://ui.perfetto.dev 查看，也方便用户附在问题反馈里。
+
+- span() 记录当前线程上的一段耗时，嵌套调用在时间线上显示为层级
+- add_file_timing() 接收 littledl 的逐文件计时，按通道分配“连接槽”轨道，
+  同一轨道上的文件互不重叠，轨道数即该通道的实际并发
+"""
+
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+from ..services.logger_service import LoggerService
+
+if TYPE_CHECKING:
+    from ..littledl.timing import FileTiming
+
+# 文件下载轨道的 tid 从这里开始编号，避免与线程轨道冲突
+_FILE_TRACK_BASE = 1000
+
+
+class TraceRecorder:
+    """Trace Event Format 记录器，enabled=False 时所有记录调用都是空操作"""
+
+    def __init__(self, process_name: str = "MineLauncher", enabled: bool = True):
+        self.enabled = enabled
+        self.process_name = process_name
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._origin = time.time()
+        self._pid = os.getpid()
+        self._thread_tracks: Dict[int, int] = {}
+        # 通道 -> 各连接槽最近一个文件的结束时间
+        self._file_slots: Dict[str, List[float]] = {}
+        self._file_tracks: Dict[tuple, int] = {}
+        if enabled:
+            self._metadata("process_name", 0, {"name": process_name})
+
+    def _us(self, ts: float) -> float:
+        return round((ts - self._origin) * 1_000_000, 3)
+
+    def _metadata(self, name: str, tid: int, args: Dict[str, Any]) -> None:
+        self._events.append({"name": name, "ph": "M", "pid": self._pid, "tid": tid, "args": args})
+
+    def _thread_tid(self) -> int:
+        ident = threading.get_ident()
+        tid = self._thread_tracks.get(ident)
+        if tid is None:
+            tid = self._thread_tracks[ident] = len(self._thread_tracks) + 1
+            self._metadata("thread_name", tid, {"name": threading.current_thread().name})
+        return tid
+
+    def add_complete(
+        self,
+        name: str,
+        cat: str,
+        start: float,
+        end: float,
+        tid: Optional[int] = None,
+        args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """记录一段已结束的耗时，start/end 为 time.time() 时间戳"""
+        if not self.enabled:
+            return
+        with self._lock:
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": self._us(start),
+                "dur": round(max(0.0, end - start) * 1_000_000, 3),
+                "pid": self._pid,
+                "tid": self._thread_tid() if tid is None else tid,
+            }
+            if args:
+                event["args"] = args
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "launcher", **args: Any) -> Iterator[Dict[str, Any]]:
+        """with trace.span("build plan", files=0) as span_args: ...；结束前可往 span_args 补充参数"""
+        if not self.enabled:
+            yield args
+            return
+        start = time.time()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = str(e) or type(e).__name__
+            raise
+        finally:
+            self.add_complete(name, cat, start, time.time(), args=args)
+
+    def instant(self, name: str, cat: str = "launcher", **args: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._events.append(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "i",
+                    "s": "t",
+                    "ts": self._us(time.time()),
+                    "pid": self._pid,
+                    "tid": self._thread_tid(),
+                    "args": args,
+                }
+            )
+
+    def add_file_timing(self, timing: "FileTiming", outcome: str) -> None:
+        """TimingCollector 监听回调：把一次文件下载尝试画到所属通道的连接槽轨道上"""
+        if not self.enabled:
+            return
+        start = timing.started_at
+        end = timing.finished_at or time.time()
+        lane = timing.lane or "default"
+        with self._lock:
+            slots = self._file_slots.setdefault(lane, [])
+            for slot, busy_until in enumerate(slots):
+                if busy_until <= start:
+                    slots[slot] = end
+                    break
+            else:
+                slot = len(slots)
+                slots.append(end)
+            tid = self._file_tracks.get((lane, slot))
+            if tid is None:
+                tid = self._file_tracks[(lane, slot)] = _FILE_TRACK_BASE + len(self._file_tracks)
+                self._metadata("thread_name", tid, {"name": f"{lane} #{slot + 1}"})
+                self._metadata("thread_sort_index", tid, {"sort_index": tid})
+        args: Dict[str, Any] = {
+            "url": timing.url,
+            "host": timing.host,
+            "size": timing.size,
+            "attempt": timing.attempt,
+            "outcome": outcome,
+        }
+        args.update({f"{phase}_ms": round(seconds * 1000, 3) for phase, seconds in timing.phases.items()})
+        name = timing.url.rsplit("/", 1)[-1] or timing.url
+        self.add_complete(name, f"download,{lane}", start, end, tid=tid, args=args)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"traceEvents": list(self._events), "displayTimeUnit": "ms"}
+
+    def save(self, path: str | Path) -> Optional[Path]:
+        """写出 JSON 文件，失败只记日志，不影响安装或启动本身"""
+        if not self.enabled:
+            return None
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f".{path.name}.part")
+            temp_path.write_text(json.dumps(self.to_dict(), ensure_ascii=False), encoding="utf-8")
+            os.replace(temp_path, path)
+        except OSError as e:
+            LoggerService().logger.warning(f"写入跟踪文件失败: {path}, {e}")
+            return None
+        return path
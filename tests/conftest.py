@@ -0,0 +1,72 @@
+import pytest
+
+from benchmarks.catalog import build_catalog
+from benchmarks.server import ServerHandle, fault_config
+
+# 缩小到几秒内完成的安装规模
+INSTALL_SPEC = {
+    "tiny_assets": 10,
+    "large_size": 1024 * 1024,
+    "install_assets": 60,
+    "install_libraries": 4,
+    "install_client_size": 256 * 1024,
+}
+
+
+@pytest.fixture(scope="session")
+def stand_in():
+    """本地替身的官方源和 BMCLAPI 镜像，以及它们提供的文件目录"""
+    with ServerHandle(INSTALL_SPEC) as servers:
+        yield servers, build_catalog(INSTALL_SPEC, servers.official)
+
+
+@pytest.fixture(scope="session")
+def index_outage():
+    """两个源的资源索引都返回 503"""
+    faults = {
+        name: fault_config(outage="503", outage_prefixes=["/v1/packages/bench/"])
+        for name in ("official", "mirror")
+    }
+    with ServerHandle(INSTALL_SPEC, faults) as servers:
+        yield servers
+
+
+@pytest.fixture(scope="session")
+def mirror_outage():
+    """镜像的资源、库和客户端全部返回 503，官方源正常"""
+    faults = {
+        "mirror": fault_config(
+            outage="503", outage_prefixes=["/assets/", "/maven/", "/v1/objects/"]
+        )
+    }
+    with ServerHandle(INSTALL_SPEC, faults) as servers:
+        yield servers, build_catalog(INSTALL_SPEC, servers.official)
+
+
+@pytest.fixture(scope="session")
+def missing_assets():
+    """两个源上的资源文件都返回 404"""
+    faults = {
+        "official": fault_config(outage="404", outage_prefixes=["/resources/"]),
+        "mirror": fault_config(outage="404", outage_prefixes=["/assets/"]),
+    }
+    with ServerHandle(INSTALL_SPEC, faults) as servers:
+        yield servers
+
+
+@pytest.fixture
+def make_downloader(tmp_path):
+    """创建指向替身服务器、以 tmp_path 为游戏目录的 MinecraftDownloader"""
+    from app.services.download_service_v2 import MinecraftDownloadConfig
+    from benchmarks.scenarios import _bench_downloader_class
+
+    def make(servers, root=None):
+        return _bench_downloader_class()(
+            servers.official,
+            servers.mirror,
+            True,
+            mc_folder=str(root or tmp_path / ".minecraft"),
+            config=MinecraftDownloadConfig(verify_hash=True, max_retries=1, retry_delay=0.1),
+        )
+
+    return make
@@ -0,0 +1,78 @@
+import asyncio
+
+from app.littledl.journal import BatchJournal
+
+
+def test_in_flight_only_reports_previous_installs(tmp_path):
+    journal_path = tmp_path / ".install.journal"
+    first = BatchJournal(journal_path, label="1.20.1").open()
+    first.record_started(tmp_path / "a.jar")
+    first.record_started(tmp_path / "b.jar")
+    assert first.in_flight() == []
+    first.close()
+
+    second = BatchJournal(journal_path, label="1.20.1").open()
+    assert sorted(second.in_flight()) == sorted([str(tmp_path / "a.jar"), str(tmp_path / "b.jar")])
+    assert second.previous_install == (first.install_id, "1.20.1")
+
+    second.record_started(tmp_path / "a.jar")
+    assert second.in_flight() == [str(tmp_path / "b.jar")]
+    second.close()
+
+
+def test_install_id_survives_compaction(tmp_path):
+    journal_path = tmp_path / ".install.journal"
+    first = BatchJournal(journal_path).open()
+    for _ in range(100):
+        first.record_failed(tmp_path / "a.jar", "timeout")
+    first.record_started(tmp_path / "b.jar")
+    first.close()
+
+    second = BatchJournal(journal_path).open()
+    assert second.in_flight() == [str(tmp_path / "b.jar")]
+    second.close()
+
+    third = BatchJournal(journal_path).open()
+    assert third.get_entry(tmp_path / "b.jar").install_id == first.install_id
+    third.close()
+
+
+async def _download_with_journal(servers, assets, dest, journal):
+    from app.littledl import MCBatchDownloader
+
+    downloader = MCBatchDownloader(max_concurrent_files=4)
+    downloader.set_journal(journal)
+    for sha1, size, expected in assets:
+        await downloader.add_url(
+            f"{servers.mirror}/assets/{sha1[:2]}/{sha1}",
+            str(dest),
+            sha1,
+            size=size,
+            expected_hash=expected,
+        )
+    try:
+        await downloader.start()
+    finally:
+        await downloader.stop()
+
+
+def test_batch_records_verified_hash_with_completion(stand_in, tmp_path):
+    servers, catalog = stand_in
+    (hashed, hashed_size), (plain, plain_size) = catalog.tiny_assets[:2]
+    journal = BatchJournal(tmp_path / ".install.journal").open()
+
+    asyncio.run(
+        _download_with_journal(
+            servers,
+            [(hashed, hashed_size, hashed), (plain, plain_size, None)],
+            tmp_path / "objects",
+            journal,
+        )
+    )
+
+    # 下载时已按期望哈希校验的文件直接记为已校验，没有期望哈希的只记完成
+    assert journal.is_verified(tmp_path / "objects" / hashed, hashed)
+    assert journal.get_entry(tmp_path / "objects" / hashed).sha1 == hashed
+    assert journal.get_entry(tmp_path / "objects" / plain).state == "done"
+    assert not journal.is_verified(tmp_path / "objects" / plain)
+    journal.close()
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from pathlib import Path
+
+from app.littledl.batch import FileScheduler, FileTask
+from app.littledl.breaker import CircuitBreaker, CircuitState
+from app.littledl.reuse import MultiSourceManager
+
+HOST = "mirror.example.com"
+OTHER = "official.example.com"
+
+
+def _trip_until_down(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.give_up_after_trips):
+        time.sleep(breaker.max_reset_timeout)
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure(HOST)
+
+
+def _down_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01, max_reset_timeout=0.01)
+    _trip_until_down(breaker)
+    assert breaker.is_down(HOST)
+    return breaker
+
+
+def test_down_host_gets_single_probe_after_cooldown():
+    breaker = _down_breaker()
+    time.sleep(0.02)
+
+    assert breaker.state(HOST) == CircuitState.HALF_OPEN
+    assert not breaker.is_down(HOST)
+    assert breaker.allow_request(HOST)
+    assert not breaker.allow_request(HOST)
+
+
+def test_successful_probe_closes_down_host():
+    breaker = _down_breaker()
+    time.sleep(0.02)
+    assert breaker.allow_request(HOST)
+
+    breaker.record_success(HOST)
+
+    assert breaker.state(HOST) == CircuitState.CLOSED
+    assert not breaker.is_down(HOST)
+    assert breaker.allow_request(HOST)
+
+
+def test_failed_probe_marks_host_down_again():
+    breaker = _down_breaker()
+    time.sleep(0.02)
+    assert breaker.allow_request(HOST)
+
+    breaker.record_failure(HOST)
+
+    assert breaker.is_down(HOST)
+
+
+def test_scheduler_dispatches_one_probe_to_down_host():
+    async def run() -> None:
+        breaker = _down_breaker()
+        scheduler = FileScheduler(circuit_breaker=breaker)
+        for i in range(3):
+            await scheduler.add_task(
+                FileTask(task_id=f"t{i}", url=f"https://{HOST}/f{i}", save_path=Path(f"f{i}"))
+            )
+        time.sleep(0.02)
+
+        probe = await scheduler.get_next_task()
+        assert probe is not None
+        assert await scheduler.get_next_task() is None
+
+        breaker.record_success(HOST)
+        assert await scheduler.get_next_task() is not None
+
+    asyncio.run(run())
+
+
+def _open_breaker(*hosts: str) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    for host in hosts:
+        breaker.record_failure(host)
+        assert not breaker.is_available(host)
+    return breaker
+
+
+def _count_circuit_checks(scheduler: FileScheduler) -> list[int]:
+    calls = [0]
+    check = scheduler._circuit_allows
+
+    def counted(task):
+        calls[0] += 1
+        return check(task)
+
+    scheduler._circuit_allows = counted
+    return calls
+
+
+def test_scheduler_checks_open_host_once_per_dispatch():
+    async def run() -> None:
+        scheduler = FileScheduler(circuit_breaker=_open_breaker(HOST))
+        for i in range(2000):
+            await scheduler.add_task(
+                FileTask(task_id=f"t{i}", url=f"https://{HOST}/f{i}", save_path=Path(f"f{i}"))
+            )
+        await scheduler.add_task(
+            FileTask(task_id="other", url=f"https://{OTHER}/f", save_path=Path("other"))
+        )
+        calls = _count_circuit_checks(scheduler)
+
+        task = await scheduler.get_next_task()
+
+        assert task is not None and task.task_id == "other"
+        assert calls[0] == 2
+
+    asyncio.run(run())
+
+
+def test_scheduler_scan_is_bounded_when_every_source_is_open():
+    async def run() -> None:
+        scheduler = FileScheduler(circuit_breaker=_open_breaker(HOST, OTHER))
+        for i in range(2000):
+            task = FileTask(task_id=f"t{i}", url=f"https://{HOST}/f{i}", save_path=Path(f"f{i}"))
+            task.source_manager = MultiSourceManager()
+            task.source_manager.add_source(task.url, priority=2)
+            task.source_manager.add_source(f"https://{OTHER}/f{i}", priority=1)
+            await scheduler.add_task(task)
+        calls = _count_circuit_checks(scheduler)
+
+        assert await scheduler.get_next_task() is None
+        assert calls[0] == 512
+
+    asyncio.run(run())
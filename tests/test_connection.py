@@ -0,0 +1,61 @@
+import asyncio
+
+import httpcore
+import pytest
+
+from app.littledl.config import DownloadConfig
+from app.littledl.connection import (
+    HTTPCORE_INTERNALS_VERSION,
+    ConnectionPool,
+    h2_available,
+)
+from benchmarks.server import ServerHandle
+
+SPEC = {
+    "tiny_assets": 1,
+    "large_size": 1024,
+    "install_assets": 1,
+    "install_libraries": 1,
+    "install_client_size": 1024,
+}
+
+
+@pytest.fixture(scope="module")
+def h2_server():
+    if not h2_available():
+        pytest.skip("h2 is not installed")
+    with ServerHandle(SPEC, with_h2=True) as servers:
+        if not servers.h2:
+            pytest.skip(servers.info.get("h2_error") or "HTTP/2 server unavailable")
+        yield servers
+
+
+async def _stream_limit_after_request(url: str) -> int | None:
+    pool = ConnectionPool(DownloadConfig(), max_connections=1, http2=True)
+    await pool.initialize()
+    try:
+        response = await pool.client.get(url)
+        assert response.http_version == "HTTP/2"
+        return pool.get_h2_stream_limit()
+    finally:
+        await pool.close()
+
+
+def test_installed_httpcore_is_the_verified_major_version():
+    # get_h2_stream_limit 依赖 httpcore 的内部结构，升级主版本时需要重新验证
+    assert httpcore.__version__.startswith(HTTPCORE_INTERNALS_VERSION)
+
+
+def test_h2_stream_limit_is_read_from_the_live_connection(h2_server, monkeypatch):
+    monkeypatch.setenv("SSL_CERT_FILE", h2_server.info["cert"])
+
+    limit = asyncio.run(_stream_limit_after_request(h2_server.h2 + "/mc/game/version_manifest.json"))
+
+    assert isinstance(limit, int) and limit > 0
+
+
+def test_h2_stream_limit_is_not_read_on_unverified_httpcore(h2_server, monkeypatch):
+    monkeypatch.setenv("SSL_CERT_FILE", h2_server.info["cert"])
+    monkeypatch.setattr(httpcore, "__version__", "2.0.0")
+
+    assert asyncio.run(_stream_limit_after_request(h2_server.h2 + "/mc/game/version_manifest.json")) is None
@@ -0,0 +1,16 @@
+from app.services.download_engine import DownloadEngine
+
+
+async def _answer(progress):
+    return 42
+
+
+def test_engine_runs_jobs_again_after_shutdown():
+    engine = DownloadEngine.instance()
+    assert engine.submit_call(lambda: 1).result(timeout=5) == 1
+
+    engine.shutdown()
+
+    assert engine.submit_call(lambda: 2).result(timeout=5) == 2
+    assert engine.submit(_answer).result(timeout=5) == 42
+
@@ -0,0 +1,144 @@
+import pytest
+
+from app.littledl.hosts import HostPolicy, PerHostLimiter
+
+HOST = "mirror.example.com"
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _limiter(clock, **policy) -> PerHostLimiter:
+    return PerHostLimiter(HostPolicy(**policy), clock=clock)
+
+
+def _limit(limiter: PerHostLimiter) -> int:
+    return limiter.get_stats()[HOST]["connection_limit"]
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_throttle_halves_connection_limit(clock, status):
+    limiter = _limiter(clock, max_connections=8)
+
+    limiter.record_response(HOST, status)
+    assert _limit(limiter) == 4
+    limiter.record_response(HOST, status)
+    assert _limit(limiter) == 2
+
+
+def test_throttle_does_not_go_below_min_connections(clock):
+    limiter = _limiter(clock, max_connections=4, min_connections=2)
+
+    for _ in range(5):
+        limiter.record_throttle(HOST, 503)
+
+    assert _limit(limiter) == 2
+
+
+def test_errors_other_than_throttling_keep_the_limit(clock):
+    limiter = _limiter(clock, max_connections=8)
+    assert limiter.can_dispatch(HOST)
+
+    limiter.record_response(HOST, 404)
+    limiter.record_response(HOST, 500)
+
+    assert _limit(limiter) == 8
+    assert limiter.can_dispatch(HOST)
+
+
+def test_successes_recover_limit_additively(clock):
+    limiter = _limiter(clock, max_connections=8)
+    limiter.record_throttle(HOST, 503)
+    assert _limit(limiter) == 4
+
+    # 每攒够与当前上限相同次数的成功才加一
+    for _ in range(3):
+        limiter.record_success(HOST)
+    assert _limit(limiter) == 4
+    limiter.record_success(HOST)
+    assert _limit(limiter) == 5
+
+    for _ in range(5 + 6 + 7):
+        limiter.record_success(HOST)
+    assert _limit(limiter) == 8
+
+    for _ in range(20):
+        limiter.record_success(HOST)
+    assert _limit(limiter) == 8
+
+
+def test_retry_after_blocks_dispatch_until_it_expires(clock):
+    limiter = _limiter(clock)
+
+    limiter.record_response(HOST, 429, retry_after=5.0)
+
+    assert not limiter.can_dispatch(HOST)
+    clock.advance(4.9)
+    assert not limiter.can_dispatch(HOST)
+    clock.advance(0.2)
+    assert limiter.can_dispatch(HOST)
+
+
+def test_retry_after_is_capped_by_max_cooldown(clock):
+    limiter = _limiter(clock, max_cooldown=10.0)
+
+    limiter.record_response(HOST, 503, retry_after=3600.0)
+
+    clock.advance(10.1)
+    assert limiter.can_dispatch(HOST)
+
+
+def test_cooldown_without_retry_after_backs_off(clock):
+    limiter = _limiter(clock, default_cooldown=1.0)
+
+    limiter.record_throttle(HOST, 503)
+    clock.advance(1.1)
+    assert limiter.can_dispatch(HOST)
+
+    limiter.record_throttle(HOST, 503)
+    clock.advance(1.1)
+    assert not limiter.can_dispatch(HOST)
+    clock.advance(1.0)
+    assert limiter.can_dispatch(HOST)
+
+
+def test_connection_limit_blocks_dispatch(clock):
+    limiter = _limiter(clock, max_connections=2)
+
+    limiter.on_dispatch(HOST)
+    limiter.on_dispatch(HOST)
+    assert not limiter.can_dispatch(HOST)
+
+    limiter.on_release(HOST)
+    assert limiter.can_dispatch(HOST)
+
+
+def test_pacing_after_throttle_refills_with_the_clock(clock):
+    limiter = _limiter(clock, max_connections=8, min_request_rate=1.0)
+    for _ in range(4):
+        limiter.on_dispatch(HOST)
+        limiter.on_release(HOST)
+        clock.advance(0.25)
+    limiter.record_throttle(HOST, 429, retry_after=0)
+
+    # 被限流时按一秒窗口内的实际速率（4 次/秒）减半起步
+    assert limiter.get_stats()[HOST]["request_rate"] == pytest.approx(2.0)
+    assert limiter.can_dispatch(HOST)
+    limiter.on_dispatch(HOST)
+    limiter.on_release(HOST)
+    assert not limiter.can_dispatch(HOST)
+    clock.advance(0.5)
+    assert limiter.can_dispatch(HOST)
@@ -0,0 +1,59 @@
+from app.services.install_receipt import InstallReceipt
+from benchmarks.catalog import VERSION_ID
+
+
+def _asset_objects(root):
+    return [p for p in (root / "assets" / "objects").rglob("*") if p.is_file()]
+
+
+def test_install_into_empty_root(stand_in, make_downloader, tmp_path):
+    servers, catalog = stand_in
+    root = tmp_path / ".minecraft"
+    downloader = make_downloader(servers, root)
+
+    assert downloader.download_version(VERSION_ID), downloader.last_error
+
+    assert (root / "assets" / "indexes").is_dir()
+    assert (root / "assets" / "indexes" / "bench.json").is_file()
+    assert len(_asset_objects(root)) == len(catalog.install_assets)
+    receipt = InstallReceipt.load(root / "versions" / VERSION_ID)
+    assert receipt is not None
+    assert len(receipt) >= len(catalog.install_assets) + len(catalog.libraries) + 1
+
+
+def test_install_fails_without_asset_index(index_outage, make_downloader, tmp_path):
+    root = tmp_path / ".minecraft"
+    downloader = make_downloader(index_outage, root)
+
+    assert not downloader.download_version(VERSION_ID)
+    assert "资源索引" in downloader.last_error
+    assert not (root / "assets" / "objects").exists() or not _asset_objects(root)
+    assert InstallReceipt.load(root / "versions" / VERSION_ID) is None
+
+
+def test_multi_version_install_fails_without_asset_index(index_outage, make_downloader, tmp_path):
+    root = tmp_path / ".minecraft"
+    downloader = make_downloader(index_outage, root)
+
+    assert downloader.download_versions([VERSION_ID]) == {VERSION_ID: False}
+    assert InstallReceipt.load(root / "versions" / VERSION_ID) is None
+
+
+def test_install_falls_back_to_official_during_mirror_outage(
+    mirror_outage, make_downloader, tmp_path
+):
+    servers, catalog = mirror_outage
+    root = tmp_path / ".minecraft"
+    downloader = make_downloader(servers, root)
+
+    assert downloader.download_version(VERSION_ID), downloader.last_error
+    assert len(_asset_objects(root)) == len(catalog.install_assets)
+
+
+def test_install_fails_when_asset_downloads_fail(missing_assets, make_downloader, tmp_path):
+    root = tmp_path / ".minecraft"
+    downloader = make_downloader(missing_assets, root)
+
+    assert not downloader.download_version(VERSION_ID)
+    assert "下载失败文件" in downloader.last_error
+    assert InstallReceipt.load(root / "versions" / VERSION_ID) is None
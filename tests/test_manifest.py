@@ -0,0 +1,47 @@
+import asyncio
+import hashlib
+import io
+import json
+
+import httpx
+
+from app.littledl.__main__ import ManifestEntry, NdjsonReporter, run_manifest_download
+from app.littledl.config import DownloadConfig
+from benchmarks.catalog import content_sha1
+
+
+def test_manifest_entries_with_size_and_hash_skip_the_batch_probe(stand_in, tmp_path, monkeypatch):
+    servers, catalog = stand_in
+    large = catalog.get(catalog.large_key)
+    large_sha1 = content_sha1(large.seed, large.size)
+    asset_sha1, asset_size = catalog.tiny_assets[0]
+    entries = [
+        ManifestEntry(f"{servers.mirror}/files/large.bin", str(tmp_path / "large.bin"), size=large.size, sha1=large_sha1),
+        ManifestEntry(
+            f"{servers.mirror}/assets/{asset_sha1[:2]}/{asset_sha1}",
+            str(tmp_path / asset_sha1),
+            size=asset_size,
+            sha1=asset_sha1,
+        ),
+    ]
+
+    heads = []
+    original_head = httpx.AsyncClient.head
+
+    async def counting_head(self, url, *args, **kwargs):
+        heads.append(str(url))
+        return await original_head(self, url, *args, **kwargs)
+
+    monkeypatch.setattr(httpx.AsyncClient, "head", counting_head)
+    output = io.StringIO()
+
+    code = asyncio.run(
+        run_manifest_download(entries, DownloadConfig(), tmp_path, 4, NdjsonReporter(output=output))
+    )
+
+    assert code == 0, output.getvalue()
+    statuses = [e["status"] for e in map(json.loads, output.getvalue().splitlines()) if e["type"] == "file"]
+    assert statuses == ["completed", "completed"]
+    assert hashlib.sha1((tmp_path / "large.bin").read_bytes()).hexdigest() == large_sha1
+    # 批次层不再探测；只剩 Downloader 为分块下载大文件时自己发的一次 HEAD
+    assert heads == [f"{servers.mirror}/files/large.bin"]
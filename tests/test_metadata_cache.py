@@ -0,0 +1,144 @@
+import pytest
+import requests
+
+from app.services.metadata_cache import MetadataCache, MetadataCacheMiss
+
+URL = "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
+SHA1_URL = (
+    "https://piston-meta.mojang.com/v1/packages/"
+    "0123456789abcdef0123456789abcdef01234567/1.21.json"
+)
+
+
+class StubResponse:
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class StubSession:
+    """按顺序返回预设响应（或抛出异常），并记录每次请求的头"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.requests.append((url, dict(headers or {})))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = MetadataCache.instance()
+    monkeypatch.setattr(cache, "cache_dir", tmp_path / "metadata")
+    monkeypatch.setattr(
+        cache, "_stats", {"hits": 0, "revalidated": 0, "fetched": 0, "stale": 0, "misses": 0}
+    )
+    return cache
+
+
+def _validators():
+    return {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+
+def test_first_fetch_stores_body_and_validators(cache):
+    session = StubSession(StubResponse(200, b'{"a": 1}', _validators()))
+
+    entry = cache.fetch(session, URL)
+
+    assert entry.json() == {"a": 1}
+    assert session.requests == [(URL, {})]
+    stored = cache.get(URL)
+    assert stored.body == b'{"a": 1}'
+    assert stored.etag == '"v1"'
+    assert stored.last_modified == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def test_revalidation_sends_validators_and_reuses_body_on_304(cache):
+    cache.put(URL, b"cached", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    session = StubSession(StubResponse(304))
+
+    entry = cache.fetch(session, URL)
+
+    assert entry.body == b"cached"
+    assert entry.revalidated
+    assert session.requests[0][1] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert cache.get_stats()["revalidated"] == 1
+
+
+def test_changed_resource_replaces_cached_body(cache):
+    cache.put(URL, b"old", etag='"v1"')
+    session = StubSession(StubResponse(200, b"new", {"ETag": '"v2"'}))
+
+    assert cache.fetch(session, URL).body == b"new"
+    assert cache.get(URL).etag == '"v2"'
+
+
+def test_fresh_entry_is_used_without_a_request(cache):
+    cache.put(URL, b"cached")
+    session = StubSession()
+
+    assert cache.fetch(session, URL, max_age=3600).body == b"cached"
+    assert session.requests == []
+
+
+def test_expired_entry_is_revalidated(cache, monkeypatch):
+    cache.put(URL, b"cached", etag='"v1"')
+    entry = cache.get(URL)
+    monkeypatch.setattr(type(entry), "age", property(lambda self: 7200.0))
+    session = StubSession(StubResponse(304))
+
+    assert cache.fetch(session, URL, max_age=3600).body == b"cached"
+    assert len(session.requests) == 1
+
+
+@pytest.mark.parametrize(
+    "failure",
+    [requests.ConnectionError("offline"), StubResponse(503)],
+    ids=["connection-error", "server-error"],
+)
+def test_failed_request_falls_back_to_stale_entry(cache, failure):
+    cache.put(URL, b"stale", etag='"v1"')
+    session = StubSession(failure)
+
+    assert cache.fetch(session, URL).body == b"stale"
+    assert cache.get_stats()["stale"] == 1
+
+
+def test_failed_request_without_cache_raises(cache):
+    session = StubSession(requests.ConnectionError("offline"))
+
+    with pytest.raises(requests.ConnectionError):
+        cache.fetch(session, URL)
+
+
+def test_offline_mode_reads_cache_without_requests(cache):
+    cache.put(URL, b"cached")
+    session = StubSession()
+
+    assert cache.fetch(session, URL, offline=True).body == b"cached"
+    with pytest.raises(MetadataCacheMiss):
+        cache.fetch(session, URL + "?other", offline=True)
+    assert session.requests == []
+
+
+def test_content_addressed_url_skips_revalidation(cache):
+    session = StubSession(StubResponse(200, b"{}", _validators()))
+    cache.fetch(session, SHA1_URL)
+
+    # 路径带 sha1 的地址内容不可变，即使不给 max_age 也不再发请求
+    assert cache.fetch(session, SHA1_URL).body == b"{}"
+    assert len(session.requests) == 1
+    assert cache.get_stats()["hits"] == 1
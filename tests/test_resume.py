@@ -0,0 +1,210 @@
+import asyncio
+import json
+
+import pytest
+
+from app.littledl.chunk import Chunk, ChunkManager, ChunkStatus
+from app.littledl.exceptions import ResumeDataCorruptedError
+from app.littledl.resume import (
+    HEADER_SIZE,
+    META_MAGIC,
+    RECORD_SIZE,
+    DownloadMetadata,
+    ResumeManager,
+)
+
+URL = "https://example.com/file.bin"
+FILE_SIZE = 1000
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def _manager(tmp_path, chunks=4) -> tuple[ResumeManager, ChunkManager]:
+    resume = ResumeManager(tmp_path, "abc")
+    resume.initialize(URL, FILE_SIZE, "file.bin")
+    chunk_manager = ChunkManager(FILE_SIZE, max_chunks=chunks, min_chunk_size=100)
+    chunk_manager.initialize_chunks()
+    run(resume.adopt_layout(chunk_manager))
+    return resume, chunk_manager
+
+
+def _load(tmp_path) -> DownloadMetadata:
+    metadata = run(ResumeManager(tmp_path, "abc").load())
+    assert metadata is not None
+    return metadata
+
+
+def _table_offset(resume: ResumeManager) -> int:
+    return HEADER_SIZE + len(resume._strings)
+
+
+def test_save_load_round_trip(tmp_path):
+    resume, chunks = _manager(tmp_path)
+    chunks.chunks[0].update_progress(100)
+    chunks.chunks[1].update_progress(250)
+    run(resume.update_from_chunk_manager(chunks))
+    run(resume.save(force=True))
+    assert resume.meta_path.read_bytes().startswith(META_MAGIC)
+
+    metadata = _load(tmp_path)
+    assert metadata.url == URL
+    assert metadata.file_size == FILE_SIZE
+    assert [(c["start_byte"], c["end_byte"]) for c in metadata.chunks] == [
+        (c.start_byte, c.end_byte) for c in chunks.chunks
+    ]
+    assert [c["downloaded"] for c in metadata.chunks] == [100, 250, 0, 0]
+    assert metadata.chunks[1]["status"] == ChunkStatus.COMPLETED.value
+    assert metadata.total_downloaded == 350
+
+
+def test_in_place_checkpoint_and_appended_slot(tmp_path):
+    resume, chunks = _manager(tmp_path)
+    run(resume.save(force=True))
+    size_before = resume.meta_path.stat().st_size
+
+    chunks.chunks[2].update_progress(40)
+    run(resume.update_chunk_progress(chunks.chunks[2]))
+    extra = Chunk(index=9, start_byte=900, end_byte=1000, total_size=FILE_SIZE, downloaded=10)
+    run(resume.update_chunk_progress(extra))
+    run(resume.save(force=True))
+
+    # 只原地改写记录并在表尾追加一条，不整体重写
+    assert resume.meta_path.stat().st_size == size_before + RECORD_SIZE
+    metadata = _load(tmp_path)
+    assert metadata.chunks[2]["downloaded"] == 40
+    assert metadata.chunks[-1]["index"] == 9
+    assert metadata.chunks[-1]["downloaded"] == 10
+
+
+def test_corrupted_record_only_loses_that_chunk(tmp_path):
+    resume, chunks = _manager(tmp_path)
+    for chunk in chunks.chunks:
+        chunk.update_progress(100)
+    run(resume.update_from_chunk_manager(chunks))
+    run(resume.save(force=True))
+
+    content = bytearray(resume.meta_path.read_bytes())
+    content[_table_offset(resume) + RECORD_SIZE + 20] ^= 0xFF
+    resume.meta_path.write_bytes(bytes(content))
+
+    metadata = _load(tmp_path)
+    assert [c["downloaded"] for c in metadata.chunks] == [100, 0, 100, 100]
+    assert metadata.chunks[1]["status"] == "pending"
+
+
+def test_torn_appended_record_is_dropped(tmp_path):
+    resume, chunks = _manager(tmp_path)
+    run(resume.save(force=True))
+
+    content = resume.meta_path.read_bytes()
+    resume.meta_path.write_bytes(content[: -RECORD_SIZE // 2])
+
+    assert len(_load(tmp_path).chunks) == len(chunks.chunks) - 1
+
+
+def test_corrupted_header_raises(tmp_path):
+    resume, _ = _manager(tmp_path)
+    run(resume.save(force=True))
+
+    content = bytearray(resume.meta_path.read_bytes())
+    content[10] ^= 0xFF
+    resume.meta_path.write_bytes(bytes(content))
+
+    with pytest.raises(ResumeDataCorruptedError):
+        _load(tmp_path)
+
+
+def _write_legacy(tmp_path, download_id: str, status: str, chunks: list) -> None:
+    metadata = DownloadMetadata(
+        download_id=download_id,
+        url=URL,
+        file_size=FILE_SIZE,
+        filename="file.bin",
+        save_path=str(tmp_path),
+        created_at=1.0,
+        updated_at=2.0,
+        chunks=chunks,
+        total_downloaded=sum(c["downloaded"] for c in chunks),
+        status=status,
+    )
+    (tmp_path / f".{download_id}.meta").write_text(json.dumps(metadata.to_dict()), encoding="utf-8")
+
+
+def test_legacy_json_is_migrated_on_save(tmp_path):
+    chunks = ChunkManager(FILE_SIZE, max_chunks=2, min_chunk_size=100)
+    chunks.initialize_chunks()
+    chunks.chunks[0].update_progress(123)
+    _write_legacy(tmp_path, "abc", "downloading", chunks.to_dict())
+
+    resume = ResumeManager(tmp_path, "abc")
+    metadata = run(resume.load())
+    assert metadata.chunks[0]["downloaded"] == 123
+    run(resume.save(force=True))
+
+    assert resume.meta_path.read_bytes().startswith(META_MAGIC)
+    migrated = _load(tmp_path)
+    assert migrated.created_at == 1.0
+    assert [c["downloaded"] for c in migrated.chunks] == [123, 0]
+
+
+def test_find_pending_downloads_reads_both_formats(tmp_path):
+    _write_legacy(tmp_path, "legacy", "downloading", [])
+    _write_legacy(tmp_path, "legacy-done", "completed", [])
+    resume, _ = _manager(tmp_path)
+    run(resume.save(force=True))
+    done = ResumeManager(tmp_path, "done")
+    done.initialize(URL, FILE_SIZE, "other.bin")
+    run(done.mark_completed())
+
+    pending = ResumeManager.find_pending_downloads(tmp_path)
+
+    assert sorted(p.name for p in pending) == [".abc.meta", ".legacy.meta"]
+
+
+def test_resume_after_resplit_restores_byte_offsets(tmp_path):
+    resume, chunks = _manager(tmp_path, chunks=2)
+    first = chunks.chunks[0]
+    first.update_progress(200)
+    first.start_download("w")
+    # 慢分片被拆开：原分片截到已下载的位置，剩余区间由新分片（新编号，追加在表尾）接手
+    tail = chunks.resplit_chunk(0, num_splits=2)
+    assert tail is not None
+    first.end_byte = first.start_byte + first.downloaded
+    first.complete()
+    for i, chunk in enumerate(tail):
+        chunk.index = 10 + i
+        chunks.chunks.append(chunk)
+    tail[0].update_progress(50)
+    run(resume.update_from_chunk_manager(chunks))
+    run(resume.save(force=True))
+
+    metadata = _load(tmp_path)
+    restored = ChunkManager(FILE_SIZE, max_chunks=8, min_chunk_size=100)
+    assert restored.restore_chunks(metadata.chunks)
+
+    layout = [(c.start_byte, c.end_byte, c.current_download_start) for c in restored.chunks]
+    assert layout == [
+        (0, 200, 200),
+        (200, 350, 250),
+        (350, 500, 350),
+        (500, 1000, 500),
+    ]
+    assert [c.index for c in restored.chunks] == [0, 1, 2, 3]
+    assert restored.total_downloaded == 250
+
+    # 重新编号后的布局整体写回，再次加载得到同样的偏移
+    run(resume.adopt_layout(restored))
+    run(resume.save(force=True))
+    again = ChunkManager(FILE_SIZE, max_chunks=8, min_chunk_size=100)
+    assert again.restore_chunks(_load(tmp_path).chunks)
+    assert [(c.start_byte, c.end_byte, c.current_download_start) for c in again.chunks] == layout
+
+
+def test_restore_rejects_layout_with_gap(tmp_path):
+    chunks = [
+        Chunk(index=0, start_byte=0, end_byte=400, total_size=FILE_SIZE).to_dict(),
+        Chunk(index=1, start_byte=500, end_byte=1000, total_size=FILE_SIZE).to_dict(),
+    ]
+    assert not ChunkManager(FILE_SIZE).restore_chunks(chunks)
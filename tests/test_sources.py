@@ -0,0 +1,28 @@
+import pytest
+
+from app.cli import SOURCES, parse_args
+from app.services.download_service_v2 import DownloadSource, MinecraftDownloader
+
+ASSET = "https://resources.download.minecraft.net/ab/abcdef"
+MIRROR = "https://bmclapi2.bangbang93.com/assets/ab/abcdef"
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (DownloadSource.BMCLAPI_FIRST, [MIRROR, ASSET]),
+        (DownloadSource.MIRROR_FIRST, [MIRROR, ASSET]),
+        (DownloadSource.OFFICIAL_FIRST, [ASSET, MIRROR]),
+        (DownloadSource.MIRROR_ONLY, [MIRROR]),
+        (DownloadSource.OFFICIAL_ONLY, [ASSET]),
+    ],
+)
+def test_download_source_orders_asset_urls(tmp_path, source, expected):
+    downloader = MinecraftDownloader(str(tmp_path), download_source=source)
+
+    assert downloader._get_source_urls(ASSET, is_asset=True) == expected
+
+
+def test_cli_accepts_every_download_source():
+    assert set(SOURCES.values()) == set(DownloadSource)
+    assert SOURCES[parse_args(["install", "1.20.1", "--source", "mirror_first"]).source] == DownloadSource.MIRROR_FIRST
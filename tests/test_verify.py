@@ -0,0 +1,110 @@
+import hashlib
+import os
+
+import pytest
+
+from app.services.install_receipt import InstallReceipt
+from benchmarks.catalog import VERSION_ID
+
+
+def _sha1(path):
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+@pytest.fixture
+def installed(stand_in, make_downloader, tmp_path):
+    """装好一个版本，返回 (下载器, 游戏目录, 文件目录)"""
+    servers, catalog = stand_in
+    root = tmp_path / ".minecraft"
+    downloader = make_downloader(servers, root)
+    assert downloader.download_version(VERSION_ID), downloader.last_error
+    return downloader, root, catalog
+
+
+def _asset_path(root, catalog, index=0):
+    sha1, _ = catalog.install_assets[index]
+    return root / "assets" / "objects" / sha1[:2] / sha1, sha1
+
+
+def _library_path(root, catalog, index=0):
+    path, sha1, _ = catalog.libraries[index]
+    return root / "libraries" / path, sha1
+
+
+def _corrupt(path):
+    """改写一个字节，大小不变"""
+    data = bytearray(path.read_bytes())
+    data[0] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+
+def test_fresh_install_verifies_from_receipt(installed):
+    downloader, _, catalog = installed
+
+    report = downloader.verify_version(VERSION_ID)
+
+    assert report.ok
+    assert report.checked >= len(catalog.install_assets) + len(catalog.libraries)
+    # 文件都与回执一致，快速校验不需要计算哈希
+    assert report.hashed == 0
+
+
+def test_verify_reports_and_repair_restores_missing_file(installed):
+    downloader, root, catalog = installed
+    path, sha1 = _asset_path(root, catalog)
+    path.unlink()
+
+    report = downloader.verify_version(VERSION_ID)
+    assert [os.path.normcase(f.local_path) for f in report.missing] == [
+        os.path.normcase(str(path))
+    ]
+    assert not report.corrupt
+
+    assert downloader.repair_version(VERSION_ID), downloader.last_error
+    assert _sha1(path) == sha1
+    assert downloader.verify_version(VERSION_ID).ok
+
+
+def test_verify_detects_and_repair_replaces_modified_file(installed):
+    downloader, root, catalog = installed
+    path, sha1 = _library_path(root, catalog)
+    _corrupt(path)
+
+    report = downloader.verify_version(VERSION_ID)
+    # 大小与 mtime 和回执不一致，只有这个文件被重新计算哈希
+    assert report.hashed == 1
+    assert [os.path.normcase(f.local_path) for f in report.corrupt] == [
+        os.path.normcase(str(path))
+    ]
+
+    assert downloader.repair_version(VERSION_ID), downloader.last_error
+    assert _sha1(path) == sha1
+    assert downloader.verify_version(VERSION_ID).ok
+
+
+def test_deep_verify_catches_corruption_that_keeps_size_and_mtime(installed):
+    downloader, root, catalog = installed
+    path, _ = _asset_path(root, catalog, index=1)
+    stat = path.stat()
+    _corrupt(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert downloader.verify_version(VERSION_ID).ok
+
+    report = downloader.verify_version(VERSION_ID, deep=True)
+    assert [os.path.normcase(f.local_path) for f in report.corrupt] == [
+        os.path.normcase(str(path))
+    ]
+
+
+def test_receipt_check_stops_at_time_budget(installed):
+    _, root, _ = installed
+    receipt = InstallReceipt.load(root / "versions" / VERSION_ID)
+
+    bounded = receipt.check(time_budget=0)
+    assert not bounded.complete
+    assert bounded.checked == 0
+
+    full = receipt.check(time_budget=60)
+    assert full.complete and full.ok
+    assert full.checked == len(receipt)